@@ -1,9 +1,17 @@
 from flask import Flask, jsonify
 
-from app.models.revoked_token import RevokedToken
 from .config import Config
 from .extensions import db, migrate, jwt
 from .routes import register_blueprints
+from .commands import register_commands
+from .services.token_blocklist import blocklist
+from .services.current_user import user_cache
+from .services.passwords import hasher
+from .services.reference_data import registry
+from .services.person_search import name_index
+from .services.audit import audit_log
+from .services.patient_numbers import patient_numbers
+from .services.read_replica import replica_router
 from flasgger import Swagger
 from .schemas.swagger_definitions import swagger_template
 from .config import app_config
@@ -16,16 +24,27 @@ def create_app(config_name):
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    blocklist.init_app(app)
+    user_cache.init_app(app)
+    hasher.init_app(app)
+    registry.init_app(app)
+    name_index.init_app(app)
+    audit_log.init_app(app)
+    patient_numbers.init_app(app)
+    replica_router.init_app(app)
     Swagger(app, template=swagger_template)
-    from .models import appointment, user, patient, provider, insurance, record, person
+    from .models import appointment, user, patient, provider, insurance, record, person, refresh_token, working_hours, series, outbox, reference_data, occupancy, waitlist, audit, linkage
     register_blueprints(app)
+    register_commands(app)
     CORS(app)
 
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload["jti"]
-        token = RevokedToken.query.filter_by(jti=jti).first()
-        return token is not None  # True means token is revoked
+        return blocklist.is_revoked(jwt_payload["jti"], jwt_payload.get("fam"))  # True means token is revoked
+
+    @jwt.user_lookup_loader
+    def load_current_user(jwt_header, jwt_payload):
+        return user_cache.get(jwt_payload["sub"])
 
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
@@ -0,0 +1,146 @@
+import json
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.services import occupancy
+from app.services.notifications import make_sender
+from app.services.audit import audit_log
+from app.services.importer import FORMATS as IMPORT_FORMATS, SPECS, import_rows, read_rows
+from app.extensions import db
+from app.models.user import User
+from app.services.outbox import dispatch_batch
+from app.services.read_replica import BIND_KEY, copy_sqlite
+from app.services.record_linkage import find_duplicates
+from app.services.record_export import FORMATS, export_rows, gzipped, serialize
+from app.services.token_blocklist import prune_expired_tokens, prune_expired_refresh_tokens
+
+tokens_cli = AppGroup('tokens', help='Manage revoked JWT tokens.')
+
+@tokens_cli.command('prune')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows deleted per transaction.')
+def prune_tokens(batch_size):
+    """Delete revoked and issued refresh tokens that have already expired."""
+    deleted = prune_expired_tokens(batch_size=batch_size)
+    click.echo(f"Deleted {deleted} expired revoked tokens.")
+    deleted = prune_expired_refresh_tokens(batch_size=batch_size)
+    click.echo(f"Deleted {deleted} expired refresh tokens.")
+
+outbox_cli = AppGroup('outbox', help='Deliver queued notifications.')
+
+@outbox_cli.command('dispatch')
+@click.option('--batch-size', type=int, default=None, help='Messages claimed per batch [default: OUTBOX_BATCH_SIZE].')
+@click.option('--poll-interval', default=5.0, show_default=True, help='Seconds to sleep when nothing is due.')
+@click.option('--once', is_flag=True, help='Exit once nothing is due instead of polling.')
+def dispatch_outbox(batch_size, poll_interval, once):
+    """Send due reminders through NOTIFICATION_SENDER. Several workers may run side by side."""
+    sender = make_sender(current_app.config)
+    batch_size = batch_size or current_app.config["OUTBOX_BATCH_SIZE"]
+    totals = [0, 0, 0]
+    while True:
+        counts = dispatch_batch(sender, batch_size)
+        totals = [total + count for total, count in zip(totals, counts)]
+        if any(counts):
+            continue
+        if once:
+            break
+        time.sleep(poll_interval)
+    click.echo(f"Sent {totals[0]}, skipped {totals[1]}, failed {totals[2]} notifications.")
+
+occupancy_cli = AppGroup('occupancy', help='Manage provider occupancy bitmaps.')
+
+@occupancy_cli.command('rebuild')
+@click.option('--provider-id', 'provider_ids', type=int, multiple=True, help='Limit to these providers (repeatable).')
+@click.option('--from', 'range_start', type=click.DateTime(), default=None, help='First day to rebuild.')
+@click.option('--to', 'range_end', type=click.DateTime(), default=None, help='Day after the last one to rebuild.')
+def rebuild_occupancy(provider_ids, range_start, range_end):
+    """Recreate the occupancy bitmaps from the appointments table."""
+    rows = occupancy.rebuild(list(provider_ids) or None, range_start, range_end)
+    click.echo(f"Rebuilt {rows} provider-day bitmaps.")
+
+records_cli = AppGroup('records', help='Export medical records.')
+
+@records_cli.command('export')
+@click.option('--format', 'export_format', type=click.Choice(list(FORMATS)), default='ndjson', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the output with gzip.')
+@click.option('--output', type=click.File('wb'), default='-', show_default=True, help='File to write to.')
+@click.option('--patient-id', type=int, default=None, help='Only this patient\'s records.')
+@click.option('--provider-id', type=int, default=None, help='Only this provider\'s records.')
+@click.option('--from', 'created_from', type=click.DateTime(), default=None, help='Created at or after.')
+@click.option('--to', 'created_to', type=click.DateTime(), default=None, help='Created before.')
+@click.option('--batch-size', type=int, default=None, help='Rows per fetch [default: RECORD_EXPORT_BATCH_SIZE].')
+@click.option('--actor', required=True, help='Username of the person the export is for; recorded in the access log.')
+def export_records(export_format, compress, output, patient_id, provider_id, created_from, created_to, batch_size,
+                   actor):
+    """Stream medical records with appointment and patient fields as NDJSON or CSV."""
+    user = User.query.filter_by(username=actor).first()
+    if user is None:
+        raise click.BadParameter(f"No user named {actor!r}.", param_hint="--actor")
+    rows = export_rows(batch_size or current_app.config["RECORD_EXPORT_BATCH_SIZE"], patient_id=patient_id,
+                       provider_id=provider_id, created_from=created_from, created_to=created_to)
+    audit_log.record("export", "medical_record", patient_id=patient_id, actor=user)
+    chunks = serialize(rows, export_format)
+    for chunk in gzipped(chunks) if compress else chunks:
+        output.write(chunk)
+
+data_cli = AppGroup('data', help='Bulk load facility data.')
+
+@data_cli.command('import')
+@click.argument('kind', type=click.Choice(list(SPECS)))
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'input_format', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Input format [default: from the file extension, else ndjson].')
+@click.option('--chunk-size', type=int, default=None, help='Rows per transaction [default: IMPORT_CHUNK_SIZE].')
+@click.option('--errors', 'error_file', type=click.File('w'), default=None,
+              help='Write rejected rows here as NDJSON instead of to stderr.')
+def import_data(kind, source, input_format, chunk_size, error_file):
+    """Stream patients, providers or insurance policies from a CSV or NDJSON file."""
+    input_format = input_format or ("csv" if source.name.lower().endswith(".csv") else "ndjson")
+
+    def report(line, messages):
+        entry = json.dumps({"line": line, "errors": messages})
+        if error_file is not None:
+            error_file.write(entry + "\n")
+        else:
+            click.echo(entry, err=True)
+
+    counts = import_rows(kind, read_rows(source, input_format),
+                         chunk_size or current_app.config["IMPORT_CHUNK_SIZE"], report)
+    click.echo(f"Read {counts['rows']} rows: inserted {counts['inserted']}, "
+               f"invalid {counts['invalid']}, duplicates {counts['duplicates']}.")
+
+patients_cli = AppGroup('patients', help='Maintain patient records.')
+
+@patients_cli.command('find-duplicates')
+@click.option('--incremental', is_flag=True, help='Only check patients registered since the last run.')
+@click.option('--threshold', type=float, default=None, help='Minimum match score [default: RECORD_LINKAGE_THRESHOLD].')
+def find_duplicate_patients(incremental, threshold):
+    """Record duplicate-patient candidates for review."""
+    config = current_app.config
+    run = find_duplicates(incremental, threshold or config["RECORD_LINKAGE_THRESHOLD"],
+                          config["RECORD_LINKAGE_MAX_BLOCK"], config["RECORD_LINKAGE_BATCH_SIZE"])
+    click.echo(f"Checked {run.patients_checked} patients ({run.mode}), found {run.candidates_found} new duplicate candidates.")
+
+replica_cli = AppGroup('replica', help='Manage the read replica.')
+
+@replica_cli.command('sync')
+def sync_replica():
+    """Copy the primary SQLite database over the replica, for trying replica reads locally."""
+    if BIND_KEY not in db.engines:
+        raise click.ClickException("No replica configured; set DATABASE_REPLICA_URL.")
+    primary, replica = db.engines[None], db.engines[BIND_KEY]
+    if primary.dialect.name != "sqlite" or replica.dialect.name != "sqlite":
+        raise click.ClickException("Only SQLite databases can be copied; replicate Postgres with its own tooling.")
+    copy_sqlite(primary, replica)
+    click.echo(f"Copied {primary.url.database} to {replica.url.database}.")
+
+def register_commands(app):
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(occupancy_cli)
+    app.cli.add_command(records_cli)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(patients_cli)
+    app.cli.add_command(replica_cli)
@@ -10,9 +10,68 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
     JWT_ERROR_MESSAGE_KEY = 'message'
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ['access', 'refresh']
+    CURRENT_USER_CACHE_TTL_SECONDS = 60
+    REVOKED_TOKEN_CACHE_ENABLED = True
+    REVOKED_TOKEN_CACHE_REFRESH_SECONDS = 5
+    # Ids re-read on each refresh to catch revocations that committed out of id order
+    REVOKED_TOKEN_CACHE_OVERLAP_ROWS = 1000
+    # Werkzeug hash spec, e.g. "scrypt:N:r:p" or "pbkdf2:sha256:iterations".
+    # Stored hashes made with another spec are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_SALT_LENGTH = 16
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+    PASSWORD_HASH_TIMEOUT_SECONDS = 10
+    # Hashes running or queued at once; further logins get 503 straight away
+    PASSWORD_HASH_MAX_PENDING = 16
+    # Used for providers without a working-hours template: (weekday, start, end), Monday = 0
+    DEFAULT_WORKING_HOURS = [(weekday, "08:00", "17:00") for weekday in range(5)]
+    AVAILABILITY_MAX_DAYS = 31
+    BULK_BOOKING_MAX_ITEMS = 5000
+    PAGE_SIZE_DEFAULT = 50
+    PAGE_SIZE_MAX = 200
+    SERIES_MAX_OCCURRENCES = 260
+    # Window of series occurrences listed with appointments when the client gives no 'from'/'to'
+    SERIES_LISTING_DEFAULT_DAYS = 90
+    # Reminders are queued this long before an appointment's effective start
+    REMINDER_OFFSETS = [timedelta(hours=24), timedelta(hours=2)]
+    # Dotted path of the notification sender used by `flask outbox dispatch`
+    NOTIFICATION_SENDER = os.getenv("NOTIFICATION_SENDER", "app.services.notifications.StdoutSender")
+    NOTIFICATION_FILE_PATH = os.getenv("NOTIFICATION_FILE_PATH", "notifications.log")
+    OUTBOX_BATCH_SIZE = 100
+    OUTBOX_LEASE_SECONDS = 300
+    OUTBOX_MAX_ATTEMPTS = 5
+    OUTBOX_RETRY_BACKOFF_SECONDS = 60
+    # How often a worker checks whether another worker changed the reference data
+    REFERENCE_DATA_REFRESH_SECONDS = 30
+    REFERENCE_DATA_MAX_AGE = 300  # Cache-Control max-age of GET /reference-data
+    # Ranked patient/provider search: minimum share of the term's trigrams a name must contain
+    PERSON_SEARCH_THRESHOLD = 0.5
+    # SQLite only: age after which the in-process name index is rebuilt to see other workers' writes
+    PERSON_SEARCH_INDEX_MAX_AGE = 300
+    # Rows fetched per round trip while streaming a medical record export
+    RECORD_EXPORT_BATCH_SIZE = 1000
+    # PHI reads are buffered in memory and written to phi_access_log in batches
+    AUDIT_BATCH_SIZE = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS = 2.0
+    AUDIT_BUFFER_CAPACITY = 10000  # past this reads flush first, or get 503 while the database is down
+    AUDIT_BACKGROUND_FLUSH = True
+    # Bulk import: rows validated and inserted per transaction, and rejected rows listed in an API response
+    IMPORT_CHUNK_SIZE = 1000
+    IMPORT_MAX_REPORTED_ERRORS = 1000
+    # Duplicate-patient detection: minimum match score, largest block compared pairwise, patients per transaction
+    RECORD_LINKAGE_THRESHOLD = 0.8
+    RECORD_LINKAGE_MAX_BLOCK = 200
+    RECORD_LINKAGE_BATCH_SIZE = 2000
+    # Optional read replica, e.g. a second SQLite file locally (`flask replica sync` copies the primary
+    # over it). GET requests to these blueprints read from it unless the user wrote in the last few seconds.
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    READ_REPLICA_BLUEPRINTS = {"provider", "appointments", "patients", "medical_records", "insurance", "waitlist"}
+    READ_REPLICA_STICKY_SECONDS = 10
 
 class DevelopmentConfig(Config):
     """
@@ -32,6 +91,9 @@ class TestingConfig(Config):
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = False
     JWT_SECRET_KEY = 'test-secret-key'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    # The in-memory database has a single connection; tests flush the audit log themselves
+    AUDIT_BACKGROUND_FLUSH = False
 
 class ProductionConfig(Config):
     """
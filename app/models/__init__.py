@@ -1,7 +1,15 @@
 from .person import Person
 from .provider import Provider
+from .working_hours import ProviderWorkingHours
 from .patient import Patient
 from .user import User
 from .appointment import Appointment, AppointmentType
+from .series import AppointmentSeries, SeriesException
+from .outbox import OutboxMessage
+from .reference_data import ReferenceDataVersion
+from .occupancy import ProviderDayOccupancy
+from .waitlist import WaitlistEntry
 from .insurance import Insurance
 from .record import MedicalRecord
+from .audit import PhiAccessLog
+from .linkage import PatientBlockingKey, DuplicateCandidate, RecordLinkageRun
@@ -1,5 +1,6 @@
 from app.extensions import db
 from datetime import datetime
+from sqlalchemy import DDL, event
 
 class AppointmentType(db.Model):
     __tablename__ = 'appointment_types'
@@ -8,6 +9,17 @@ class AppointmentType(db.Model):
 
 class Appointment(db.Model):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        # Serves the overlap predicate: provider_id = ? AND status IN (...) AND effective_start < ? AND effective_end > ?
+        db.Index('ix_appointments_provider_status_effective', 'provider_id', 'status', 'effective_start', 'effective_end'),
+        # Keyset pagination orders by (effective_start, id) within each listing scope
+        db.Index('ix_appointments_effective_id', 'effective_start', 'id'),
+        db.Index('ix_appointments_provider_effective_id', 'provider_id', 'effective_start', 'id'),
+        db.Index('ix_appointments_patient_effective_id', 'patient_id', 'effective_start', 'id'),
+    )
+    # Statuses that still occupy the provider's time
+    ACTIVE_STATUSES = ('scheduled', 'rescheduled')
+
     id = db.Column(db.Integer, primary_key=True)
 
     appointment_type_id = db.Column(db.Integer, db.ForeignKey('appointment_types.id'))
@@ -19,6 +31,86 @@ class Appointment(db.Model):
     status = db.Column(db.String(30), default='scheduled')  # scheduled, completed, cancelled, rescheduled
     rescheduled_start_time = db.Column(db.DateTime, nullable=True)
     rescheduled_end_time = db.Column(db.DateTime, nullable=True)
+    # When the appointment actually takes place: the rescheduled times if set, else the original ones.
+    # Kept in sync by the before_insert/before_update listeners below.
+    effective_start = db.Column(db.DateTime, nullable=False)
+    effective_end = db.Column(db.DateTime, nullable=False)
 
     appointment_type = db.relationship('AppointmentType')
     medical_record = db.relationship('MedicalRecord', back_populates='appointment', uselist=False)
+
+    @classmethod
+    def overlapping(cls, provider_id, start_time, end_time):
+        """Active appointments of a provider whose effective interval intersects [start_time, end_time)."""
+        return cls.query.filter(
+            cls.provider_id == provider_id,
+            cls.status.in_(cls.ACTIVE_STATUSES),
+            cls.effective_start < end_time,
+            cls.effective_end > start_time
+        )
+
+    def sync_effective_interval(self):
+        self.effective_start = self.rescheduled_start_time or self.start_time
+        self.effective_end = self.rescheduled_end_time or self.end_time
+
+    @staticmethod
+    def is_overlap_error(error):
+        """True if an IntegrityError was raised by the no-overlap trigger/constraint."""
+        return "appointments_no_overlap" in str(error.orig)
+
+
+@event.listens_for(Appointment, 'before_insert')
+@event.listens_for(Appointment, 'before_update')
+def _sync_effective_interval(mapper, connection, target):
+    target.sync_effective_interval()
+
+
+# Double-booking guard enforced by the database so concurrent bookings cannot
+# both pass the check in create_appointment. Kept in sync with migrations 4c59778a39b8 and c3e1b7d05a62.
+NO_OVERLAP_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER appointments_no_overlap_insert
+    BEFORE INSERT ON appointments
+    WHEN NEW.status IN ('scheduled', 'rescheduled')
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.provider_id = NEW.provider_id
+              AND a.status IN ('scheduled', 'rescheduled')
+              AND a.effective_start < NEW.effective_end
+              AND a.effective_end > NEW.effective_start
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER appointments_no_overlap_update
+    BEFORE UPDATE OF provider_id, status, effective_start, effective_end ON appointments
+    WHEN NEW.status IN ('scheduled', 'rescheduled')
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.id != NEW.id
+              AND a.provider_id = NEW.provider_id
+              AND a.status IN ('scheduled', 'rescheduled')
+              AND a.effective_start < NEW.effective_end
+              AND a.effective_end > NEW.effective_start
+        );
+    END
+    """,
+]
+
+NO_OVERLAP_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (provider_id WITH =, tsrange(effective_start, effective_end) WITH &&)
+    WHERE (status IN ('scheduled', 'rescheduled'))
+    """,
+]
+
+for statement in NO_OVERLAP_SQLITE_TRIGGERS:
+    event.listen(Appointment.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in NO_OVERLAP_POSTGRES:
+    event.listen(Appointment.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
@@ -0,0 +1,62 @@
+from app.extensions import db
+from sqlalchemy import DDL, event
+
+class PhiAccessLog(db.Model):
+    """
+    One read of protected health information: who read which medical record
+    or insurance row, and when. Rows are written in batches by
+    `app.services.audit` and can never be updated or deleted.
+    """
+    __tablename__ = 'phi_access_log'
+    __table_args__ = (
+        # "Who looked at this patient's data" and "what did this user look at"
+        db.Index('ix_phi_access_log_patient_occurred', 'patient_id', 'occurred_at'),
+        db.Index('ix_phi_access_log_user_occurred', 'user_id', 'occurred_at'),
+    )
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    occurred_at = db.Column(db.DateTime, nullable=False)  # UTC
+    # No foreign keys: the trail must outlive the users and rows it mentions
+    user_id = db.Column(db.Integer, nullable=True)
+    role = db.Column(db.String(20), nullable=True)
+    action = db.Column(db.String(20), nullable=False)  # read, search, export
+    resource_type = db.Column(db.String(30), nullable=False)  # medical_record, insurance
+    resource_id = db.Column(db.Integer, nullable=True)  # None for an export or an empty result
+    patient_id = db.Column(db.Integer, nullable=True)
+    endpoint = db.Column(db.String(100), nullable=True)
+    remote_addr = db.Column(db.String(45), nullable=True)
+
+
+# Append-only, enforced by the database; created by migration d6513706eae3,
+# which has its own copy, so a change here needs a new migration
+APPEND_ONLY_POSTGRES = [
+    """
+    CREATE OR REPLACE FUNCTION phi_access_log_append_only() RETURNS trigger AS $$
+    BEGIN
+        RAISE EXCEPTION 'phi_access_log is append-only';
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER phi_access_log_append_only
+    BEFORE UPDATE OR DELETE ON phi_access_log
+    FOR EACH ROW EXECUTE FUNCTION phi_access_log_append_only()
+    """,
+]
+
+APPEND_ONLY_SQLITE = [
+    """
+    CREATE TRIGGER IF NOT EXISTS phi_access_log_no_update BEFORE UPDATE ON phi_access_log BEGIN
+        SELECT RAISE(ABORT, 'phi_access_log is append-only');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS phi_access_log_no_delete BEFORE DELETE ON phi_access_log BEGIN
+        SELECT RAISE(ABORT, 'phi_access_log is append-only');
+    END
+    """,
+]
+
+for statement in APPEND_ONLY_POSTGRES:
+    event.listen(PhiAccessLog.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in APPEND_ONLY_SQLITE:
+    event.listen(PhiAccessLog.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
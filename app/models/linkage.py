@@ -0,0 +1,38 @@
+from app.extensions import db
+from datetime import datetime
+
+class PatientBlockingKey(db.Model):
+    """
+    One blocking key of a patient (phonetic surname + birth year, phone
+    suffix, ...). Patients sharing a key form a block whose members are
+    compared with each other by the duplicate-detection job.
+    """
+    __tablename__ = 'patient_blocking_keys'
+    key = db.Column(db.String(40), primary_key=True)
+    person_id = db.Column(db.Integer, db.ForeignKey('persons.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+class DuplicateCandidate(db.Model):
+    """A pair of patients that probably describe the same person, waiting for a human to merge or dismiss it."""
+    __tablename__ = 'duplicate_candidates'
+    __table_args__ = (
+        db.UniqueConstraint('person_id', 'duplicate_person_id', name='uq_duplicate_candidates_pair'),
+        db.Index('ix_duplicate_candidates_status_score', 'status', 'score', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    person_id = db.Column(db.Integer, db.ForeignKey('persons.id', ondelete='CASCADE'), nullable=False)  # the lower id
+    duplicate_person_id = db.Column(db.Integer, db.ForeignKey('persons.id', ondelete='CASCADE'), nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+    reasons = db.Column(db.String(100), nullable=False)  # comma-separated fields that agree, e.g. "name,date_of_birth"
+    status = db.Column(db.String(20), nullable=False, default='open')  # open, merged, dismissed
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class RecordLinkageRun(db.Model):
+    """One run of `flask patients find-duplicates`; the last one's high-water mark drives incremental runs."""
+    __tablename__ = 'record_linkage_runs'
+    id = db.Column(db.Integer, primary_key=True)
+    mode = db.Column(db.String(20), nullable=False)  # full, incremental
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    last_patient_id = db.Column(db.Integer, nullable=False, default=0)  # highest patient id checked
+    patients_checked = db.Column(db.Integer, nullable=False, default=0)
+    candidates_found = db.Column(db.Integer, nullable=False, default=0)
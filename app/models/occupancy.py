@@ -0,0 +1,17 @@
+from app.extensions import db
+
+class ProviderDayOccupancy(db.Model):
+    """
+    Which fifteen-minute slots of one provider's day are taken by active
+    appointments: 96 bits packed into 12 bytes, bit 0 being 00:00-00:15.
+    Derived from the appointments table and kept current by
+    app.services.occupancy; `flask occupancy rebuild` recreates it.
+    """
+    __tablename__ = 'provider_day_occupancy'
+    __table_args__ = (
+        # "Who is free" scans one day across many providers
+        db.Index('ix_provider_day_occupancy_day', 'day'),
+    )
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    bits = db.Column(db.LargeBinary(12), nullable=False)
@@ -0,0 +1,26 @@
+from app.extensions import db
+from datetime import datetime
+
+class OutboxMessage(db.Model):
+    """
+    A notification queued in the same transaction as the change that caused
+    it and delivered later by `flask outbox dispatch`, so booking never
+    waits on an SMS or email gateway.
+    """
+    __tablename__ = 'outbox_messages'
+    __table_args__ = (
+        # Serves the claim query: status = 'pending' AND due_at <= now ORDER BY due_at
+        db.Index('ix_outbox_messages_status_due', 'status', 'due_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # appointment_reminder, appointment_cancelled, waitlist_offer
+    appointment_id = db.Column(db.Integer, db.ForeignKey('appointments.id', ondelete='CASCADE'), index=True)
+    due_at = db.Column(db.DateTime, nullable=False)  # clinic-local, like the appointment times
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processing, sent, failed, cancelled
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    locked_until = db.Column(db.DateTime, nullable=True)  # lease of the worker that claimed the row
+    last_error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    appointment = db.relationship('Appointment')
@@ -1,5 +1,6 @@
 from app.extensions import db
 from .person import Person
+from sqlalchemy import DDL, event
 from sqlalchemy.orm import validates
 import uuid
 
@@ -11,7 +12,31 @@ class Patient(Person):
     patient_number = db.Column(db.String(20), unique=True)
 
     __mapper_args__ = {'polymorphic_identity': 'patient'}
+    __table_args__ = (
+        db.Index('ix_patients_patient_number_prefix', 'patient_number',
+                 postgresql_ops={'patient_number': 'varchar_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
 
     insurances = db.relationship("Insurance", back_populates="patient", cascade="all, delete-orphan")
 
     appointments = db.relationship('Appointment', backref='patient')
+
+
+# Patient numbers are handed out in blocks of this many (app.services.patient_numbers).
+# Postgres reserves a block with one nextval() on a sequence stepping by the block
+# size; SQLite, which has no sequences, bumps a single-row counter table instead.
+# Migration e9a41e6856cc has its own copy; a change here needs a new migration.
+PATIENT_NUMBER_BLOCK_SIZE = 50
+
+patient_number_seq = db.Sequence('patient_number_seq', start=1, increment=PATIENT_NUMBER_BLOCK_SIZE, minvalue=1,
+                                 metadata=db.metadata)
+
+PATIENT_NUMBER_BLOCKS_SQLITE = [
+    "CREATE TABLE IF NOT EXISTS patient_number_blocks (next_value INTEGER NOT NULL)",
+    "INSERT INTO patient_number_blocks (next_value) VALUES (1)",
+]
+
+for statement in PATIENT_NUMBER_BLOCKS_SQLITE:
+    event.listen(Patient.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Patient.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS patient_number_blocks").execute_if(dialect='sqlite'))
@@ -1,4 +1,5 @@
 from app.extensions import db
+from sqlalchemy import DDL, event
 
 class Person(db.Model):
     __tablename__ = 'persons'
@@ -14,3 +15,19 @@ class Person(db.Model):
 
     type = db.Column(db.String(50)) 
     __mapper_args__ = {'polymorphic_identity': 'person', 'polymorphic_on': type}
+    __table_args__ = (
+        # Keyset pages of the patient and provider directories (app.services.directory),
+        # one range scan per page whichever sort the client picks
+        db.Index('ix_persons_type_id', 'type', 'id'),
+        db.Index('ix_persons_type_last_name_id', 'type', 'last_name', 'id'),
+        # Postgres only: a trigram index behind the ranked name search and a
+        # pattern index for national id prefixes (app.services.person_search).
+        # SQLite searches names with an in-process n-gram index instead.
+        db.Index('ix_persons_full_name_trgm', db.text("(first_name || ' ' || last_name) gin_trgm_ops"),
+                 postgresql_using='gin').ddl_if(dialect='postgresql'),
+        db.Index('ix_persons_national_id_prefix', 'national_id',
+                 postgresql_ops={'national_id': 'varchar_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+event.listen(Person.__table__, 'before_create',
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql'))
@@ -12,3 +12,5 @@ class Provider(Person):
 
     user = db.relationship('User', backref='provider', uselist=False)
     appointments = db.relationship('Appointment', backref='provider')
+    working_hours = db.relationship('ProviderWorkingHours', backref='provider', cascade='all, delete-orphan',
+                                    order_by='(ProviderWorkingHours.weekday, ProviderWorkingHours.start_time)')
@@ -1,5 +1,6 @@
 from datetime import datetime
 from app.extensions import db
+from sqlalchemy import DDL, event
 
 class MedicalRecord(db.Model):
     __tablename__ = 'medical_records'
@@ -15,4 +16,67 @@ class MedicalRecord(db.Model):
 
     appointment = db.relationship('Appointment', back_populates='medical_record')
     patient = db.relationship('Patient', backref='medical_records')
-    provider = db.relationship('Provider', backref='medical_records')
\ No newline at end of file
+    provider = db.relationship('Provider', backref='medical_records')
+
+
+# Full-text search over diagnosis, treatment and notes, maintained by the
+# database (see app.services.record_search). Postgres gets a tsvector column the
+# ORM does not map, a GIN index and a trigger; SQLite an external-content FTS5
+# table and triggers. Migration 9cbbfc62e776 has its own copy of these
+# statements; a change here needs a new migration.
+SEARCH_POSTGRES = [
+    "ALTER TABLE medical_records ADD COLUMN search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION medical_records_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.diagnosis, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.treatment, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.notes, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER medical_records_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF diagnosis, treatment, notes ON medical_records
+    FOR EACH ROW EXECUTE FUNCTION medical_records_search_vector_update()
+    """,
+    "CREATE INDEX ix_medical_records_search_vector ON medical_records USING gin (search_vector)",
+]
+
+SEARCH_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS medical_records_fts USING fts5(
+        diagnosis, treatment, notes, content='medical_records', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_records_fts_insert AFTER INSERT ON medical_records BEGIN
+        INSERT INTO medical_records_fts (rowid, diagnosis, treatment, notes)
+        VALUES (NEW.id, NEW.diagnosis, NEW.treatment, NEW.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_records_fts_delete AFTER DELETE ON medical_records BEGIN
+        INSERT INTO medical_records_fts (medical_records_fts, rowid, diagnosis, treatment, notes)
+        VALUES ('delete', OLD.id, OLD.diagnosis, OLD.treatment, OLD.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_records_fts_update AFTER UPDATE OF diagnosis, treatment, notes ON medical_records BEGIN
+        INSERT INTO medical_records_fts (medical_records_fts, rowid, diagnosis, treatment, notes)
+        VALUES ('delete', OLD.id, OLD.diagnosis, OLD.treatment, OLD.notes);
+        INSERT INTO medical_records_fts (rowid, diagnosis, treatment, notes)
+        VALUES (NEW.id, NEW.diagnosis, NEW.treatment, NEW.notes);
+    END
+    """,
+]
+
+for statement in SEARCH_POSTGRES:
+    event.listen(MedicalRecord.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in SEARCH_SQLITE:
+    event.listen(MedicalRecord.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+# The FTS5 table is not in the metadata, so drop it along with its content table
+event.listen(MedicalRecord.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS medical_records_fts").execute_if(dialect='sqlite'))
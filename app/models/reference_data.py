@@ -0,0 +1,19 @@
+from app.extensions import db
+from sqlalchemy import DDL, event
+
+class ReferenceDataVersion(db.Model):
+    """
+    Single-row counter bumped in the same transaction as any change to
+    appointment types or provider cadres/specializations, so every worker's
+    reference-data registry can tell its copy is out of date.
+    """
+    __tablename__ = 'reference_data_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Kept in sync with the migration that creates the table
+event.listen(
+    ReferenceDataVersion.__table__, 'after_create',
+    DDL("INSERT INTO reference_data_version (id, version) VALUES (1, 0)")
+)
@@ -0,0 +1,12 @@
+from app.extensions import db
+from datetime import datetime
+
+class RefreshToken(db.Model):
+    __tablename__ = 'refresh_tokens'
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(120), unique=True, nullable=False)
+    family = db.Column(db.String(36), nullable=False, index=True)  # shared by every token rotated from one login
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    replaced_by = db.Column(db.String(120), nullable=True)  # jti of the token issued when this one was used
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -7,3 +7,4 @@ class RevokedToken(db.Model):
     jti = db.Column(db.String(120), unique=True, nullable=False)
     token_type = db.Column(db.String(10), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)  # null for rows revoked before expiry was stored
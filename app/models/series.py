@@ -0,0 +1,40 @@
+from app.extensions import db
+from datetime import datetime
+
+class AppointmentSeries(db.Model):
+    """
+    A recurring appointment stored as an RRULE. Occurrences are expanded on
+    demand for the window being queried instead of being stored as rows.
+    """
+    __tablename__ = 'appointment_series'
+    __table_args__ = (
+        db.Index('ix_appointment_series_provider_span', 'provider_id', 'status', 'starts_at', 'ends_at'),
+        db.Index('ix_appointment_series_patient_span', 'patient_id', 'starts_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+
+    appointment_type_id = db.Column(db.Integer, db.ForeignKey('appointment_types.id'))
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable=False)
+
+    rrule = db.Column(db.String(255), nullable=False)  # e.g. FREQ=WEEKLY;BYDAY=TU;COUNT=24
+    duration_minutes = db.Column(db.Integer, nullable=False)
+    starts_at = db.Column(db.DateTime, nullable=False)  # DTSTART, also the first occurrence
+    ends_at = db.Column(db.DateTime, nullable=False)  # end of the last occurrence, for range lookups
+    status = db.Column(db.String(30), default='active')  # active, cancelled
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    exceptions = db.relationship('SeriesException', backref='series', cascade='all, delete-orphan')
+
+class SeriesException(db.Model):
+    """Per-occurrence override: one occurrence cancelled or moved to other times."""
+    __tablename__ = 'appointment_series_exceptions'
+    __table_args__ = (
+        db.UniqueConstraint('series_id', 'original_start', name='uq_series_exception_occurrence'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    series_id = db.Column(db.Integer, db.ForeignKey('appointment_series.id', ondelete='CASCADE'), nullable=False)
+    original_start = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(30), nullable=False)  # cancelled, rescheduled
+    new_start = db.Column(db.DateTime, nullable=True)
+    new_end = db.Column(db.DateTime, nullable=True)
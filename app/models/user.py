@@ -1,5 +1,5 @@
 from app.extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.passwords import hasher
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -12,7 +12,10 @@ class User(db.Model):
     person_id = db.Column(db.Integer, db.ForeignKey('persons.id'))
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return hasher.needs_rehash(self.password_hash)
@@ -0,0 +1,26 @@
+from app.extensions import db
+from datetime import datetime
+
+class WaitlistEntry(db.Model):
+    """
+    A patient waiting for an earlier slot. When an appointment is cancelled
+    the best fitting entry is booked into the freed time.
+    """
+    __tablename__ = 'waitlist_entries'
+    __table_args__ = (
+        # Matching walks one provider's waiting entries in (priority, requested_at, id) order
+        db.Index('ix_waitlist_entries_match_order', 'provider_id', 'status', 'priority', 'requested_at', 'id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False, index=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable=True)  # None: any provider
+    appointment_type_id = db.Column(db.Integer, db.ForeignKey('appointment_types.id'), nullable=True)  # None: any type
+
+    earliest_start = db.Column(db.DateTime, nullable=False)
+    latest_end = db.Column(db.DateTime, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=5)  # 0 is the most urgent
+    requested_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    status = db.Column(db.String(20), nullable=False, default='waiting')  # waiting, booked, withdrawn
+    appointment_id = db.Column(db.Integer, db.ForeignKey('appointments.id', ondelete='SET NULL'), nullable=True)
@@ -0,0 +1,10 @@
+from app.extensions import db
+
+class ProviderWorkingHours(db.Model):
+    """Weekly template of the hours a provider can be booked, one row per shift."""
+    __tablename__ = 'provider_working_hours'
+    id = db.Column(db.Integer, primary_key=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id', ondelete='CASCADE'), nullable=False, index=True)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
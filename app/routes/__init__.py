@@ -4,6 +4,9 @@ from .appointment import appointment_bp
 from .patient import patient_bp
 from .medical_record import medical_record_bp
 from .insurance import insurance_bp
+from .reference_data import reference_data_bp
+from .waitlist import waitlist_bp
+from .imports import imports_bp
 def register_blueprints(app):
     app.register_blueprint(auth_bp)
     app.register_blueprint(provider_bp)
@@ -11,3 +14,6 @@ def register_blueprints(app):
     app.register_blueprint(patient_bp)
     app.register_blueprint(medical_record_bp)
     app.register_blueprint(insurance_bp)
+    app.register_blueprint(reference_data_bp)
+    app.register_blueprint(waitlist_bp)
+    app.register_blueprint(imports_bp)
@@ -1,11 +1,26 @@
-import datetime
-from flask import Blueprint, request, jsonify
+from datetime import datetime, time, timedelta
+from flask import Blueprint, current_app, request, jsonify
 from app.extensions import db
 from app.models.appointment import Appointment
-from app.models.user import User
-from app.schemas.appointment import AppointmentSchema
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import and_, or_
+from app.models.outbox import OutboxMessage
+from app.models.provider import Provider
+from app.models.series import AppointmentSeries, SeriesException
+from app.models.working_hours import ProviderWorkingHours
+from app.services.availability import provider_free_slots
+from app.services import occupancy, waitlist
+from app.services.booking import accept_non_conflicting
+from app.services.outbox import enqueue_bulk_status_change, enqueue_reminders, enqueue_status_change, reminder_rows
+from app.services.pagination import page_args, paginated_response
+from app.services.recurrence import (
+    InvalidRule, active_occurrences_starting_in, cancel_occurrences, conflicting_starts, expand, load_series,
+    lock_providers, merged_page, parse_rule,
+    provider_is_busy, series_busy_intervals
+)
+from app.schemas.appointment import AppointmentSchema, AppointmentSeriesSchema, OccurrenceUpdateSchema
+from flask_jwt_extended import jwt_required, current_user
+from marshmallow import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from dateutil.parser import parse
 
 appointment_bp = Blueprint('appointments', __name__, url_prefix='/appointments')
@@ -28,6 +43,8 @@ def create_appointment():
     responses:
       201:
         description: Appointment created successfully
+      400:
+        description: Invalid input, e.g. an unknown appointment_type_id
       401:
         description: Unauthorized
       403:
@@ -35,48 +52,171 @@ def create_appointment():
       409:
         description: Conflict due to overlapping appointment
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    user = current_user
     
     data = request.get_json()
     schema = AppointmentSchema()
-    appt_data = schema.load(data)
+    try:
+        appt_data = schema.load(data)
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+    # Stored times are naive clinic-local, as in the bulk endpoint
+    appt_data["start_time"] = appt_data["start_time"].replace(tzinfo=None)
+    appt_data["end_time"] = appt_data["end_time"].replace(tzinfo=None)
 
     if user.role == "patient" and user.person_id != appt_data["patient_id"]:
         return jsonify({"message": "Access denied"}), 403
 
-    # Check for overlapping appointments
-    overlapping = Appointment.query.filter(
-        Appointment.provider_id == appt_data["provider_id"],
-        Appointment.status == "scheduled",
-        or_(
-            and_(
-                Appointment.start_time <= appt_data["start_time"],
-                Appointment.end_time > appt_data["start_time"]
-            ),
-            and_(
-                Appointment.start_time < appt_data["end_time"],
-                Appointment.end_time >= appt_data["end_time"]
-            ),
-            and_(
-                Appointment.start_time >= appt_data["start_time"],
-                Appointment.end_time <= appt_data["end_time"]
-            )
-        )
-    ).first()
-
-    if overlapping:
+    # The provider lock serializes this check with concurrent series creates and moves, whose
+    # occurrences are not stored rows; the database constraint below also covers stored bookings.
+    lock_providers([appt_data["provider_id"]])
+    if provider_is_busy(appt_data["provider_id"], appt_data["start_time"], appt_data["end_time"]):
         return jsonify({"message": "Provider is not available at the requested time"}), 409
 
     appointment = Appointment(**appt_data)
     db.session.add(appointment)
-    db.session.commit()
+    # Reminders are only queued here; `flask outbox dispatch` sends them
+    if appointment.status in Appointment.ACTIVE_STATUSES:
+        enqueue_reminders(appointment)
+    try:
+        db.session.commit()
+    except IntegrityError as err:
+        db.session.rollback()
+        if not Appointment.is_overlap_error(err):
+            raise
+        return jsonify({"message": "Provider is not available at the requested time"}), 409
 
     return jsonify({
         "message": "Appointment scheduled successfully",
         "appointment_id": appointment.id
     }), 201
 
+@appointment_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def create_appointments_bulk():
+    """
+    Book many appointments in one request (e.g. vaccination days)
+    ---
+    tags:
+      - Appointments
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: array
+          items:
+            $ref: '#/definitions/Appointment'
+    responses:
+      200:
+        description: >
+          Per-item results in payload order. Each item has status "created"
+          (with appointment_id) or "error" (with errors). Items that clash
+          with an existing booking or an earlier item in the payload fail.
+      400:
+        description: Body is not a list or exceeds BULK_BOOKING_MAX_ITEMS
+      401:
+        description: Unauthorized
+      409:
+        description: A conflicting booking was committed concurrently; nothing was saved
+    """
+    user = current_user
+    items = request.get_json()
+    max_items = current_app.config["BULK_BOOKING_MAX_ITEMS"]
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty list of appointments"}), 400
+    if len(items) > max_items:
+        return jsonify({"error": f"At most {max_items} appointments per request"}), 400
+
+    try:
+        loaded = AppointmentSchema(many=True).load(items)
+        errors = {}
+    except ValidationError as err:
+        loaded, errors = err.valid_data, err.messages
+
+    candidates = []
+    for index, appt_data in enumerate(loaded):
+        if index in errors:
+            continue
+        appt_data["start_time"] = appt_data["start_time"].replace(tzinfo=None)
+        appt_data["end_time"] = appt_data["end_time"].replace(tzinfo=None)
+        if user.role == "patient" and user.person_id != appt_data["patient_id"]:
+            errors[index] = {"message": "Access denied"}
+        elif appt_data["end_time"] <= appt_data["start_time"]:
+            errors[index] = {"end_time": ["Must be after start_time."]}
+        elif appt_data["status"] in Appointment.ACTIVE_STATUSES:
+            candidates.append((index, appt_data["provider_id"], appt_data["start_time"], appt_data["end_time"]))
+
+    # One query for every scheduled booking the batch could clash with
+    existing_by_provider = {}
+    if candidates:
+        lock_providers(provider_id for _, provider_id, _, _ in candidates)
+        appointments = Appointment.__table__.c
+        existing = db.session.execute(
+            select(appointments.provider_id, appointments.effective_start, appointments.effective_end).where(
+                appointments.provider_id.in_({provider_id for _, provider_id, _, _ in candidates}),
+                appointments.status.in_(Appointment.ACTIVE_STATUSES),
+                appointments.effective_start < max(end for _, _, _, end in candidates),
+                appointments.effective_end > min(start for _, _, start, _ in candidates)
+            )
+        )
+        for provider_id, start_time, end_time in existing:
+            existing_by_provider.setdefault(provider_id, []).append((start_time, end_time))
+        series_busy = series_busy_intervals(
+            {provider_id for _, provider_id, _, _ in candidates},
+            min(start for _, _, start, _ in candidates),
+            max(end for _, _, _, end in candidates)
+        )
+        for provider_id, intervals in series_busy.items():
+            existing_by_provider.setdefault(provider_id, []).extend(intervals)
+
+    _, rejected = accept_non_conflicting(candidates, existing_by_provider)
+    for index in rejected:
+        errors[index] = {"message": "Provider is not available at the requested time"}
+
+    to_insert = [index for index in range(len(loaded)) if index not in errors]
+    for index in to_insert:
+        # Bulk inserts skip mapper events, so fill the effective interval here
+        loaded[index]["effective_start"] = loaded[index]["start_time"]
+        loaded[index]["effective_end"] = loaded[index]["end_time"]
+    ids = []
+    if to_insert:
+        try:
+            ids = db.session.scalars(
+                insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True),
+                [loaded[index] for index in to_insert]
+            ).all()
+            reminders = [
+                row for index, appointment_id in zip(to_insert, ids)
+                if loaded[index]["status"] in Appointment.ACTIVE_STATUSES
+                for row in reminder_rows(appointment_id, loaded[index]["effective_start"])
+            ]
+            if reminders:
+                db.session.execute(insert(OutboxMessage), reminders)
+            occupancy.refresh(db.session.connection(), [
+                (loaded[index]["provider_id"], day)
+                for index in to_insert if loaded[index]["status"] in Appointment.ACTIVE_STATUSES
+                for day, _ in occupancy.day_masks(loaded[index]["effective_start"], loaded[index]["effective_end"])
+            ])
+            db.session.commit()
+        except IntegrityError as err:
+            db.session.rollback()
+            if not Appointment.is_overlap_error(err):
+                raise
+            return jsonify({"message": "A conflicting appointment was booked concurrently, please retry"}), 409
+
+    created = dict(zip(to_insert, ids))
+    results = []
+    for index in range(len(loaded)):
+        if index in created:
+            results.append({"index": index, "status": "created", "appointment_id": created[index]})
+        else:
+            results.append({"index": index, "status": "error", "errors": errors[index]})
+
+    return jsonify({"created": len(created), "failed": len(errors), "results": results}), 200
+
 @appointment_bp.route("/<int:appointment_id>/status", methods=["PATCH"])
 @jwt_required()
 def update_appointment_status(appointment_id):
@@ -102,9 +242,14 @@ def update_appointment_status(appointment_id):
               type: string
             rescheduled_end_time:
               type: string
+            fill_waitlist:
+              type: boolean
+              description: >
+                Offer a cancelled slot to the waitlist. Defaults to true, except
+                when the provider cancels (they are likely unavailable)
     responses:
       200:
-        description: Status updated
+        description: Status updated; a cancelled slot may be offered to the waitlist
       400:
         description: Invalid input
       401:
@@ -113,9 +258,10 @@ def update_appointment_status(appointment_id):
         description: Forbidden access
       404:
         description: Appointment not found
+      409:
+        description: Provider already has a scheduled appointment at that time
     """
-    user_id = get_jwt_identity()
-    user = User.query.get_or_404(user_id)
+    user = current_user
     appointment = Appointment.query.get_or_404(appointment_id)
 
     data = request.get_json()
@@ -139,21 +285,170 @@ def update_appointment_status(appointment_id):
         if not new_start or not new_end:
             return jsonify({"error": "Provide reschedule times"}), 400
         try:
-            appointment.rescheduled_start_time = parse(new_start)
-            appointment.rescheduled_end_time = parse(new_end)
+            appointment.rescheduled_start_time = _parse_datetime(new_start)
+            appointment.rescheduled_end_time = _parse_datetime(new_end)
         except Exception:
             return jsonify({"error": "Invalid datetime format"}), 400
 
+    # Restoring a cancelled or completed appointment books its slot again, like a reschedule.
+    # The overlap trigger/constraint can't see series occurrences, so check here too.
+    if new_status in Appointment.ACTIVE_STATUSES:
+        with db.session.no_autoflush:
+            lock_providers([appointment.provider_id])
+            if provider_is_busy(appointment.provider_id,
+                                appointment.rescheduled_start_time or appointment.start_time,
+                                appointment.rescheduled_end_time or appointment.end_time,
+                                exclude_appointment_id=appointment.id):
+                db.session.rollback()
+                return jsonify({"error": "Provider is not available at the requested time"}), 409
+
     appointment.status = new_status
+    try:
+        enqueue_status_change(appointment)
+        db.session.commit()
+    except IntegrityError as err:
+        db.session.rollback()
+        if not Appointment.is_overlap_error(err):
+            raise
+        return jsonify({"error": "Provider is not available at the requested time"}), 409
+
+    result = AppointmentSchema().dump(appointment)
+    if new_status == "cancelled" and data.get("fill_waitlist", user.role != "provider"):
+        waitlist.fill_cancelled([(appointment.provider_id, appointment.appointment_type_id,
+                                  appointment.effective_start, appointment.effective_end)])
+    return jsonify(result), 200
+
+@appointment_bp.route("/status", methods=["PATCH"])
+@jwt_required()
+def update_appointment_statuses():
+    """
+    Cancel or complete all of a provider's appointments in a time range
+    ---
+    tags:
+      - Appointments
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required: [provider_id, from, to, status]
+          properties:
+            provider_id:
+              type: integer
+            from:
+              type: string
+              format: date-time
+              description: Appointments (effectively) starting at or after this time
+            to:
+              type: string
+              format: date-time
+              description: Appointments (effectively) starting before this time
+            status:
+              type: string
+              enum: [cancelled, completed]
+            fill_waitlist:
+              type: boolean
+              default: false
+              description: >
+                Offer the cancelled slots to the waitlist. Off by default: bulk
+                cancels are mostly for a provider's absence
+    responses:
+      200:
+        description: >
+          Ids of the scheduled or rescheduled appointments that were updated,
+          the series occurrences cancelled with them (a completion lists them
+          under series_occurrences_not_updated instead), and the appointments
+          booked from the waitlist into cancelled slots
+      400:
+        description: Invalid input
+      401:
+        description: Unauthorized
+      403:
+        description: Forbidden access
+    """
+    user = current_user
+    data = request.get_json() or {}
+    new_status = data.get("status")
+
+    # Rescheduling needs per-appointment times, so only terminal statuses can be applied in bulk
+    if new_status not in ("cancelled", "completed"):
+        return jsonify({"error": "Invalid status"}), 400
+    try:
+        provider_id = int(data["provider_id"])
+        range_start = _parse_datetime(data["from"])
+        range_end = _parse_datetime(data["to"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return jsonify({"error": "Provide provider_id, 'from' and 'to'"}), 400
+    if range_end <= range_start:
+        return jsonify({"error": "'to' must be after 'from'"}), 400
+
+    # The rules of update_appointment_status, applied once for the whole set
+    if user.role == "provider" and provider_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+    if user.role == "patient" and new_status == "completed":
+        return jsonify({"error": "Only providers can mark as completed"}), 403
+
+    statement = (
+        update(Appointment)
+        .where(
+            Appointment.provider_id == provider_id,
+            Appointment.status.in_(Appointment.ACTIVE_STATUSES),
+            Appointment.effective_start >= range_start,
+            Appointment.effective_start < range_end
+        )
+        .values(status=new_status)
+        .returning(Appointment.id, Appointment.appointment_type_id, Appointment.effective_start, Appointment.effective_end)
+        .execution_options(synchronize_session=False)
+    )
+    if user.role == "patient":
+        statement = statement.where(Appointment.patient_id == user.person_id)
+
+    updated = db.session.execute(statement).all()
+    appointment_ids = sorted(appointment_id for appointment_id, _, _, _ in updated)
+
+    # Series occurrences are not rows the UPDATE can reach: cancel them through exceptions.
+    # Occurrences have no completed state, so a bulk completion reports them instead.
+    series_query = AppointmentSeries.query.filter(AppointmentSeries.provider_id == provider_id)
+    if user.role == "patient":
+        series_query = series_query.filter(AppointmentSeries.patient_id == user.person_id)
+    if new_status == "cancelled":
+        series_occurrences, not_updated = cancel_occurrences(series_query, range_start, range_end), []
+    else:
+        series_occurrences, not_updated = [], active_occurrences_starting_in(series_query, range_start, range_end)
+
+    enqueue_bulk_status_change(appointment_ids, new_status)
+    occupancy.refresh(db.session.connection(), [
+        (provider_id, day) for _, _, start, end in updated for day, _ in occupancy.day_masks(start, end)
+    ])
     db.session.commit()
 
-    return jsonify(AppointmentSchema().dump(appointment)), 200
+    filled = []
+    if new_status == "cancelled" and data.get("fill_waitlist", False):
+        filled = waitlist.fill_cancelled([
+            (provider_id, appointment_type_id, start, end) for _, appointment_type_id, start, end in updated
+        ] + [
+            (provider_id, occurrence.appointment_type_id, occurrence.effective_start, occurrence.effective_end)
+            for occurrence in series_occurrences
+        ])
+    return jsonify({
+        "status": new_status,
+        "updated": len(appointment_ids),
+        "appointment_ids": appointment_ids,
+        "series_occurrences": _occurrence_keys(series_occurrences),
+        "series_occurrences_not_updated": _occurrence_keys(not_updated),
+        "waitlist_appointment_ids": [appointment.id for appointment in filled]
+    }), 200
+
+def _occurrence_keys(occurrences):
+    return [{"series_id": occurrence.series_id, "original_start": occurrence.start_time.isoformat()}
+            for occurrence in occurrences]
 
 @appointment_bp.route("", methods=["GET"])
 @jwt_required()
 def list_appointments():
     """
-    List all appointments for the authenticated user
+    List appointments for the authenticated user, ordered by start time
     ---
     tags:
       - Appointments
@@ -163,20 +458,43 @@ def list_appointments():
         type: string
         required: false
         description: Filter by appointment status
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        description: Only appointments (effectively) starting at or after this time
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        description: Only appointments (effectively) starting before this time
+      - name: provider_id
+        in: query
+        type: integer
+      - name: appointment_type_id
+        in: query
+        type: integer
+      - name: limit
+        in: query
+        type: integer
+        description: Page size (default PAGE_SIZE_DEFAULT, at most PAGE_SIZE_MAX)
+      - name: cursor
+        in: query
+        type: string
+        description: Value of the X-Next-Cursor header from the previous page
     responses:
       200:
-        description: List of appointments
+        description: One page of appointments; X-Next-Cursor is set when more follow
         schema:
           type: array
           items:
             $ref: '#/definitions/Appointment'
+      400:
+        description: Invalid filter or cursor
       401:
         description: Unauthorized
     """
-    user_id = get_jwt_identity()
-    user = User.query.get_or_404(user_id)
-
-    status = request.args.get("status")
+    user = current_user
     query = Appointment.query
 
     if user.role == "patient":
@@ -184,10 +502,18 @@ def list_appointments():
     elif user.role == "provider":
         query = query.filter_by(provider_id=user.person_id)
 
-    if status:
-        query = query.filter_by(status=status)
+    series_query = AppointmentSeries.query
+    if user.role == "patient":
+        series_query = series_query.filter_by(patient_id=user.person_id)
+    elif user.role == "provider":
+        series_query = series_query.filter_by(provider_id=user.person_id)
+
+    try:
+        appointments, next_cursor = _list_page(query, series_query, request.args)
+    except (ValueError, OverflowError) as err:
+        return jsonify({"error": str(err) or "Invalid filter"}), 400
 
-    return jsonify(AppointmentSchema(many=True).dump(query.all())), 200
+    return paginated_response(AppointmentSchema(many=True).dump(appointments), next_cursor)
 
 @appointment_bp.route("/<int:appointment_id>", methods=["GET"])
 @jwt_required()
@@ -219,7 +545,7 @@ def get_appointment_by_id(appointment_id):
 @jwt_required()
 def get_appointments_by_patient(patient_id):
     """
-    Get all appointments for a specific patient
+    Get appointments for a specific patient, ordered by start time
     ---
     tags:
       - Appointments
@@ -228,21 +554,593 @@ def get_appointments_by_patient(patient_id):
         in: path
         required: true
         type: integer
+      - name: status
+        in: query
+        type: string
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        description: Only appointments (effectively) starting at or after this time
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        description: Only appointments (effectively) starting before this time
+      - name: provider_id
+        in: query
+        type: integer
+      - name: appointment_type_id
+        in: query
+        type: integer
+      - name: limit
+        in: query
+        type: integer
+        description: Page size (default PAGE_SIZE_DEFAULT, at most PAGE_SIZE_MAX)
+      - name: cursor
+        in: query
+        type: string
+        description: Value of the X-Next-Cursor header from the previous page
     responses:
       200:
-        description: List of appointments for the patient
+        description: One page of the patient's appointments; X-Next-Cursor is set when more follow
         schema:
           type: array
           items:
             $ref: '#/definitions/Appointment'
+      400:
+        description: Invalid filter or cursor
       401:
         description: Unauthorized
       404:
         description: No appointments or patient not found
     """
-    appointments = Appointment.query.filter_by(patient_id=patient_id).all()
-    if not appointments:
+    try:
+        appointments, next_cursor = _list_page(
+            Appointment.query.filter_by(patient_id=patient_id),
+            AppointmentSeries.query.filter_by(patient_id=patient_id),
+            request.args
+        )
+        cursor = request.args.get("cursor")
+    except (ValueError, OverflowError) as err:
+        return jsonify({"error": str(err) or "Invalid filter"}), 400
+
+    if not appointments and not cursor:
         return jsonify({"error": "No appointments found for this patient"}), 404
-    return jsonify(AppointmentSchema(many=True).dump(appointments)), 200
+    return paginated_response(AppointmentSchema(many=True).dump(appointments), next_cursor)
+
+def _list_page(query, series_query, args):
+    """
+        One listing page of stored appointments with the occurrences of
+        recurring series merged in. Occurrences are expanded in the `from`/`to`
+        window; a missing bound defaults to now and SERIES_LISTING_DEFAULT_DAYS
+        after the start, so series-only patients still see their bookings.
+    """
+    query = _filter_appointments(query, args)
+    limit, cursor = page_args(args)
+
+    range_start = _parse_datetime(args["from"]) if args.get("from") else datetime.now()
+    range_end = _parse_datetime(args["to"]) if args.get("to") else \
+        range_start + timedelta(days=current_app.config["SERIES_LISTING_DEFAULT_DAYS"])
+    if args.get("provider_id"):
+        series_query = series_query.filter(AppointmentSeries.provider_id == int(args["provider_id"]))
+    if args.get("appointment_type_id"):
+        series_query = series_query.filter(AppointmentSeries.appointment_type_id == int(args["appointment_type_id"]))
+    return merged_page(
+        query, load_series(series_query, range_start, range_end), range_start, range_end, limit, cursor,
+        status=args.get("status")
+    )
+
+def _filter_appointments(query, args):
+    """Apply the optional listing filters; raises ValueError on malformed input."""
+    if args.get("status"):
+        query = query.filter(Appointment.status == args["status"])
+    if args.get("from"):
+        query = query.filter(Appointment.effective_start >= _parse_datetime(args["from"]))
+    if args.get("to"):
+        query = query.filter(Appointment.effective_start < _parse_datetime(args["to"]))
+    if args.get("provider_id"):
+        query = query.filter(Appointment.provider_id == int(args["provider_id"]))
+    if args.get("appointment_type_id"):
+        query = query.filter(Appointment.appointment_type_id == int(args["appointment_type_id"]))
+    return query
 
+def _parse_datetime(value):
+    # Columns hold naive clinic-local times, so any offset in the input is dropped
+    return parse(value).replace(tzinfo=None)
 
+@appointment_bp.route("/availability", methods=["GET"])
+@jwt_required()
+def search_availability():
+    """
+    Find free appointment slots for one or more providers
+    ---
+    tags:
+      - Appointments
+    parameters:
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        required: true
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        required: true
+      - name: slot_minutes
+        in: query
+        type: integer
+        default: 30
+      - name: provider_id
+        in: query
+        type: array
+        items:
+          type: integer
+        collectionFormat: multi
+        description: One or more provider ids
+      - name: cadre
+        in: query
+        type: string
+        description: Search all providers of a cadre when no provider_id is given
+      - name: specialization
+        in: query
+        type: string
+        description: Search all providers with a specialization when no provider_id is given
+    responses:
+      200:
+        description: >
+          Start times of free slots per provider, bounded by each provider's
+          working hours. Every slot lasts slot_minutes.
+      400:
+        description: Invalid range, slot length or provider selection
+      401:
+        description: Unauthorized
+    """
+    try:
+        range_start = _parse_datetime(request.args["from"])
+        range_end = _parse_datetime(request.args["to"])
+        slot_minutes = int(request.args.get("slot_minutes", 30))
+    except (KeyError, ValueError, OverflowError):
+        return jsonify({"error": "Provide valid 'from', 'to' and 'slot_minutes'"}), 400
+
+    if range_end <= range_start or slot_minutes <= 0:
+        return jsonify({"error": "'to' must be after 'from' and 'slot_minutes' positive"}), 400
+    max_days = current_app.config["AVAILABILITY_MAX_DAYS"]
+    if range_end - range_start > timedelta(days=max_days):
+        return jsonify({"error": f"Search range is limited to {max_days} days"}), 400
+
+    provider_ids = _selected_provider_ids(request.args)
+    if provider_ids is None:
+        return jsonify({"error": "Provide provider_id, cadre or specialization"}), 400
+
+    # Plain Core selects: thousands of rows, no ORM identity map needed. No ORDER BY, so
+    # the covering (provider_id, status, effective_start, effective_end) index answers it
+    # alone; each provider's few dozen intervals are sorted below instead.
+    busy_by_provider = {}
+    appointments = Appointment.__table__.c
+    busy_rows = db.session.execute(
+        select(appointments.provider_id, appointments.effective_start, appointments.effective_end).where(
+            appointments.provider_id.in_(provider_ids),
+            appointments.status.in_(Appointment.ACTIVE_STATUSES),
+            appointments.effective_start < range_end,
+            appointments.effective_end > range_start
+        )
+    ).all()  # one fetchall rather than a fetchone per row
+    for provider_id, start_time, end_time in busy_rows:
+        busy_by_provider.setdefault(provider_id, []).append((start_time, end_time))
+    for provider_id, intervals in series_busy_intervals(provider_ids, range_start, range_end).items():
+        busy_by_provider.setdefault(provider_id, []).extend(intervals)
+    for busy in busy_by_provider.values():
+        busy.sort()
+
+    templates_by_provider = _working_templates(provider_ids)
+    default_templates = _default_templates()
+    slots_by_provider = provider_free_slots(
+        templates_by_provider, busy_by_provider, provider_ids,
+        range_start, range_end, timedelta(minutes=slot_minutes), default_templates
+    )
+
+    return jsonify({
+        "from": range_start.isoformat(),
+        "to": range_end.isoformat(),
+        "slot_minutes": slot_minutes,
+        "providers": [
+            {
+                "provider_id": provider_id,
+                "slots": [start.isoformat() for start, _ in slots]
+            }
+            for provider_id, slots in slots_by_provider.items()
+        ]
+    }), 200
+
+def _selected_provider_ids(args):
+    """provider_id values, else every provider matching cadre/specialization; None if neither is given."""
+    provider_ids = args.getlist("provider_id", type=int)
+    if provider_ids:
+        return provider_ids
+    cadre = args.get("cadre")
+    specialization = args.get("specialization")
+    if not cadre and not specialization:
+        return None
+    query = db.session.query(Provider.id)
+    if cadre:
+        query = query.filter(Provider.cadre == cadre)
+    if specialization:
+        query = query.filter(Provider.specialization == specialization)
+    return [provider_id for (provider_id,) in query.order_by(Provider.id)]
+
+def _working_templates(provider_ids):
+    templates_by_provider = {}
+    hours = ProviderWorkingHours.__table__.c
+    template_rows = db.session.execute(
+        select(hours.provider_id, hours.weekday, hours.start_time, hours.end_time)
+        .where(hours.provider_id.in_(provider_ids))
+    )
+    for provider_id, weekday, start_time, end_time in template_rows:
+        templates_by_provider.setdefault(provider_id, []).append((weekday, start_time, end_time))
+    return templates_by_provider
+
+def _default_templates():
+    return [
+        (weekday, time.fromisoformat(start), time.fromisoformat(end))
+        for weekday, start, end in current_app.config["DEFAULT_WORKING_HOURS"]
+    ]
+
+@appointment_bp.route("/free-providers", methods=["GET"])
+@jwt_required()
+def search_free_providers():
+    """
+    Which providers are free for a whole time window ("who is free at 10:00")
+    ---
+    tags:
+      - Appointments
+    parameters:
+      - name: at
+        in: query
+        type: string
+        format: date-time
+        required: true
+      - name: minutes
+        in: query
+        type: integer
+        default: 15
+      - name: provider_id
+        in: query
+        type: array
+        items:
+          type: integer
+        collectionFormat: multi
+      - name: cadre
+        in: query
+        type: string
+      - name: specialization
+        in: query
+        type: string
+    responses:
+      200:
+        description: >
+          Ids of providers working and unbooked for every fifteen-minute slot
+          the window touches. Answered from the per-day occupancy bitmaps.
+      400:
+        description: Invalid window or provider selection
+      401:
+        description: Unauthorized
+    """
+    try:
+        window_start = _parse_datetime(request.args["at"])
+        minutes = int(request.args.get("minutes", occupancy.SLOT_MINUTES))
+    except (KeyError, ValueError, OverflowError):
+        return jsonify({"error": "Provide a valid 'at' and 'minutes'"}), 400
+    window_end = window_start + timedelta(minutes=minutes)
+    if minutes <= 0 or window_end.date() != window_start.date() and window_end.time() != time.min:
+        return jsonify({"error": "The window must be positive and within one day"}), 400
+
+    provider_ids = _selected_provider_ids(request.args)
+    if provider_ids is None:
+        return jsonify({"error": "Provide provider_id, cadre or specialization"}), 400
+
+    mask = occupancy.slot_mask(window_start, window_end)
+    weekday = window_start.weekday()
+    templates_by_provider = _working_templates(provider_ids)
+    default_mask = occupancy.working_mask(_default_templates(), weekday)
+    working_masks = {
+        provider_id: occupancy.working_mask(templates_by_provider[provider_id], weekday)
+        if provider_id in templates_by_provider else default_mask
+        for provider_id in provider_ids
+    }
+    free = occupancy.free_providers(occupancy.day_bitmaps(provider_ids, window_start.date()), working_masks, mask)
+
+    # Series occurrences are expanded on read, not stored, so they are not in the bitmaps
+    if free:
+        busy = series_busy_intervals(free, window_start, window_end)
+        free = [provider_id for provider_id in free if provider_id not in busy]
+
+    return jsonify({
+        "from": window_start.isoformat(),
+        "to": window_end.isoformat(),
+        "provider_ids": free
+    }), 200
+
+@appointment_bp.route("/series", methods=["POST"])
+@jwt_required()
+def create_appointment_series():
+    """
+    Create a recurring appointment series from an RRULE
+    ---
+    tags:
+      - Appointments
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            patient_id:
+              type: integer
+            provider_id:
+              type: integer
+            appointment_type_id:
+              type: integer
+            rrule:
+              type: string
+              example: FREQ=WEEKLY;BYDAY=MO;COUNT=12
+            starts_at:
+              type: string
+              format: date-time
+            duration_minutes:
+              type: integer
+    responses:
+      201:
+        description: >
+          Series created. Occurrences are expanded on read and are not stored
+          as appointment rows.
+      400:
+        description: Invalid input or rrule (rules need COUNT or UNTIL)
+      401:
+        description: Unauthorized
+      403:
+        description: Access denied
+      409:
+        description: Some occurrences clash with the provider's bookings
+    """
+    user = current_user
+    try:
+        series_data = AppointmentSeriesSchema().load(request.get_json())
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    if user.role == "patient" and user.person_id != series_data["patient_id"]:
+        return jsonify({"message": "Access denied"}), 403
+
+    series_data["starts_at"] = series_data["starts_at"].replace(tzinfo=None)
+    try:
+        starts = parse_rule(series_data["rrule"], series_data["starts_at"], current_app.config["SERIES_MAX_OCCURRENCES"])
+    except InvalidRule as err:
+        return jsonify({"errors": {"rrule": [str(err)]}}), 400
+
+    duration = timedelta(minutes=series_data["duration_minutes"])
+    lock_providers([series_data["provider_id"]])
+    conflicts = conflicting_starts(series_data["provider_id"], [(start, start + duration) for start in starts])
+    if conflicts:
+        return jsonify({
+            "message": "Provider is not available for some occurrences",
+            "conflicts": [start.isoformat() for start in conflicts]
+        }), 409
+
+    series = AppointmentSeries(**series_data, ends_at=starts[-1] + duration)
+    db.session.add(series)
+    db.session.commit()
+    return jsonify(AppointmentSeriesSchema().dump(series)), 201
+
+@appointment_bp.route("/series/<int:series_id>", methods=["GET"])
+@jwt_required()
+def get_appointment_series(series_id):
+    """
+    Get a recurring series with its occurrences in a window
+    ---
+    tags:
+      - Appointments
+    parameters:
+      - name: series_id
+        in: path
+        required: true
+        type: integer
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        description: Defaults to the start of the series
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        description: Defaults to the end of the series
+    responses:
+      200:
+        description: The series and its occurrences in the window, with cancellations and moves applied
+      400:
+        description: Invalid window
+      401:
+        description: Unauthorized
+      403:
+        description: Access denied
+      404:
+        description: Series not found
+    """
+    user = current_user
+    series = AppointmentSeries.query.get_or_404(series_id)
+    if user.role == "patient" and series.patient_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+    if user.role == "provider" and series.provider_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+
+    try:
+        range_start = _parse_datetime(request.args["from"]) if request.args.get("from") else series.starts_at
+        range_end = _parse_datetime(request.args["to"]) if request.args.get("to") else series.ends_at
+    except (ValueError, OverflowError):
+        return jsonify({"error": "Invalid 'from' or 'to'"}), 400
+
+    occurrences = expand(series, series.exceptions, range_start, range_end)
+    result = AppointmentSeriesSchema().dump(series)
+    result["occurrences"] = AppointmentSchema(many=True).dump(occurrences)
+    return jsonify(result), 200
+
+@appointment_bp.route("/series/<int:series_id>/occurrences", methods=["PATCH"])
+@jwt_required()
+def update_series_occurrence(series_id):
+    """
+    Cancel, move or restore a single occurrence of a series
+    ---
+    tags:
+      - Appointments
+    parameters:
+      - name: series_id
+        in: path
+        required: true
+        type: integer
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            original_start:
+              type: string
+              format: date-time
+              description: The start the rule gives the occurrence
+            status:
+              type: string
+              enum: [scheduled, cancelled, rescheduled]
+            rescheduled_start_time:
+              type: string
+            rescheduled_end_time:
+              type: string
+    responses:
+      200:
+        description: Occurrence updated; "scheduled" drops any earlier change
+      400:
+        description: Invalid input or not an occurrence of the series
+      401:
+        description: Unauthorized
+      403:
+        description: Access denied
+      404:
+        description: Series not found
+      409:
+        description: Provider already has a booking at the new time, or at the original time when restoring
+    """
+    user = current_user
+    series = AppointmentSeries.query.get_or_404(series_id)
+    if user.role == "patient" and series.patient_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+    if user.role == "provider" and series.provider_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+
+    try:
+        data = OccurrenceUpdateSchema().load(request.get_json())
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    original_start = data["original_start"].replace(tzinfo=None)
+    if series.status != "active" or original_start not in parse_rule(
+            series.rrule, series.starts_at, current_app.config["SERIES_MAX_OCCURRENCES"]):
+        return jsonify({"error": "Not an occurrence of this series"}), 400
+
+    lock_providers([series.provider_id])
+    exception = SeriesException.query.filter_by(series_id=series.id, original_start=original_start).first()
+    if data["status"] == "scheduled":
+        if exception is not None:
+            # The slot may have been booked while the occurrence was cancelled or moved
+            original_end = original_start + timedelta(minutes=series.duration_minutes)
+            if provider_is_busy(series.provider_id, original_start, original_end,
+                                exclude_occurrence=(series.id, original_start)):
+                db.session.rollback()
+                return jsonify({"error": "Provider is not available at the occurrence's original time"}), 409
+            db.session.delete(exception)
+        db.session.commit()
+        return jsonify({"series_id": series.id, "original_start": original_start.isoformat(), "status": "scheduled"}), 200
+
+    if exception is None:
+        exception = SeriesException(series_id=series.id, original_start=original_start)
+        db.session.add(exception)
+    exception.status = data["status"]
+    exception.new_start = exception.new_end = None
+
+    if data["status"] == "rescheduled":
+        new_start = data.get("rescheduled_start_time")
+        new_end = data.get("rescheduled_end_time")
+        if not new_start or not new_end:
+            db.session.rollback()
+            return jsonify({"error": "Provide reschedule times"}), 400
+        new_start, new_end = new_start.replace(tzinfo=None), new_end.replace(tzinfo=None)
+        if new_end <= new_start or new_start < series.starts_at:
+            db.session.rollback()
+            return jsonify({"error": "The new time must be a valid interval after the series start"}), 400
+        with db.session.no_autoflush:
+            if provider_is_busy(series.provider_id, new_start, new_end,
+                                exclude_occurrence=(series.id, original_start)):
+                db.session.rollback()
+                return jsonify({"error": "Provider is not available at the requested time"}), 409
+        exception.new_start, exception.new_end = new_start, new_end
+        # Keep the moved occurrence inside the span the series is looked up by
+        series.ends_at = max(series.ends_at, new_end)
+
+    db.session.commit()
+    return jsonify({
+        "series_id": series.id,
+        "original_start": original_start.isoformat(),
+        "status": exception.status,
+        "rescheduled_start_time": exception.new_start.isoformat() if exception.new_start else None,
+        "rescheduled_end_time": exception.new_end.isoformat() if exception.new_end else None
+    }), 200
+
+@appointment_bp.route("/series/<int:series_id>/status", methods=["PATCH"])
+@jwt_required()
+def cancel_appointment_series(series_id):
+    """
+    Cancel a whole recurring series
+    ---
+    tags:
+      - Appointments
+    parameters:
+      - name: series_id
+        in: path
+        required: true
+        type: integer
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              enum: [cancelled]
+    responses:
+      200:
+        description: Series cancelled; its occurrences no longer block the provider
+      400:
+        description: Invalid status
+      401:
+        description: Unauthorized
+      403:
+        description: Access denied
+      404:
+        description: Series not found
+    """
+    user = current_user
+    series = AppointmentSeries.query.get_or_404(series_id)
+    if (request.get_json() or {}).get("status") != "cancelled":
+        return jsonify({"error": "Invalid status"}), 400
+    if user.role == "patient" and series.patient_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+    if user.role == "provider" and series.provider_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+
+    series.status = "cancelled"
+    db.session.commit()
+    return jsonify(AppointmentSeriesSchema().dump(series)), 200
@@ -1,14 +1,60 @@
 from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models.provider import Provider
+from app.models.refresh_token import RefreshToken
 from app.models.revoked_token import RevokedToken
 from app.models.user import User
 from app.schemas.provider import ProviderSchema
-from flask_jwt_extended import create_access_token, get_jwt, jwt_required
-from datetime import timedelta
+from app.services.current_user import user_cache
+from app.services.token_blocklist import blocklist, family_jti
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt, jwt_required
+from datetime import datetime
+import uuid
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+def _issue_tokens(user_id, role, family):
+    """
+    Create an access/refresh token pair for one login session (`family`).
+    The refresh token is recorded in the session; the caller commits.
+    """
+    claims = {"role": role, "fam": family}
+    access_token = create_access_token(
+        identity=str(user_id),
+        additional_claims=claims,
+        expires_delta=current_app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+    )
+
+    refresh_jti = str(uuid.uuid4())
+    refresh_token = create_refresh_token(identity=str(user_id), additional_claims={**claims, "jti": refresh_jti})
+    db.session.add(RefreshToken(
+        jti=refresh_jti,
+        family=family,
+        user_id=user_id,
+        expires_at=datetime.utcnow() + current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+    ))
+    return access_token, refresh_token, refresh_jti
+
+def _revoke_family(family):
+    """
+    Revoke a login session: its live refresh token(s), and through the
+    family row every token issued in it, access tokens included. Returns
+    the RevokedToken rows added; the caller commits.
+    """
+    revoked = []
+    for token in RefreshToken.query.filter_by(family=family, replaced_by=None).all():
+        token.replaced_by = "revoked"
+        revoked.append(RevokedToken(jti=token.jti, token_type="refresh", expires_at=token.expires_at))
+    if RevokedToken.query.filter_by(jti=family_jti(family)).first() is None:
+        # Outlives any token issued in the session so far
+        lifetime = blocklist.max_token_lifetime
+        revoked.append(RevokedToken(jti=family_jti(family), token_type="family",
+                                    expires_at=datetime.utcnow() + lifetime if lifetime else None))
+    db.session.add_all(revoked)
+    return revoked
+
 @auth_bp.route('/register-user', methods=['POST'])
 def register_user():
     """
@@ -31,6 +77,8 @@ def register_user():
         description: Missing required fields
       409:
         description: Username already exists
+      503:
+        description: Too many concurrent password hashes, retry later
     """
     data = request.get_json()
     username = data.get("username")
@@ -47,7 +95,10 @@ def register_user():
 
     # Create User from existing person (provider or patient)
     user = User(username=username, role=role, person_id=person_id if role == "provider" else None)
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except FuturesTimeoutError:
+        return jsonify({"message": "Server busy, please try again"}), 503
 
     db.session.add(user)
     db.session.commit()
@@ -88,6 +139,9 @@ def login():
           properties:
             access_token:
               type: string
+            refresh_token:
+              type: string
+              description: Exchange at /auth/refresh for a new token pair
             user:
               type: object
               properties:
@@ -101,22 +155,31 @@ def login():
                   type: integer
       401:
         description: Invalid credentials
+      503:
+        description: Too many concurrent logins, retry later
     """
     data = request.get_json()
+    password = data.get("password")
     user = User.query.filter_by(username=data.get("username")).first()
+
+    try:
+        if not user or not user.check_password(password):
+            return jsonify({"message": "Invalid credentials"}), 401
+
+        # Upgrade hashes made with outdated parameters while we have the plain password
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+    except FuturesTimeoutError:
+        return jsonify({"message": "Server busy, please try again"}), 503
     
-    if not user or not user.check_password(data.get("password")):
-        return jsonify({"message": "Invalid credentials"}), 401
-    
-    access_token = create_access_token(
-        identity=str(user.id), 
-        additional_claims={"role": user.role},
-        expires_delta=timedelta(hours=1)
-    )
-    
-    # Return both access token and user information
+    access_token, refresh_token, _ = _issue_tokens(user.id, user.role, str(uuid.uuid4()))
+    db.session.commit()
+
+    # Return the token pair and user information
     return jsonify({
         "access_token": access_token,
+        "refresh_token": refresh_token,
         "user": {
             "id": user.id,
             "username": user.username,
@@ -148,8 +211,61 @@ def logout():
     jwt_data = get_jwt()
     revoked = RevokedToken(
         jti=jwt_data["jti"],
-        token_type=jwt_data["type"]
+        token_type=jwt_data["type"],
+        expires_at=datetime.utcfromtimestamp(jwt_data["exp"])
     )
     db.session.add(revoked)
+    # End the whole session so its refresh token cannot mint new access tokens
+    family_revoked = _revoke_family(jwt_data["fam"]) if "fam" in jwt_data else []
     db.session.commit()
+
+    for row in [revoked] + family_revoked:
+        blocklist.add(row.jti, row.expires_at)
     return jsonify({"message": "Successfully logged out"}), 200
+
+@auth_bp.route("/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Exchange a refresh token for a new access/refresh token pair.
+    Each refresh token can be used once; presenting a used one again
+    revokes the whole session.
+    ---
+    tags:
+      - Authentication
+    security:
+      - Bearer: []
+    parameters: []
+    responses:
+      200:
+        description: New token pair
+        schema:
+          type: object
+          properties:
+            access_token:
+              type: string
+            refresh_token:
+              type: string
+      401:
+        description: Refresh token invalid, revoked or already used
+    """
+    jwt_data = get_jwt()
+    user = user_cache.get(jwt_data["sub"])
+    if user is None or "fam" not in jwt_data:
+        return jsonify({"message": "Invalid refresh token"}), 401
+
+    access_token, refresh_token, new_jti = _issue_tokens(user.id, user.role, jwt_data["fam"])
+
+    # Conditional update so two concurrent refreshes with the same token cannot both succeed
+    rotated = RefreshToken.query.filter_by(jti=jwt_data["jti"], replaced_by=None) \
+        .update({"replaced_by": new_jti}, synchronize_session=False)
+    if not rotated:
+        db.session.rollback()
+        family_revoked = _revoke_family(jwt_data["fam"])
+        db.session.commit()
+        for row in family_revoked:
+            blocklist.add(row.jti, row.expires_at)
+        return jsonify({"message": "Refresh token reuse detected, session revoked"}), 401
+
+    db.session.commit()
+    return jsonify({"access_token": access_token, "refresh_token": refresh_token}), 200
@@ -0,0 +1,67 @@
+import io
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
+
+from app.services.importer import FORMATS, SPECS, import_rows, read_rows
+
+imports_bp = Blueprint('imports', __name__, url_prefix='/imports')
+
+@imports_bp.route('/<kind>', methods=['POST'])
+@jwt_required()
+def import_records(kind):
+    """
+    Bulk import patients, providers or insurance policies
+    ---
+    tags:
+      - Imports
+    consumes:
+      - text/csv
+      - application/x-ndjson
+    parameters:
+      - name: kind
+        in: path
+        required: true
+        type: string
+        enum: [patients, providers, insurance]
+      - name: format
+        in: query
+        type: string
+        enum: [csv, ndjson]
+        description: Defaults to csv for a text/csv body, ndjson otherwise
+      - in: body
+        name: body
+        required: true
+        description: >
+          A CSV file with a header row, or one JSON object per line, with the
+          same fields as the single-record endpoints. The body is read as a
+          stream; for very large files prefer `flask data import`.
+    responses:
+      200:
+        description: >
+          Counts of rows read, inserted, invalid and duplicate, plus one
+          {line, errors} entry per rejected row (at most IMPORT_MAX_REPORTED_ERRORS)
+      400:
+        description: Unknown kind or format
+      403:
+        description: Only admins can import
+    """
+    if current_user.role != "admin":
+        return jsonify({"error": "Access denied"}), 403
+    if kind not in SPECS:
+        return jsonify({"error": f"kind must be one of {', '.join(SPECS)}"}), 400
+    input_format = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "ndjson")
+    if input_format not in FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+
+    max_errors = current_app.config["IMPORT_MAX_REPORTED_ERRORS"]
+    errors = []
+
+    def report(line, messages):
+        if len(errors) < max_errors:
+            errors.append({"line": line, "errors": messages})
+
+    stream = io.TextIOWrapper(io.BufferedReader(request.stream), encoding="utf-8-sig", newline="")
+    counts = import_rows(kind, read_rows(stream, input_format), current_app.config["IMPORT_CHUNK_SIZE"], report)
+    rejected = counts["invalid"] + counts["duplicates"]
+    return jsonify({**counts, "errors": errors, "errors_truncated": rejected > len(errors)}), 200
@@ -2,8 +2,8 @@ from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models.insurance import Insurance
 from app.schemas.insurance import InsuranceSchema
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.user import User
+from app.services.audit import audit_log
+from flask_jwt_extended import jwt_required, current_user
 
 insurance_bp = Blueprint("insurance", __name__, url_prefix="/insurance")
 
@@ -23,8 +23,7 @@ def add_insurance():
 @insurance_bp.route("/patient/<int:patient_id>", methods=["GET"])
 @jwt_required()
 def get_insurance_by_patient(patient_id):
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
 
     # Allow patient to see their own insurance
     if user.role == "patient" and user.person_id != patient_id:
@@ -35,6 +34,8 @@ def get_insurance_by_patient(patient_id):
             return jsonify({"message": "Access denied"}), 403
 
     insurances = Insurance.query.filter_by(patient_id=patient_id).all()
+    audit_log.record_many("read", "insurance", [(insurance.id, insurance.patient_id) for insurance in insurances],
+                          patient_id=patient_id)
     schema = InsuranceSchema(many=True)
     return jsonify(schema.dump(insurances)), 200
 
@@ -42,6 +43,7 @@ def get_insurance_by_patient(patient_id):
 @jwt_required()
 def get_insurance(insurance_id):
     insurance = Insurance.query.get_or_404(insurance_id)
+    audit_log.record("read", "insurance", insurance.id, insurance.patient_id)
     schema = InsuranceSchema()
     return jsonify(schema.dump(insurance)), 200
 
@@ -64,10 +66,10 @@ def update_insurance(insurance_id):
 @jwt_required()
 def get_all_insurances():
     # allow only providers and admins to see all insurances
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
     if user.role not in ["provider", "admin"]:
         return jsonify({"message": "Access denied"}), 403
     insurances = Insurance.query.all()
+    audit_log.record_many("read", "insurance", [(insurance.id, insurance.patient_id) for insurance in insurances])
     schema = InsuranceSchema(many=True)
     return jsonify(schema.dump(insurances)), 200
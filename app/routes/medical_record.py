@@ -1,11 +1,16 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, current_user
 from marshmallow import ValidationError
 from app.extensions import db
 from app.models.record import MedicalRecord
 from app.models.appointment import Appointment
-from app.models.user import User
 from app.schemas.medical_record import MedicalRecordSchema
+from app.services.audit import audit_log
+from app.services.pagination import page_args, paginated_response
+from app.services.record_export import FORMATS, export_rows, gzipped, serialize
+from app.services.record_search import search_records
 
 medical_record_bp = Blueprint('medical_records', __name__, url_prefix='/medical-records')
 
@@ -36,8 +41,7 @@ def create_medical_record():
       404:
         description: Appointment not found
     """
-    current_user_id = int(get_jwt_identity())
-    user = User.query.get(current_user_id)
+    user = current_user
 
     if user.role != 'provider':
         return jsonify({"message": "Only providers can create medical records"}), 403
@@ -87,13 +91,14 @@ def get_medical_records_by_patient(patient_id):
       403:
         description: Unauthorized access
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
 
     if user.role == 'patient' and user.person_id != patient_id:
         return jsonify({"message": "Unauthorized"}), 403
 
     records = MedicalRecord.query.filter_by(patient_id=patient_id).all()
+    audit_log.record_many("read", "medical_record", [(record.id, record.patient_id) for record in records],
+                          patient_id=patient_id)
 
     schema = MedicalRecordSchema(many=True)
     return jsonify(schema.dump(records)), 200
@@ -120,8 +125,7 @@ def get_medical_record_by_appointment(appointment_id):
       404:
         description: No medical record found
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
 
     record = MedicalRecord.query.filter_by(appointment_id=appointment_id).first()
     if not record:
@@ -132,6 +136,7 @@ def get_medical_record_by_appointment(appointment_id):
     if user.role == 'provider' and user.person_id != record.provider_id:
         return jsonify({"message": "Access denied"}), 403
 
+    audit_log.record("read", "medical_record", record.id, record.patient_id)
     schema = MedicalRecordSchema()
     return jsonify(schema.dump(record)), 200
 
@@ -148,12 +153,28 @@ def list_all_records():
         in: query
         type: string
         description: Filter records by diagnosis keyword
+      - name: q
+        in: query
+        type: string
+        description: >
+          Full-text search over diagnosis, treatment and notes. Results are
+          ranked (diagnosis matches weigh most), carry `rank` and a `highlight`
+          snippet with matches wrapped in <mark>, and are paginated
+      - name: limit
+        in: query
+        type: integer
+        description: Page size when searching with q
+      - name: cursor
+        in: query
+        type: string
+        description: Value of the X-Next-Cursor header from the previous search page
     responses:
       200:
-        description: List of records
+        description: List of records; with q, one ranked page and X-Next-Cursor when more follow
+      400:
+        description: Empty search or invalid cursor
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
 
     query = MedicalRecord.query
 
@@ -162,12 +183,101 @@ def list_all_records():
     elif user.role == "provider":
         query = query.filter_by(provider_id=user.person_id)
 
+    if request.args.get("q") is not None:
+        return _search_page(user)
+
     search = request.args.get("diagnosis")
     if search:
         query = query.filter(MedicalRecord.diagnosis.ilike(f"%{search}%"))
 
+    records = query.all()
+    audit_log.record_many("read", "medical_record", [(record.id, record.patient_id) for record in records],
+                          patient_id=user.person_id if user.role == "patient" else None)
     schema = MedicalRecordSchema(many=True)
-    return jsonify(schema.dump(query.all())), 200
+    return jsonify(schema.dump(records)), 200
+
+def _search_page(user):
+    try:
+        limit, cursor = page_args(request.args)
+        hits, next_cursor = search_records(
+            request.args["q"], limit, cursor,
+            patient_id=user.person_id if user.role == "patient" else None,
+            provider_id=user.person_id if user.role == "provider" else None
+        )
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+
+    records = {record.id: record for record in MedicalRecord.query.filter(MedicalRecord.id.in_([hit[0] for hit in hits]))}
+    audit_log.record_many("search", "medical_record", [(record.id, record.patient_id) for record in records.values()],
+                          patient_id=user.person_id if user.role == "patient" else None)
+    schema = MedicalRecordSchema()
+    results = [
+        {**schema.dump(records[record_id]), "rank": -score, "highlight": highlight}
+        for record_id, score, highlight in hits if record_id in records
+    ]
+    return paginated_response(results, next_cursor)
+
+@medical_record_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_records():
+    """
+    Stream medical records joined with appointment and patient fields
+    ---
+    tags:
+      - Medical Records
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson, csv]
+        default: ndjson
+      - name: gzip
+        in: query
+        type: boolean
+        description: Compress the download with gzip
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        description: Only records created at or after this time
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        description: Only records created before this time
+    responses:
+      200:
+        description: >
+          One record per line (NDJSON) or row (CSV, with a header), oldest first.
+          Rows are streamed as they are read, so the export can be of any size.
+      400:
+        description: Unknown format or invalid date
+    """
+    user = current_user
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+    try:
+        created_from = datetime.fromisoformat(request.args["from"]) if request.args.get("from") else None
+        created_to = datetime.fromisoformat(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 date-times"}), 400
+
+    rows = export_rows(
+        current_app.config["RECORD_EXPORT_BATCH_SIZE"],
+        patient_id=user.person_id if user.role == "patient" else None,
+        provider_id=user.person_id if user.role == "provider" else None,
+        created_from=created_from, created_to=created_to
+    )
+    # One row for the whole export rather than one per exported record
+    audit_log.record("export", "medical_record", patient_id=user.person_id if user.role == "patient" else None)
+    chunks, filename, mimetype = serialize(rows, export_format), f"medical-records.{export_format}", FORMATS[export_format]
+    if request.args.get("gzip", "").lower() in ("1", "true"):
+        chunks, filename, mimetype = gzipped(chunks), f"{filename}.gz", "application/gzip"
+
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 @medical_record_bp.route("/<int:record_id>", methods=["GET"])
 @jwt_required()
@@ -192,14 +302,14 @@ def get_record_by_id(record_id):
         description: Record not found
     """
     record = MedicalRecord.query.get_or_404(record_id)
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
 
     if user.role == "patient" and record.patient_id != user.person_id:
         return jsonify({"message": "Access denied"}), 403
     if user.role == "provider" and record.provider_id != user.person_id:
         return jsonify({"message": "Access denied"}), 403
 
+    audit_log.record("read", "medical_record", record.id, record.patient_id)
     schema = MedicalRecordSchema()
     return jsonify(schema.dump(record)), 200
 
@@ -252,8 +362,7 @@ def update_record(record_id):
       404:
         description: Medical record not found
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
     record = MedicalRecord.query.get_or_404(record_id)
 
     if user.role != "provider" or user.person_id != record.provider_id:
@@ -300,8 +409,7 @@ def delete_record(record_id):
       404:
         description: Medical record not found
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user
     record = MedicalRecord.query.get_or_404(record_id)
 
     if user.role != "provider" or user.person_id != record.provider_id:
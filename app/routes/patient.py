@@ -1,13 +1,21 @@
-from operator import or_
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
+from marshmallow import ValidationError
 from sqlalchemy.exc import IntegrityError
+from app.models.linkage import DuplicateCandidate
 from app.models.patient import Patient
-from app.models.person import Person
-from app.schemas.patient import PatientSchema
+from app.schemas.patient import DuplicateCandidateSchema, PatientSchema
 from app.extensions import db
+from app.services.directory import directory_page, field_args
+from app.services.pagination import page_args, paginate, paginated_response
+from app.services.patient_numbers import patient_numbers
+from app.services.person_search import search_people
 
 patient_bp = Blueprint('patients', __name__, url_prefix='/patients')
+
+# Most likely duplicates first; a backward scan of ix_duplicate_candidates_status_score
+DUPLICATE_ORDER = [DuplicateCandidate.score.desc(), DuplicateCandidate.id.desc()]
+
 @patient_bp.route('', methods=['POST'])
 @jwt_required()
 def register_patient():
@@ -15,12 +23,8 @@ def register_patient():
     schema = PatientSchema()
     patient_data = schema.load(data)
 
-    # Auto-generate next patient number
-    last_patient = Patient.query.order_by(Patient.id.desc()).first()
-    next_id = last_patient.id + 1 if last_patient else 1
-    patient_number = f"PAT-{next_id:03d}" # Format as PAT-001, PAT-002, etc.
-
-    patient = Patient(**patient_data, patient_number=patient_number)
+    # PAT-001, PAT-002, ... drawn from this worker's reserved block, so concurrent registrations never collide
+    patient = Patient(**patient_data, patient_number=patient_numbers.next_number())
 
     try:
         db.session.add(patient)
@@ -37,21 +41,50 @@ def register_patient():
 @patient_bp.route("", methods=["GET"])
 @jwt_required()
 def list_patients():
-    search = request.args.get("search")
-    query = Patient.query
-
-    if search:
-        search = f"%{search}%"
-        query = query.filter(or_(
-            Person.first_name.ilike(search),
-            Person.last_name.ilike(search),
-            Person.national_id.ilike(search),
-            Patient.patient_number.ilike(search)
-        ))
-
-    patients = query.all()
-    schema = PatientSchema(many=True)
-    return jsonify(schema.dump(patients)), 200
+    """
+    List patients, one keyset page at a time
+    ---
+    tags:
+      - Patients
+    parameters:
+      - name: search
+        in: query
+        type: string
+        description: Patient number or national id prefix, or a (misspelt) name (ranked, first page only)
+      - name: fields
+        in: query
+        type: string
+        description: Comma-separated fields to return, e.g. id,first_name,last_name,patient_number; only those columns are read
+      - name: sort
+        in: query
+        type: string
+        enum: [id, last_name]
+        default: id
+      - name: limit
+        in: query
+        type: integer
+        description: Page size (default PAGE_SIZE_DEFAULT, at most PAGE_SIZE_MAX)
+      - name: cursor
+        in: query
+        type: string
+        description: Value of the X-Next-Cursor header from the previous page
+    responses:
+      200:
+        description: One page of patients; X-Next-Cursor is set when more follow
+      400:
+        description: Unknown field or sort, or invalid cursor
+    """
+    try:
+        if request.args.get("search"):
+            # Ranked and limited: patient number / national id prefixes, then fuzzy names
+            limit, _ = page_args(request.args)
+            fields = field_args(request.args, PatientSchema)
+            patients = search_people(Patient, request.args["search"], limit, current_app.config["PERSON_SEARCH_THRESHOLD"])
+            return jsonify(PatientSchema(many=True, only=fields).dump(patients)), 200
+        data, next_cursor = directory_page(Patient, PatientSchema, request.args)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    return paginated_response(data, next_cursor)
 
 @patient_bp.route("/<int:patient_id>", methods=["GET"])
 @jwt_required()
@@ -59,3 +92,85 @@ def get_patient(patient_id):
     patient = Patient.query.get_or_404(patient_id)
     schema = PatientSchema()
     return jsonify(schema.dump(patient)), 200
+
+@patient_bp.route("/duplicates", methods=["GET"])
+@jwt_required()
+def list_duplicate_candidates():
+    """
+    List probable duplicate patients found by `flask patients find-duplicates`
+    ---
+    tags:
+      - Patients
+    parameters:
+      - name: status
+        in: query
+        type: string
+        enum: [open, merged, dismissed]
+        default: open
+      - name: limit
+        in: query
+        type: integer
+      - name: cursor
+        in: query
+        type: string
+        description: Value of the X-Next-Cursor header from the previous page
+    responses:
+      200:
+        description: One page of candidate pairs, highest score first, with the fields that agree
+      400:
+        description: Invalid cursor
+      403:
+        description: Patients cannot review duplicates
+    """
+    if current_user.role == "patient":
+        return jsonify({"error": "Access denied"}), 403
+    query = DuplicateCandidate.query.filter(DuplicateCandidate.status == request.args.get("status", "open"))
+    try:
+        limit, cursor = page_args(request.args)
+        candidates, next_cursor = paginate(query, DUPLICATE_ORDER, limit, cursor)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    return paginated_response(DuplicateCandidateSchema(many=True).dump(candidates), next_cursor)
+
+@patient_bp.route("/duplicates/<int:candidate_id>", methods=["PATCH"])
+@jwt_required()
+def review_duplicate_candidate(candidate_id):
+    """
+    Mark a duplicate candidate as merged or dismissed
+    ---
+    tags:
+      - Patients
+    parameters:
+      - name: candidate_id
+        in: path
+        required: true
+        type: integer
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              enum: [open, merged, dismissed]
+    responses:
+      200:
+        description: Updated candidate
+      400:
+        description: Invalid status
+      403:
+        description: Patients cannot review duplicates
+      404:
+        description: Candidate not found
+    """
+    if current_user.role == "patient":
+        return jsonify({"error": "Access denied"}), 403
+    candidate = DuplicateCandidate.query.get_or_404(candidate_id)
+    schema = DuplicateCandidateSchema()
+    try:
+        candidate.status = schema.load(request.get_json() or {})["status"]
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+    db.session.commit()
+    return jsonify(schema.dump(candidate)), 200
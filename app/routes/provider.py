@@ -1,10 +1,13 @@
-from flask_jwt_extended import jwt_required
-from sqlalchemy import or_
-from flask import Blueprint, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
+from flask import Blueprint, current_app, request, jsonify
+from marshmallow import ValidationError
 from app.extensions import db
-from app.models.person import Person
 from app.models.provider import Provider
-from app.schemas.provider import ProviderSchema
+from app.models.working_hours import ProviderWorkingHours
+from app.schemas.provider import ProviderSchema, WorkingHoursSchema
+from app.services.directory import directory_page, field_args
+from app.services.pagination import page_args, paginated_response
+from app.services.person_search import search_people
 
 provider_bp = Blueprint('provider', __name__, url_prefix='/providers')
 
@@ -27,22 +30,50 @@ def create_provider():
 @provider_bp.route("", methods=["GET"])
 @jwt_required()
 def list_providers():
-    search = request.args.get("search")
-    query = Provider.query
-
-    if search:
-        search = f"%{search}%"
-        query = query.filter(or_(
-            *[
-                Person.first_name.ilike(search),
-                Person.last_name.ilike(search),
-                Provider.national_id.ilike(search)
-            ]
-        ))
-
-    providers = query.all()
-    schema = ProviderSchema(many=True)
-    return jsonify(schema.dump(providers)), 200
+    """
+    List providers, one keyset page at a time
+    ---
+    tags:
+      - Providers
+    parameters:
+      - name: search
+        in: query
+        type: string
+        description: National id prefix or a (misspelt) name (ranked, first page only)
+      - name: fields
+        in: query
+        type: string
+        description: Comma-separated fields to return, e.g. id,first_name,last_name,cadre; only those columns are read
+      - name: sort
+        in: query
+        type: string
+        enum: [id, last_name]
+        default: id
+      - name: limit
+        in: query
+        type: integer
+        description: Page size (default PAGE_SIZE_DEFAULT, at most PAGE_SIZE_MAX)
+      - name: cursor
+        in: query
+        type: string
+        description: Value of the X-Next-Cursor header from the previous page
+    responses:
+      200:
+        description: One page of providers; X-Next-Cursor is set when more follow
+      400:
+        description: Unknown field or sort, or invalid cursor
+    """
+    try:
+        if request.args.get("search"):
+            # Ranked and limited: national id prefixes, then fuzzy names
+            limit, _ = page_args(request.args)
+            fields = field_args(request.args, ProviderSchema)
+            providers = search_people(Provider, request.args["search"], limit, current_app.config["PERSON_SEARCH_THRESHOLD"])
+            return jsonify(ProviderSchema(many=True, only=fields).dump(providers)), 200
+        data, next_cursor = directory_page(Provider, ProviderSchema, request.args)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    return paginated_response(data, next_cursor)
 
 @provider_bp.route("/<int:provider_id>", methods=["GET"])
 def get_provider(provider_id):
@@ -50,3 +81,63 @@ def get_provider(provider_id):
     schema = ProviderSchema()
     return jsonify(schema.dump(provider)), 200
 
+@provider_bp.route("/<int:provider_id>/working-hours", methods=["GET"])
+@jwt_required()
+def get_working_hours(provider_id):
+    provider = Provider.query.get_or_404(provider_id)
+    return jsonify(WorkingHoursSchema(many=True).dump(provider.working_hours)), 200
+
+@provider_bp.route("/<int:provider_id>/working-hours", methods=["PUT"])
+@jwt_required()
+def set_working_hours(provider_id):
+    """
+    Replace a provider's weekly working-hours template
+    ---
+    tags:
+      - Providers
+    parameters:
+      - name: provider_id
+        in: path
+        required: true
+        type: integer
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              weekday:
+                type: integer
+                description: 0 = Monday ... 6 = Sunday
+              start_time:
+                type: string
+                example: "08:00"
+              end_time:
+                type: string
+                example: "17:00"
+    responses:
+      200:
+        description: Template saved
+      400:
+        description: Validation error
+      403:
+        description: Only admins and the provider themselves can change the template
+      404:
+        description: Provider not found
+    """
+    user = current_user
+    if user.role != "admin" and not (user.role == "provider" and user.person_id == provider_id):
+        return jsonify({"error": "Access denied"}), 403
+
+    provider = Provider.query.get_or_404(provider_id)
+    schema = WorkingHoursSchema(many=True)
+    try:
+        shifts = schema.load(request.get_json())
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+
+    provider.working_hours = [ProviderWorkingHours(**shift) for shift in shifts]
+    db.session.commit()
+    return jsonify(schema.dump(provider.working_hours)), 200
@@ -0,0 +1,87 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.appointment import AppointmentType
+from app.services.reference_data import registry
+
+reference_data_bp = Blueprint('reference_data', __name__, url_prefix='/reference-data')
+
+@reference_data_bp.route('', methods=['GET'])
+@jwt_required()
+def get_reference_data():
+    """
+    Appointment types and provider cadres/specializations for pick lists
+    ---
+    tags:
+      - Reference data
+    parameters:
+      - name: If-None-Match
+        in: header
+        type: string
+        description: ETag of a previously fetched copy
+    responses:
+      200:
+        description: The lists, with a strong ETag
+      304:
+        description: Unchanged since the copy identified by If-None-Match
+      401:
+        description: Unauthorized
+    """
+    snapshot = registry.snapshot()
+    response = jsonify({
+        "appointment_types": [{"id": key, "name": name} for key, name in snapshot.appointment_types.items()],
+        "cadres": list(snapshot.cadres),
+        "specializations": list(snapshot.specializations),
+    })
+    response.set_etag(snapshot.etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config["REFERENCE_DATA_MAX_AGE"]
+    return response.make_conditional(request)
+
+@reference_data_bp.route('/appointment-types', methods=['POST'])
+@jwt_required()
+def create_appointment_type():
+    """
+    Add an appointment type
+    ---
+    tags:
+      - Reference data
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            name:
+              type: string
+    responses:
+      201:
+        description: Appointment type created; the reference data version is bumped
+      400:
+        description: Missing or too long name
+      401:
+        description: Unauthorized
+      403:
+        description: Access denied
+      409:
+        description: An appointment type with this name exists
+    """
+    if current_user.role == "patient":
+        return jsonify({"error": "Access denied"}), 403
+
+    name = ((request.get_json() or {}).get("name") or "").strip()
+    if not name or len(name) > 50:
+        return jsonify({"error": "Provide a name of at most 50 characters"}), 400
+    if name in registry.snapshot().appointment_types.values():
+        return jsonify({"error": "Appointment type already exists"}), 409
+
+    appointment_type = AppointmentType(name=name)
+    db.session.add(appointment_type)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Appointment type already exists"}), 409
+    return jsonify({"id": appointment_type.id, "name": appointment_type.name}), 201
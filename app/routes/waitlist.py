@@ -0,0 +1,162 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, current_user
+from marshmallow import ValidationError
+from app.extensions import db
+from app.models.patient import Patient
+from app.models.provider import Provider
+from app.models.waitlist import WaitlistEntry
+from app.schemas.waitlist import WaitlistEntrySchema
+from app.services.pagination import page_args, paginate, paginated_response
+from app.services.waitlist import MATCH_ORDER
+
+waitlist_bp = Blueprint('waitlist', __name__, url_prefix='/waitlist')
+
+@waitlist_bp.route('', methods=['POST'])
+@jwt_required()
+def create_waitlist_entry():
+    """
+    Put a patient on the waitlist for an earlier slot
+    ---
+    tags:
+      - Waitlist
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            patient_id:
+              type: integer
+            provider_id:
+              type: integer
+              description: Omit to accept any provider
+            appointment_type_id:
+              type: integer
+              description: Omit to accept any appointment type
+            earliest_start:
+              type: string
+              format: date-time
+            latest_end:
+              type: string
+              format: date-time
+            duration_minutes:
+              type: integer
+            priority:
+              type: integer
+              description: 0 (most urgent) to 9; set by staff, patients always get the default 5
+    responses:
+      201:
+        description: Entry created
+      400:
+        description: Invalid input
+      401:
+        description: Unauthorized
+      403:
+        description: Access denied
+      404:
+        description: Patient or provider not found
+    """
+    user = current_user
+    try:
+        entry_data = WaitlistEntrySchema().load(request.get_json())
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    if user.role == "patient":
+        if user.person_id != entry_data["patient_id"]:
+            return jsonify({"error": "Access denied"}), 403
+        entry_data.pop("priority", None)
+
+    # Checked here rather than left to the foreign keys, which only fail once a slot is being filled
+    if db.session.get(Patient, entry_data["patient_id"]) is None:
+        return jsonify({"error": "Patient not found"}), 404
+    if entry_data["provider_id"] is not None and db.session.get(Provider, entry_data["provider_id"]) is None:
+        return jsonify({"error": "Provider not found"}), 404
+
+    entry_data["earliest_start"] = entry_data["earliest_start"].replace(tzinfo=None)
+    entry_data["latest_end"] = entry_data["latest_end"].replace(tzinfo=None)
+    entry = WaitlistEntry(**entry_data)
+    db.session.add(entry)
+    db.session.commit()
+    return jsonify(WaitlistEntrySchema().dump(entry)), 201
+
+@waitlist_bp.route('', methods=['GET'])
+@jwt_required()
+def list_waitlist():
+    """
+    List waitlist entries in matching order
+    ---
+    tags:
+      - Waitlist
+    parameters:
+      - name: provider_id
+        in: query
+        type: integer
+      - name: status
+        in: query
+        type: string
+        default: waiting
+      - name: limit
+        in: query
+        type: integer
+      - name: cursor
+        in: query
+        type: string
+        description: Value of the X-Next-Cursor header from the previous page
+    responses:
+      200:
+        description: One page of entries, best match first; X-Next-Cursor is set when more follow
+      400:
+        description: Invalid filter or cursor
+      401:
+        description: Unauthorized
+    """
+    user = current_user
+    query = WaitlistEntry.query.filter(WaitlistEntry.status == request.args.get("status", "waiting"))
+    if user.role == "patient":
+        query = query.filter(WaitlistEntry.patient_id == user.person_id)
+    try:
+        if request.args.get("provider_id"):
+            query = query.filter(WaitlistEntry.provider_id == int(request.args["provider_id"]))
+        limit, cursor = page_args(request.args)
+        entries, next_cursor = paginate(query, MATCH_ORDER, limit, cursor)
+    except ValueError as err:
+        return jsonify({"error": str(err) or "Invalid filter"}), 400
+    return paginated_response(WaitlistEntrySchema(many=True).dump(entries), next_cursor)
+
+@waitlist_bp.route('/<int:entry_id>', methods=['DELETE'])
+@jwt_required()
+def withdraw_waitlist_entry(entry_id):
+    """
+    Take an entry off the waitlist
+    ---
+    tags:
+      - Waitlist
+    parameters:
+      - name: entry_id
+        in: path
+        required: true
+        type: integer
+    responses:
+      200:
+        description: Entry withdrawn
+      401:
+        description: Unauthorized
+      403:
+        description: Access denied
+      404:
+        description: Entry not found
+      409:
+        description: The entry was already booked or withdrawn
+    """
+    user = current_user
+    entry = WaitlistEntry.query.get_or_404(entry_id)
+    if user.role == "patient" and entry.patient_id != user.person_id:
+        return jsonify({"error": "Access denied"}), 403
+    if entry.status != "waiting":
+        return jsonify({"error": f"Entry is already {entry.status}"}), 409
+
+    entry.status = "withdrawn"
+    db.session.commit()
+    return jsonify(WaitlistEntrySchema().dump(entry)), 200
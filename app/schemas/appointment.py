@@ -1,11 +1,16 @@
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, ValidationError, fields, validate
 
-from marshmallow import Schema, fields, validate
+from app.services.reference_data import registry
+
+def validate_appointment_type(appointment_type_id):
+    # Checked against the in-process registry, not the appointment_types table
+    if not registry.has_appointment_type(appointment_type_id):
+        raise ValidationError("Unknown appointment type.")
 
 class AppointmentSchema(Schema):
     patient_id = fields.Int(required=True)
     provider_id = fields.Int(required=True)
-    appointment_type_id = fields.Int(required=True)
+    appointment_type_id = fields.Int(required=True, validate=validate_appointment_type)
     start_time = fields.DateTime(required=True)
     end_time = fields.DateTime(required=True)
     status = fields.Str(
@@ -14,4 +19,24 @@ class AppointmentSchema(Schema):
     )
     rescheduled_start_time = fields.DateTime(dump_only=True)
     rescheduled_end_time = fields.DateTime(dump_only=True)
+    effective_start = fields.DateTime(dump_only=True)
+    effective_end = fields.DateTime(dump_only=True)
+    series_id = fields.Int(dump_only=True)  # set on occurrences expanded from a recurring series
+
+class AppointmentSeriesSchema(Schema):
+    id = fields.Int(dump_only=True)
+    patient_id = fields.Int(required=True)
+    provider_id = fields.Int(required=True)
+    appointment_type_id = fields.Int(required=True, validate=validate_appointment_type)
+    rrule = fields.Str(required=True, validate=validate.Length(max=255))
+    starts_at = fields.DateTime(required=True)
+    duration_minutes = fields.Int(required=True, validate=validate.Range(min=1, max=24 * 60))
+    ends_at = fields.DateTime(dump_only=True)
+    status = fields.Str(dump_only=True)
+
+class OccurrenceUpdateSchema(Schema):
+    original_start = fields.DateTime(required=True)
+    status = fields.Str(required=True, validate=validate.OneOf(["scheduled", "cancelled", "rescheduled"]))
+    rescheduled_start_time = fields.DateTime()
+    rescheduled_end_time = fields.DateTime()
 
@@ -1,6 +1,7 @@
 from marshmallow import Schema, fields
 
 class MedicalRecordSchema(Schema):
+    id = fields.Int(dump_only=True)
     appointment_id = fields.Int(required=True)
     diagnosis = fields.Str()
     treatment = fields.Str()
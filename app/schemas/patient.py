@@ -1,5 +1,7 @@
 from marshmallow import Schema, fields, validate
 class PatientSchema(Schema):
+    id = fields.Int(dump_only=True)
+    patient_number = fields.Str(dump_only=True)
     first_name = fields.Str(required=True)
     last_name = fields.Str(required=True)
     date_of_birth = fields.Date(required=False)
@@ -7,3 +9,12 @@ class PatientSchema(Schema):
     email = fields.Email()
     gender = fields.Str()
     national_id = fields.Str(validate=validate.Length(min = 8, error="National ID must be exactly 8 characters long."))
+
+class DuplicateCandidateSchema(Schema):
+    id = fields.Int(dump_only=True)
+    person_id = fields.Int(dump_only=True)
+    duplicate_person_id = fields.Int(dump_only=True)
+    score = fields.Float(dump_only=True)
+    reasons = fields.Function(lambda candidate: candidate.reasons.split(",") if candidate.reasons else [])
+    status = fields.Str(required=True, validate=validate.OneOf(["open", "merged", "dismissed"]))
+    created_at = fields.DateTime(dump_only=True)
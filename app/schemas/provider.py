@@ -1,6 +1,7 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
 
 class ProviderSchema(Schema):
+    id = fields.Int(dump_only=True)
     first_name = fields.Str(required=True)
     last_name = fields.Str(required=True)
     date_of_birth = fields.Date(required=False)
@@ -11,3 +12,13 @@ class ProviderSchema(Schema):
     cadre = fields.Str(required=True)
     specialization = fields.Str(required=False)
 
+
+class WorkingHoursSchema(Schema):
+    weekday = fields.Int(required=True, validate=validate.Range(min=0, max=6))
+    start_time = fields.Time(required=True)
+    end_time = fields.Time(required=True)
+
+    @validates_schema
+    def validate_times(self, data, **kwargs):
+        if data["start_time"] >= data["end_time"]:
+            raise ValidationError("start_time must be before end_time", "end_time")
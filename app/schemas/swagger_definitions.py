@@ -25,7 +25,9 @@ swagger_template = {
             "end_time": {"type": "string", "format": "date-time"},
             "status": {"type": "string"},
             "rescheduled_start_time": {"type": "string", "format": "date-time"},
-            "rescheduled_end_time": {"type": "string", "format": "date-time"}
+            "rescheduled_end_time": {"type": "string", "format": "date-time"},
+            "effective_start": {"type": "string", "format": "date-time", "readOnly": True},
+            "effective_end": {"type": "string", "format": "date-time", "readOnly": True}
         }
     },
     "User": {
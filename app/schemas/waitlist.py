@@ -0,0 +1,24 @@
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+
+from app.schemas.appointment import validate_appointment_type
+
+class WaitlistEntrySchema(Schema):
+    id = fields.Int(dump_only=True)
+    patient_id = fields.Int(required=True)
+    provider_id = fields.Int(allow_none=True, load_default=None)
+    appointment_type_id = fields.Int(allow_none=True, load_default=None, validate=validate_appointment_type)
+    earliest_start = fields.DateTime(required=True)
+    latest_end = fields.DateTime(required=True)
+    duration_minutes = fields.Int(required=True, validate=validate.Range(min=1, max=24 * 60))
+    priority = fields.Int(load_default=5, validate=validate.Range(min=0, max=9))
+    requested_at = fields.DateTime(dump_only=True)
+    status = fields.Str(dump_only=True)
+    appointment_id = fields.Int(dump_only=True)
+
+    @validates_schema
+    def validate_window(self, data, **kwargs):
+        if "earliest_start" not in data or "latest_end" not in data or "duration_minutes" not in data:
+            return
+        length = data["latest_end"] - data["earliest_start"]
+        if length.total_seconds() < data["duration_minutes"] * 60:
+            raise ValidationError("The window must fit duration_minutes", "latest_end")
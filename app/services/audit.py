@@ -0,0 +1,187 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import has_request_context, jsonify, request
+from flask_jwt_extended import get_current_user
+
+from app.extensions import db
+from app.models.audit import PhiAccessLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditUnavailable(RuntimeError):
+    """The audit buffer is full and cannot be written, so the read it would record is refused."""
+
+
+class AuditLog:
+    """
+        Buffered trail of reads of protected health information.
+
+        `record()` only appends a row to an in-memory buffer, so the read path
+        never waits on the database. The rows are written with one bulk INSERT
+        into `phi_access_log` once `AUDIT_BATCH_SIZE` have accumulated, every
+        `AUDIT_FLUSH_INTERVAL_SECONDS` by a background thread, and when the
+        worker exits. A failed flush keeps the rows for the next attempt.
+
+        The buffer never holds more than `AUDIT_BUFFER_CAPACITY` rows. A read
+        that would overflow it flushes first; if that fails (or a flush failed
+        in the last `AUDIT_FLUSH_INTERVAL_SECONDS`), `AuditUnavailable` is
+        raised and the request is answered with 503, so no read goes
+        unrecorded while the database is down.
+    """
+
+    def __init__(self):
+        self.batch_size = 500
+        self.capacity = 10000
+        self.flush_interval = 2.0
+        self.background = True
+        self._app = None
+        self._buffer = deque()
+        self._lock = threading.Lock()  # guards the buffer
+        self._flush_lock = threading.Lock()  # one flush at a time, in buffer order
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._in_flight = 0  # rows taken from the buffer by a flush that is still writing them
+        self._failed_at = None  # monotonic time of the last failed flush
+        atexit.register(self.close)
+
+    def init_app(self, app):
+        self.close()
+        self.batch_size = app.config.get("AUDIT_BATCH_SIZE", 500)
+        self.capacity = app.config.get("AUDIT_BUFFER_CAPACITY", 10000)
+        self.flush_interval = app.config.get("AUDIT_FLUSH_INTERVAL_SECONDS", 2.0)
+        self.background = app.config.get("AUDIT_BACKGROUND_FLUSH", True)
+        self._app = app
+        self._failed_at = None
+        self._stop.clear()
+        app.extensions["audit_log"] = self
+        app.register_error_handler(AuditUnavailable, _audit_unavailable)
+
+    def record(self, action, resource_type, resource_id=None, patient_id=None, actor=None):
+        self.record_many(action, resource_type, [(resource_id, patient_id)], actor=actor)
+
+    def record_many(self, action, resource_type, resources, patient_id=None, actor=None):
+        """
+            Buffer one row per (resource_id, patient_id) read by the current
+            user in this request, or by `actor` (a User) outside one, e.g. in
+            a CLI command. An empty result still records that the query was
+            made: one row with no resource_id for `patient_id`.
+        """
+        resources = list(resources) or [(None, patient_id)]
+        occurred_at = datetime.utcnow()
+        user_id = role = endpoint = remote_addr = None
+        if has_request_context():
+            endpoint, remote_addr = request.endpoint, request.remote_addr
+            try:
+                user = get_current_user()
+            except RuntimeError:  # not behind jwt_required
+                user = None
+            if user is not None:
+                user_id, role = user.id, user.role
+        if actor is not None:
+            user_id, role = actor.id, actor.role
+        rows = [
+            {
+                "occurred_at": occurred_at, "user_id": user_id, "role": role, "action": action,
+                "resource_type": resource_type, "resource_id": resource_id, "patient_id": patient_id,
+                "endpoint": endpoint, "remote_addr": remote_addr,
+            }
+            for resource_id, patient_id in resources
+        ]
+        pending = self._append(rows)
+
+        if pending >= self.capacity or (pending >= self.batch_size and not self.background):
+            self.flush()
+        elif pending >= self.batch_size:
+            self._ensure_thread()
+            self._wake.set()
+        elif self.background:
+            self._ensure_thread()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                    self._in_flight = len(batch)
+                if not batch:
+                    return written
+                try:
+                    with self._app.app_context(), db.engine.begin() as connection:
+                        connection.execute(PhiAccessLog.__table__.insert(), batch)
+                except Exception:
+                    logger.exception("Writing %d audit rows failed; keeping them for the next flush", len(batch))
+                    with self._lock:
+                        self._buffer.extendleft(reversed(batch))
+                        self._in_flight = 0
+                    self._failed_at = time.monotonic()
+                    return written
+                with self._lock:
+                    self._in_flight = 0
+                self._failed_at = None
+                written += len(batch)
+
+    def pending(self):
+        return len(self._buffer)
+
+    def _append(self, rows):
+        """Buffer `rows` if they fit under the capacity, flushing first if needed; returns the rows pending."""
+        for attempt in range(2):
+            with self._lock:
+                # Rows being written count too: a failed flush puts them back. A
+                # single read larger than the capacity goes into an empty buffer
+                # and is flushed straight away.
+                pending = len(self._buffer) + self._in_flight
+                if pending + len(rows) <= self.capacity or pending == 0:
+                    self._buffer.extend(rows)
+                    return len(self._buffer)
+            # Don't hammer a database that just failed; refuse until the interval has passed
+            if attempt or (self._failed_at is not None and time.monotonic() - self._failed_at < self.flush_interval):
+                break
+            self.flush()
+        raise AuditUnavailable(f"{len(self._buffer)} audit rows could not be written")
+
+    def close(self):
+        """Stop the background thread and write what is left."""
+        thread, self._thread = self._thread, None
+        if thread is not None and self._pid == os.getpid():
+            self._stop.set()
+            self._wake.set()
+            thread.join()
+        if self._app is not None:
+            self.flush()
+
+    def _ensure_thread(self):
+        # Started on first use, and again in a worker forked from a preloading master
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="audit-log-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+def _audit_unavailable(error):
+    return jsonify({"error": "Access logging is unavailable, please try again"}), 503
+
+
+audit_log = AuditLog()
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+
+def working_windows(templates, range_start, range_end):
+    """
+        Expand weekly (weekday, start, end) templates into concrete
+        [start, end) windows clipped to [range_start, range_end), in order.
+    """
+    by_weekday = defaultdict(list)
+    for weekday, start, end in templates:
+        by_weekday[weekday].append((start, end))
+
+    windows = []
+    day = range_start.date()
+    while datetime.combine(day, time.min) < range_end:
+        for start, end in sorted(by_weekday.get(day.weekday(), [])):
+            window_start = max(datetime.combine(day, start), range_start)
+            window_end = min(datetime.combine(day, end), range_end)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        day += timedelta(days=1)
+    return windows
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching intervals; input must be sorted by start."""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(windows, busy, slot_length):
+    """
+        Sweep the sorted working windows and busy intervals together and cut
+        the gaps into consecutive slots of `slot_length`.
+
+        `busy` must be sorted by start time. Each busy interval is visited
+        only for the windows it touches, so this is O(windows + busy).
+    """
+    busy = merge_intervals(busy)
+    slots = []
+    i = 0
+    for window_start, window_end in windows:
+        while i < len(busy) and busy[i][1] <= window_start:
+            i += 1
+
+        cursor = window_start
+        j = i
+        while cursor < window_end:
+            if j < len(busy) and busy[j][0] < window_end:
+                gap_end, next_cursor = busy[j][0], busy[j][1]
+                j += 1
+            else:
+                gap_end, next_cursor = window_end, window_end
+
+            while cursor + slot_length <= gap_end:
+                slots.append((cursor, cursor + slot_length))
+                cursor += slot_length
+            cursor = max(cursor, next_cursor)
+    return slots
+
+
+def provider_free_slots(templates_by_provider, busy_by_provider, provider_ids, range_start, range_end,
+                        slot_length, default_templates):
+    """Free slots per provider; providers without a template use `default_templates`."""
+    result = {}
+    windows_by_templates = {}  # most providers share a template, so expand each one once
+    for provider_id in provider_ids:
+        templates = tuple(sorted(templates_by_provider.get(provider_id) or default_templates))
+        if templates not in windows_by_templates:
+            windows_by_templates[templates] = working_windows(templates, range_start, range_end)
+        result[provider_id] = free_slots(windows_by_templates[templates], busy_by_provider.get(provider_id, []),
+                                         slot_length)
+    return result
@@ -0,0 +1,44 @@
+from bisect import bisect_left, insort
+
+from app.services.availability import merge_intervals
+
+
+class IntervalIndex:
+    """
+        Sorted, non-overlapping [start, end) intervals of one provider.
+
+        Because the intervals never overlap, their ends are sorted too, so an
+        overlap test is a single bisect on the starts.
+    """
+
+    def __init__(self, intervals=()):
+        self._intervals = sorted(intervals)
+
+    def overlaps(self, start, end):
+        index = bisect_left(self._intervals, (end,))
+        return index > 0 and self._intervals[index - 1][1] > start
+
+    def add(self, start, end):
+        insort(self._intervals, (start, end))
+
+
+def accept_non_conflicting(candidates, existing_by_provider):
+    """
+        Walk `candidates` (index, provider_id, start, end) in order and split
+        them into accepted indexes and rejected ones. A candidate is rejected
+        when it overlaps an existing interval of its provider or an earlier
+        accepted candidate, so the first booking in the payload wins.
+    """
+    indexes = {}
+    accepted, rejected = [], []
+    for index, provider_id, start, end in candidates:
+        if provider_id not in indexes:
+            existing = sorted(existing_by_provider.get(provider_id, ()))
+            indexes[provider_id] = IntervalIndex(merge_intervals(existing))
+        provider_index = indexes[provider_id]
+        if provider_index.overlaps(start, end):
+            rejected.append(index)
+        else:
+            provider_index.add(start, end)
+            accepted.append(index)
+    return accepted, rejected
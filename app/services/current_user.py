@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.user import User
+
+CurrentUser = namedtuple('CurrentUser', ['id', 'username', 'role', 'person_id'])
+
+
+class CurrentUserCache:
+    """
+        Per-worker TTL cache of the fields handlers need from the logged in user.
+
+        Entries are plain `CurrentUser` tuples rather than ORM instances so they
+        can be shared across requests. Updates and deletes made by this worker
+        evict the entry when their transaction ends rather than at flush, so
+        nothing read in between stays cached: after a commit the next lookup
+        loads the new row, after a rollback the old one. Changes made by
+        other workers are picked up once the entry's TTL runs out.
+    """
+
+    def __init__(self):
+        self.ttl = 60
+        self._entries = {}  # user id -> (loaded_at, CurrentUser)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get("CURRENT_USER_CACHE_TTL_SECONDS", 60)
+        self.clear()
+
+    def get(self, user_id):
+        user_id = int(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        row = db.session.query(User.id, User.username, User.role, User.person_id) \
+            .filter(User.id == user_id).first()
+        if row is None:
+            self.invalidate(user_id)
+            return None
+
+        user = CurrentUser(*row)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), user)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = CurrentUserCache()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _remember_changed_user(mapper, connection, target):
+    inspect(target).session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _evict_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        user_cache.invalidate(user_id)
@@ -0,0 +1,53 @@
+from sqlalchemy.orm import load_only
+
+from app.models.person import Person
+from app.services.pagination import page_args, paginate
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+# Directory orderings; each ends in the primary key so the keyset is unique.
+# They are persons columns (not e.g. patients.id) so the matching
+# (type, ..., id) index on persons serves both the filter and the order.
+SORTS = {
+    "id": [Person.id],
+    "last_name": [Person.last_name, Person.id],
+}
+
+
+def field_args(args, schema_class):
+    """
+        The schema fields named in `fields` (comma-separated), in schema
+        order, or None when the client asked for everything.
+    """
+    if not args.get("fields"):
+        return None
+    requested = {name.strip() for name in args["fields"].split(",") if name.strip()}
+    declared = schema_class().dump_fields
+    unknown = requested - set(declared)
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in declared if name in requested]
+
+
+def directory_page(model, schema_class, args):
+    """
+        One page of a person directory (patients or providers) as
+        (data, next_cursor). `sort` picks the keyset order and `fields` a
+        sparse fieldset; only the requested columns, plus the sort keys the
+        cursor needs, are selected.
+    """
+    if args.get("sort", "id") not in SORTS:
+        raise InvalidFields(f"sort must be one of {', '.join(SORTS)}")
+    columns = SORTS[args.get("sort", "id")]
+    fields = field_args(args, schema_class)
+    limit, cursor = page_args(args)
+
+    query = model.query.filter(Person.type == model.__mapper__.polymorphic_identity)
+    if fields is not None:
+        names = dict.fromkeys(fields + [column.key for column in columns])
+        query = query.options(load_only(*(getattr(model, name) for name in names)))
+    rows, next_cursor = paginate(query, columns, limit, cursor)
+    return schema_class(many=True, only=fields).dump(rows), next_cursor
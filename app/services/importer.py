@@ -0,0 +1,185 @@
+import csv
+import json
+from collections import namedtuple
+from itertools import islice
+
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.insurance import Insurance
+from app.models.patient import Patient
+from app.models.person import Person
+from app.models.provider import Provider
+from app.schemas.insurance import InsuranceSchema
+from app.schemas.patient import PatientSchema
+from app.schemas.provider import ProviderSchema
+from app.services.patient_numbers import patient_numbers
+from app.services.person_search import name_index
+from app.services.reference_data import PROVIDER_FIELDS, bump_version, introduces_values
+
+FORMATS = ("csv", "ndjson")
+
+ImportSpec = namedtuple('ImportSpec', ['model', 'schema', 'unique_columns'])
+
+# Rows are validated with the same schemas as the one-by-one endpoints and
+# skipped when a unique column clashes with the database or an earlier row
+SPECS = {
+    "patients": ImportSpec(Patient, PatientSchema, (Person.national_id, Person.phone, Person.email)),
+    "providers": ImportSpec(Provider, ProviderSchema, (Person.national_id, Person.phone, Person.email)),
+    "insurance": ImportSpec(Insurance, InsuranceSchema, (Insurance.policy_number,)),
+}
+
+
+def read_rows(stream, input_format):
+    """
+        Yield (line_number, row, error) for each record of a text stream.
+        CSV empty cells are left out so optional fields stay optional; an
+        unparsable NDJSON line comes back with its error instead of a row.
+    """
+    if input_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}, None
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as err:
+            yield line_number, None, {"_schema": [f"Invalid JSON: {err}"]}
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, {"_schema": ["Expected a JSON object."]}
+            continue
+        yield line_number, row, None
+
+
+def import_rows(kind, rows, chunk_size, report):
+    """
+        Validate and insert `rows` (as yielded by read_rows) chunk by chunk,
+        one transaction and one multi-row INSERT per chunk. `report(line,
+        errors)` is called for every row that is not inserted.
+
+        Only one chunk is held at a time, and duplicates of rows from earlier
+        chunks are caught by the database lookup because those are committed
+        already, so memory stays bounded by `chunk_size` whatever the input
+        size. Returns counts of rows read, inserted, invalid and duplicate.
+    """
+    spec = SPECS[kind]
+    schema = spec.schema()
+    counts = {"rows": 0, "inserted": 0, "invalid": 0, "duplicates": 0}
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return counts
+        counts["rows"] += len(chunk)
+
+        valid = []
+        for line, row, error in chunk:
+            if error is None:
+                try:
+                    row = schema.load(row)
+                except ValidationError as err:
+                    error = err.messages
+            if error is not None:
+                counts["invalid"] += 1
+                report(line, error)
+            else:
+                valid.append((line, row))
+
+        valid = _drop_duplicates(spec, valid, counts, report)
+        if spec.model is Insurance:
+            valid = _drop_unknown_patients(valid, counts, report)
+        counts["inserted"] += _insert(spec, valid, counts, report)
+
+
+def _drop_duplicates(spec, valid, counts, report):
+    existing = {}
+    for column in spec.unique_columns:
+        values = {row[column.key] for _, row in valid if row.get(column.key) is not None}
+        existing[column.key] = set(db.session.scalars(select(column).where(column.in_(values)))) if values else set()
+
+    seen = {key: set() for key in existing}
+    kept = []
+    for line, row in valid:
+        errors = {}
+        for key in existing:
+            value = row.get(key)
+            if value is None:
+                continue
+            if value in existing[key]:
+                errors[key] = ["Already exists."]
+            elif value in seen[key]:
+                errors[key] = ["Repeated earlier in this import."]
+        if errors:
+            counts["duplicates"] += 1
+            report(line, errors)
+            continue
+        for key in existing:
+            if row.get(key) is not None:
+                seen[key].add(row[key])
+        kept.append((line, row))
+    return kept
+
+
+def _drop_unknown_patients(valid, counts, report):
+    patient_ids = {row["patient_id"] for _, row in valid}
+    known = set(db.session.scalars(select(Patient.id).where(Patient.id.in_(patient_ids)))) if patient_ids else set()
+    kept = []
+    for line, row in valid:
+        if row["patient_id"] in known:
+            kept.append((line, row))
+        else:
+            counts["invalid"] += 1
+            report(line, {"patient_id": ["Unknown patient."]})
+    return kept
+
+
+def _insert(spec, valid, counts, report):
+    if not valid:
+        return 0
+    rows = [row for _, row in valid]
+    if spec.model is Patient:
+        for row, number in zip(rows, patient_numbers.take(len(rows))):
+            row["patient_number"] = number
+
+    # One INSERT ... RETURNING over the whole chunk (both tables for joined
+    # inheritance). It bypasses the unit of work, so the flush listeners that
+    # keep the name index and reference data current are stood in for here.
+    statement = insert(spec.model).returning(spec.model.id, sort_by_parameter_order=True)
+    try:
+        inserted = list(zip(db.session.scalars(statement, rows), rows))
+        _after_insert(spec, rows)
+        db.session.commit()
+    except IntegrityError:
+        # A row written concurrently since the duplicate check; retry the chunk row by row
+        db.session.rollback()
+        inserted = []
+        for line, row in valid:
+            try:
+                with db.session.begin_nested():
+                    inserted.append((db.session.scalar(statement, row), row))
+            except IntegrityError:
+                counts["duplicates"] += 1
+                report(line, {"_schema": ["Conflicts with an existing record."]})
+        if inserted:
+            _after_insert(spec, [row for _, row in inserted])
+        db.session.commit()
+
+    if spec.model is not Insurance:
+        identity = spec.model.__mapper__.polymorphic_identity
+        name_index.apply({
+            person_id: (identity, row["first_name"], row["last_name"]) for person_id, row in inserted
+        })
+    return len(inserted)
+
+
+def _after_insert(spec, rows):
+    if spec.model is Provider and introduces_values(
+        (field, row.get(field)) for row in rows for field in PROVIDER_FIELDS
+    ):
+        bump_version(db.session)
@@ -0,0 +1,52 @@
+import json
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+from werkzeug.utils import import_string
+
+Notification = namedtuple('Notification', ['outbox_id', 'channel', 'recipient', 'subject', 'body'])
+
+
+class Sender(ABC):
+    """
+        Delivers rendered notifications. Subclasses implement `send`, which
+        raises on failure; the dispatcher retries failed messages later.
+    """
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    @abstractmethod
+    def send(self, notification):
+        """Deliver `notification`, raising on failure."""
+
+
+class StdoutSender(Sender):
+    """Prints one JSON line per notification; for development."""
+
+    def send(self, notification):
+        print(json.dumps(notification._asdict()), file=sys.stdout, flush=True)
+
+
+class FileSender(Sender):
+    """Appends one JSON line per notification to NOTIFICATION_FILE_PATH; for local testing."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["NOTIFICATION_FILE_PATH"])
+
+    def send(self, notification):
+        with self._lock, open(self.path, "a") as handle:
+            handle.write(json.dumps(notification._asdict()) + "\n")
+
+
+def make_sender(config):
+    """Instantiate the sender class named by NOTIFICATION_SENDER."""
+    return import_string(config["NOTIFICATION_SENDER"]).from_config(config)
@@ -0,0 +1,205 @@
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+from sqlalchemy import bindparam, delete, event, inspect, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.appointment import Appointment
+from app.models.occupancy import ProviderDayOccupancy
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BITMAP_BYTES = (SLOTS_PER_DAY + 7) // 8
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+_SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+def slot_mask(start, end):
+    """Bits of the slots of `start`'s day that [start, end) touches; `end` may be the next midnight."""
+    day_start = datetime.combine(start.date(), time.min)
+    first = (start - day_start) // _SLOT
+    last = min(-(-(end - day_start) // _SLOT), SLOTS_PER_DAY)
+    return ((1 << last) - 1) & ~((1 << first) - 1) if last > first else 0
+
+def day_masks(start, end):
+    """Split [start, end) at midnights into (day, mask) pairs."""
+    day = start.date()
+    while True:
+        day_start = datetime.combine(day, time.min)
+        day_end = day_start + timedelta(days=1)
+        mask = slot_mask(max(start, day_start), min(end, day_end))
+        if mask:
+            yield day, mask
+        if end <= day_end:
+            return
+        day += timedelta(days=1)
+
+def working_mask(templates, weekday):
+    """Slots lying entirely inside the (weekday, start, end) shifts of one weekday."""
+    mask = 0
+    for template_weekday, start, end in templates:
+        if template_weekday != weekday:
+            continue
+        first = -(-(start.hour * 60 + start.minute) // SLOT_MINUTES)
+        last = (end.hour * 60 + end.minute) // SLOT_MINUTES
+        if last > first:
+            mask |= ((1 << last) - 1) & ~((1 << first) - 1)
+    return mask
+
+def to_bytes(bits):
+    return bits.to_bytes(BITMAP_BYTES, 'big')
+
+def from_bytes(data):
+    return int.from_bytes(data, 'big')
+
+
+def refresh(connection, pairs):
+    """
+        Recompute the bitmaps of the given (provider_id, day) pairs from the
+        appointments visible to `connection`.
+
+        The bitmap rows are created if missing and locked in a fixed order
+        before the appointments are read, so two transactions touching the
+        same provider-day take turns and the second sees the first's
+        appointments once it commits.
+    """
+    pairs = sorted(set(pairs))
+    if not pairs:
+        return
+    table = ProviderDayOccupancy.__table__
+    _ensure_rows(connection, table, pairs)
+    connection.execute(
+        select(table.c.provider_id).where(tuple_(table.c.provider_id, table.c.day).in_(pairs))
+        .order_by(table.c.provider_id, table.c.day).with_for_update()
+    ).all()
+
+    bits = dict.fromkeys(pairs, 0)
+    appointments = Appointment.__table__.c
+    first_day, last_day = min(day for _, day in pairs), max(day for _, day in pairs)
+    rows = connection.execute(
+        select(appointments.provider_id, appointments.effective_start, appointments.effective_end).where(
+            appointments.provider_id.in_({provider_id for provider_id, _ in pairs}),
+            appointments.status.in_(Appointment.ACTIVE_STATUSES),
+            appointments.effective_start < datetime.combine(last_day + timedelta(days=1), time.min),
+            appointments.effective_end > datetime.combine(first_day, time.min)
+        )
+    )
+    for provider_id, start, end in rows:
+        for day, mask in day_masks(start, end):
+            if (provider_id, day) in bits:
+                bits[provider_id, day] |= mask
+
+    connection.execute(
+        table.update()
+        .where(table.c.provider_id == bindparam('_provider_id'), table.c.day == bindparam('_day'))
+        .values(bits=bindparam('_bits')),
+        [{"_provider_id": provider_id, "_day": day, "_bits": to_bytes(value)} for (provider_id, day), value in bits.items()]
+    )
+
+def _ensure_rows(connection, table, pairs):
+    rows = [{"provider_id": provider_id, "day": day, "bits": to_bytes(0)} for provider_id, day in pairs]
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        existing = set(connection.execute(
+            select(table.c.provider_id, table.c.day).where(tuple_(table.c.provider_id, table.c.day).in_(pairs))
+        ).all())
+        missing = [row for row in rows if (row["provider_id"], row["day"]) not in existing]
+        if missing:
+            connection.execute(table.insert(), missing)
+        return
+    connection.execute(insert(table).on_conflict_do_nothing(), rows)
+
+def rebuild(provider_ids=None, range_start=None, range_end=None, batch_size=500):
+    """
+        Recreate the bitmaps from the appointments table, optionally limited
+        to some providers and to days in [range_start, range_end). Returns the
+        number of provider-days with at least one booked slot.
+    """
+    table = ProviderDayOccupancy.__table__
+    appointments = Appointment.__table__.c
+
+    clear = delete(table)
+    query = select(appointments.provider_id, appointments.effective_start, appointments.effective_end) \
+        .where(appointments.status.in_(Appointment.ACTIVE_STATUSES))
+    if provider_ids:
+        clear = clear.where(table.c.provider_id.in_(provider_ids))
+        query = query.where(appointments.provider_id.in_(provider_ids))
+    if range_start is not None:
+        clear = clear.where(table.c.day >= range_start.date())
+        query = query.where(appointments.effective_end > range_start)
+    if range_end is not None:
+        clear = clear.where(table.c.day < range_end.date())
+        query = query.where(appointments.effective_start < range_end)
+
+    bits = {}
+    for provider_id, start, end in db.session.execute(query):
+        for day, mask in day_masks(start, end):
+            if (range_start is None or day >= range_start.date()) and (range_end is None or day < range_end.date()):
+                bits[provider_id, day] = bits.get((provider_id, day), 0) | mask
+
+    db.session.execute(clear)
+    rows = [{"provider_id": provider_id, "day": day, "bits": to_bytes(value)} for (provider_id, day), value in bits.items()]
+    for offset in range(0, len(rows), batch_size):
+        db.session.execute(table.insert(), rows[offset:offset + batch_size])
+    db.session.commit()
+    return len(rows)
+
+
+def day_bitmaps(provider_ids, day):
+    """Occupancy of `day` per provider in one query; providers without a row are free all day."""
+    table = ProviderDayOccupancy.__table__
+    rows = db.session.execute(
+        select(table.c.provider_id, table.c.bits).where(table.c.day == day, table.c.provider_id.in_(provider_ids))
+    )
+    bitmaps = dict.fromkeys(provider_ids, 0)
+    bitmaps.update((provider_id, from_bytes(bits)) for provider_id, bits in rows)
+    return bitmaps
+
+def free_providers(bitmaps, working_masks, mask):
+    """
+        Providers whose occupancy has none of the `mask` slots set and whose
+        working hours cover all of them: one AND per provider, no interval
+        arithmetic.
+    """
+    return [
+        provider_id for provider_id, bits in bitmaps.items()
+        if not bits & mask and working_masks[provider_id] & mask == mask
+    ]
+
+
+def _touched_pairs(appointment, is_new):
+    state = inspect(appointment)
+    attrs = ('provider_id', 'status', 'effective_start', 'effective_end')
+    histories = {name: state.attrs[name].history for name in attrs}
+    if not is_new and not any(history.has_changes() for history in histories.values()):
+        return set()
+
+    def interval(values):
+        provider_id, status, start, end = values
+        if status not in Appointment.ACTIVE_STATUSES or start is None or end is None:
+            return set()
+        return {(provider_id, day) for day, _ in day_masks(start, end)}
+
+    current = [getattr(appointment, name) for name in attrs]
+    previous = [
+        histories[name].deleted[0] if histories[name].deleted else getattr(appointment, name)
+        for name in attrs
+    ]
+    return interval(current) | (set() if is_new else interval(previous))
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_after_flush(session, flush_context):
+    # Covers ORM writes (create_appointment, update_appointment_status). Core
+    # bulk statements bypass this and call refresh() themselves.
+    pairs = set()
+    for appointment in chain(session.new, session.dirty, session.deleted):
+        if isinstance(appointment, Appointment):
+            pairs |= _touched_pairs(appointment, appointment in session.new)
+    if pairs:
+        refresh(session.connection(), pairs)
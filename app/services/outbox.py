@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models.appointment import Appointment
+from app.models.outbox import OutboxMessage
+from app.services.notifications import Notification
+
+# Appointment times are naive clinic-local times, so due_at is too and the
+# dispatcher compares it with the local clock rather than utcnow().
+
+def reminder_times(effective_start, now=None):
+    """When the reminders for an appointment starting at `effective_start` are due; past ones are dropped."""
+    now = now or datetime.now()
+    return [
+        effective_start - offset for offset in current_app.config["REMINDER_OFFSETS"]
+        if effective_start - offset > now
+    ]
+
+def reminder_rows(appointment_id, effective_start, now=None):
+    """Reminder rows as dicts, for Core bulk inserts that bypass the ORM."""
+    return [
+        {"kind": "appointment_reminder", "appointment_id": appointment_id, "due_at": due_at,
+         "status": "pending", "attempts": 0}
+        for due_at in reminder_times(effective_start, now)
+    ]
+
+def enqueue_reminders(appointment):
+    """Add reminder rows for `appointment` to the current session; they commit with it."""
+    appointment.sync_effective_interval()
+    for due_at in reminder_times(appointment.effective_start):
+        db.session.add(OutboxMessage(kind='appointment_reminder', appointment=appointment, due_at=due_at))
+
+def enqueue_status_change(appointment):
+    """
+        Call after changing an appointment's status, before commit: pending
+        reminders are withdrawn, a moved appointment gets new ones and a
+        cancelled one gets a notice.
+    """
+    withdraw_pending([appointment.id])
+    if appointment.status in Appointment.ACTIVE_STATUSES:
+        enqueue_reminders(appointment)
+    elif appointment.status == 'cancelled':
+        db.session.add(OutboxMessage(kind='appointment_cancelled', appointment=appointment, due_at=datetime.now()))
+
+def enqueue_bulk_status_change(appointment_ids, status):
+    """Set-based enqueue_status_change for appointments moved to an inactive status by one UPDATE."""
+    if not appointment_ids:
+        return
+    withdraw_pending(appointment_ids)
+    if status == 'cancelled':
+        now = datetime.now()
+        db.session.execute(insert(OutboxMessage), [
+            {"kind": "appointment_cancelled", "appointment_id": appointment_id, "due_at": now,
+             "status": "pending", "attempts": 0}
+            for appointment_id in appointment_ids
+        ])
+
+def withdraw_pending(appointment_ids):
+    """Cancel the not yet sent messages of these appointments."""
+    db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.appointment_id.in_(appointment_ids), OutboxMessage.status == 'pending')
+        .values(status='cancelled'),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def claim_due(batch_size, now=None):
+    """
+        Claim up to `batch_size` due messages and commit the claim. Rows are
+        selected FOR UPDATE SKIP LOCKED, so concurrent workers take disjoint
+        batches, and leased for OUTBOX_LEASE_SECONDS, after which a crashed
+        worker's batch becomes claimable again. Returns the claimed ids.
+    """
+    now = now or datetime.now()
+    ids = db.session.scalars(
+        db.select(OutboxMessage.id)
+        .where(or_(
+            (OutboxMessage.status == 'pending') & (OutboxMessage.due_at <= now),
+            (OutboxMessage.status == 'processing') & (OutboxMessage.locked_until < now)
+        ))
+        .order_by(OutboxMessage.due_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if ids:
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(ids)).values(
+                status='processing',
+                locked_until=now + timedelta(seconds=current_app.config["OUTBOX_LEASE_SECONDS"]),
+                attempts=OutboxMessage.attempts + 1
+            ),
+            execution_options={"synchronize_session": False}
+        )
+    db.session.commit()
+    return ids
+
+def render(message):
+    """Build the Notification for a message, or None if there is nothing left to say."""
+    appointment = message.appointment
+    if appointment is None:
+        return None
+    if message.kind in ('appointment_reminder', 'waitlist_offer') and appointment.status not in Appointment.ACTIVE_STATUSES:
+        return None
+
+    patient = appointment.patient
+    channel, recipient = ('sms', patient.phone) if patient.phone else ('email', patient.email)
+    if not recipient:
+        return None
+
+    when = appointment.effective_start.strftime('%a %d %b %Y at %H:%M')
+    if message.kind == 'appointment_cancelled':
+        subject = "Appointment cancelled"
+        body = f"Dear {patient.first_name}, your appointment on {when} has been cancelled."
+    elif message.kind == 'waitlist_offer':
+        subject = "An earlier appointment is available"
+        body = (f"Dear {patient.first_name}, a slot opened up and you have been booked for {when}. "
+                f"If you cannot make it, please cancel so it can be offered to someone else.")
+    else:
+        subject = "Appointment reminder"
+        body = f"Dear {patient.first_name}, this is a reminder of your appointment on {when}."
+    return Notification(message.id, channel, recipient, subject, body)
+
+def dispatch_batch(sender, batch_size, now=None):
+    """
+        Claim, render and send one batch. Sending happens outside any
+        transaction, so a slow gateway holds no locks. Returns
+        (sent, skipped, failed) counts; (0, 0, 0) means nothing was due.
+    """
+    now = now or datetime.now()
+    ids = claim_due(batch_size, now)
+    if not ids:
+        return 0, 0, 0
+
+    messages = (
+        OutboxMessage.query
+        .options(joinedload(OutboxMessage.appointment).joinedload(Appointment.patient))
+        .filter(OutboxMessage.id.in_(ids))
+        .order_by(OutboxMessage.due_at)
+        .all()
+    )
+    notifications, skipped = [], []
+    for message in messages:
+        notification = render(message)
+        if notification is None:
+            skipped.append(message.id)
+        else:
+            notifications.append(notification)
+    attempts = {message.id: message.attempts for message in messages}
+    # End the read transaction before talking to the gateway
+    db.session.commit()
+
+    sent, failures = [], {}
+    for notification in notifications:
+        try:
+            sender.send(notification)
+            sent.append(notification.outbox_id)
+        except Exception as err:
+            failures[notification.outbox_id] = str(err)[:255] or err.__class__.__name__
+
+    finished = datetime.now()
+    if sent:
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(sent))
+            .values(status='sent', sent_at=finished, locked_until=None),
+            execution_options={"synchronize_session": False}
+        )
+    if skipped:
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(skipped))
+            .values(status='cancelled', locked_until=None),
+            execution_options={"synchronize_session": False}
+        )
+    max_attempts = current_app.config["OUTBOX_MAX_ATTEMPTS"]
+    backoff = current_app.config["OUTBOX_RETRY_BACKOFF_SECONDS"]
+    for message_id, error in failures.items():
+        if attempts[message_id] >= max_attempts:
+            values = {"status": 'failed'}
+        else:
+            values = {"status": 'pending', "due_at": finished + timedelta(seconds=backoff * 2 ** (attempts[message_id] - 1))}
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id == message_id)
+            .values(last_error=error, locked_until=None, **values),
+            execution_options={"synchronize_session": False}
+        )
+    db.session.commit()
+    return len(sent), len(skipped), len(failures)
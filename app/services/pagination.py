@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app, jsonify
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql import operators
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def page_args(args):
+    """Read `limit` and `cursor` from the query string, clamping the limit."""
+    default = current_app.config["PAGE_SIZE_DEFAULT"]
+    try:
+        limit = int(args.get("limit", default))
+    except ValueError:
+        raise InvalidCursor("limit must be an integer")
+    return max(1, min(limit, current_app.config["PAGE_SIZE_MAX"])), args.get("cursor")
+
+
+def paginate(query, columns, limit, cursor=None):
+    """
+        Keyset pagination: order by `columns` (the last one must be unique,
+        normally the primary key; any may be `.desc()`) and continue strictly
+        after the row encoded in `cursor`. Each page is one index range scan
+        no matter how deep the client pages. Returns (rows, next_cursor);
+        next_cursor is None on the last page.
+    """
+    keys = [_key(ordering) for ordering in columns]
+    if cursor:
+        query = query.filter(keyset_after(columns, decode_cursor(cursor, [column for column, _ in keys])))
+    rows = query.order_by(*columns).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], column.key) for column, _ in keys])
+
+
+def paginated_response(data, next_cursor, status=200):
+    """The body stays a plain list; the next page's cursor travels in X-Next-Cursor."""
+    response = jsonify(data)
+    response.status_code = status
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def keyset_after(columns, values):
+    """Filter for the rows strictly after `values` in the order of `columns` (which may be `.desc()`)."""
+    return _after([_key(ordering) for ordering in columns], values)
+
+
+def _key(ordering):
+    """The column an ORDER BY term sorts on, and whether it sorts descending."""
+    if getattr(ordering, "modifier", None) is operators.desc_op:
+        return ordering.element, True
+    return ordering, False
+
+
+def _after(keys, values):
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        # A row-value comparison, unlike the equivalent nested OR, is one index range
+        columns = [column for column, _ in keys]
+        left, right = (columns[0], values[0]) if len(keys) == 1 else (tuple_(*columns), tuple_(*values))
+        return left < right if directions.pop() else left > right
+    (column, descending), value = keys[0], values[0]
+    return or_(column < value if descending else column > value,
+               and_(column == value, _after(keys[1:], values[1:])))
+
+
+def encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_coerce(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def _coerce(column, value):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
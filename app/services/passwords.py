@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+
+class HasherBusy(TimeoutError):
+    """Raised without waiting when PASSWORD_HASH_MAX_PENDING hashes are already queued or running."""
+
+
+class PasswordHasher:
+    """
+        Hashes and verifies passwords with the parameters set in `Config`.
+
+        Verification runs on a bounded thread pool (`PASSWORD_HASH_WORKERS`).
+        hashlib releases the GIL while hashing, so at most that many hashes
+        burn CPU at once and a login burst cannot starve other requests
+        served by the same worker. At most `PASSWORD_HASH_MAX_PENDING` hashes
+        may be running or queued; past that `HasherBusy` is raised at once.
+        Callers wait at most `PASSWORD_HASH_TIMEOUT_SECONDS` for a result,
+        then the queued hash is cancelled and
+        `concurrent.futures.TimeoutError` is raised.
+    """
+
+    def __init__(self):
+        self.method = "scrypt:32768:8:1"
+        self.salt_length = 16
+        self.workers = 4
+        self.max_pending = 16
+        self.timeout = 10
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def init_app(self, app):
+        self.method = _canonical_method(app.config.get("PASSWORD_HASH_METHOD", self.method))
+        self.salt_length = app.config.get("PASSWORD_HASH_SALT_LENGTH", self.salt_length)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING", self.max_pending)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT_SECONDS", self.timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with different parameters than configured."""
+        return password_hash.split("$", 1)[0] != self.method
+
+    def _run(self, function, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusy("Too many password hashes pending")
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Drop it if it has not started; nobody is waiting for the result any more
+            future.cancel()
+            raise
+
+
+def _canonical_method(method):
+    """
+        `method` with werkzeug's defaults spelled out ("pbkdf2:sha256" ->
+        "pbkdf2:sha256:<iterations>"), as it appears in the hashes it makes.
+    """
+    name, *args = method.split(":")
+    if name == "scrypt" and not args:
+        return "scrypt:32768:8:1"
+    if name == "pbkdf2" and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,64 @@
+import os
+import threading
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.models.patient import PATIENT_NUMBER_BLOCK_SIZE, patient_number_seq
+
+
+class PatientNumberAllocator:
+    """
+        Hi-lo allocator of patient numbers (PAT-001, PAT-002, ...).
+
+        Each worker reserves a block of PATIENT_NUMBER_BLOCK_SIZE numbers with
+        one atomic statement and then hands them out from memory, so
+        registering a patient needs no read and two workers can never draw
+        the same number. Blocks are reserved outside the caller's
+        transaction; numbers left in a block when a worker stops, or used by
+        a registration that rolls back, are skipped rather than reused.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._next = self._end = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._reset()
+        app.extensions["patient_numbers"] = self
+
+    def next_number(self):
+        return self.take(1)[0]
+
+    def take(self, count):
+        """`count` unused patient numbers, reserving further blocks as needed."""
+        numbers = []
+        with self._lock:
+            while len(numbers) < count:
+                # A forked worker must not hand out what is left of its parent's block
+                if self._next >= self._end or self._pid != os.getpid():
+                    self._next = self._reserve_block()
+                    self._end = self._next + PATIENT_NUMBER_BLOCK_SIZE
+                    self._pid = os.getpid()
+                taken = min(count - len(numbers), self._end - self._next)
+                numbers.extend(range(self._next, self._next + taken))
+                self._next += taken
+        return [f"PAT-{number:03d}" for number in numbers]
+
+    @staticmethod
+    def _reserve_block():
+        with db.engine.begin() as connection:
+            if connection.dialect.name == 'sqlite':
+                return connection.execute(
+                    text("UPDATE patient_number_blocks SET next_value = next_value + :size "
+                         "RETURNING next_value - :size"),
+                    {"size": PATIENT_NUMBER_BLOCK_SIZE}
+                ).scalar_one()
+            return connection.execute(patient_number_seq.next_value()).scalar_one()
+
+
+patient_numbers = PatientNumberAllocator()
@@ -0,0 +1,186 @@
+import heapq
+import re
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.patient import Patient
+from app.models.person import Person
+
+# A single token containing a digit is looked up as a patient number or national id prefix first
+_IDENTIFIER = re.compile(r"^[A-Za-z0-9-]*\d[A-Za-z0-9-]*$")
+
+
+def trigrams(value):
+    """pg_trgm's trigrams: each lower-cased word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in re.findall(r"[^\W_]+", value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class PersonNameIndex:
+    """
+        In-process trigram index of person names for databases without
+        pg_trgm (SQLite in development and tests).
+
+        Built on first search, patched with this worker's commits, and rebuilt
+        once it is older than `PERSON_SEARCH_INDEX_MAX_AGE` seconds so other
+        workers' writes show up eventually.
+    """
+
+    def __init__(self):
+        self.max_age = 300
+        self._reset()
+
+    def _reset(self):
+        self._people = None  # person id -> (type, trigrams of "first last")
+        self._postings = None  # trigram -> set of person ids
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age = app.config.get("PERSON_SEARCH_INDEX_MAX_AGE", 300)
+        self._reset()
+        app.extensions["person_search"] = self
+
+    def invalidate(self):
+        with self._lock:
+            self._people = None
+
+    def search(self, term, person_type, limit, threshold):
+        """
+            Up to `limit` (person_id, score) pairs of `person_type`, best
+            first. The score mirrors pg_trgm: the share of the term's
+            trigrams found in the name, then the whole-string similarity.
+        """
+        query = trigrams(term)
+        if not query:
+            return []
+        with self._lock:
+            if self._people is None or time.monotonic() - self._built_at > self.max_age:
+                self._build()
+            hits = Counter()
+            for gram in query:
+                hits.update(self._postings.get(gram, ()))
+            scored = []
+            for person_id, shared in hits.items():
+                kind, grams = self._people[person_id]
+                word_score = shared / len(query)
+                if kind != person_type or word_score < threshold:
+                    continue
+                scored.append((word_score, shared / (len(query) + len(grams) - shared), -person_id))
+        best = heapq.nlargest(limit, scored)
+        return [(-negated_id, word_score) for word_score, _, negated_id in best]
+
+    def apply(self, changes):
+        """Patch the index with committed changes: person id -> (type, first, last), or None when deleted."""
+        with self._lock:
+            if self._people is None:
+                return
+            for person_id, person in changes.items():
+                self._remove(person_id)
+                if person is not None:
+                    self._add(person_id, *person)
+
+    def _build(self):
+        self._people, self._postings = {}, {}
+        rows = db.session.query(Person.id, Person.type, Person.first_name, Person.last_name)
+        for person_id, person_type, first_name, last_name in rows:
+            self._add(person_id, person_type, first_name, last_name)
+        self._built_at = time.monotonic()
+
+    def _add(self, person_id, person_type, first_name, last_name):
+        grams = trigrams(f"{first_name} {last_name}")
+        self._people[person_id] = (person_type, grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(person_id)
+
+    def _remove(self, person_id):
+        previous = self._people.pop(person_id, None)
+        if previous is not None:
+            for gram in previous[1]:
+                self._postings[gram].discard(person_id)
+
+
+name_index = PersonNameIndex()
+
+
+def search_people(model, term, limit, threshold):
+    """
+        Ranked lookup of patients or providers (`model`) for the search box.
+
+        A term shaped like an identifier is first matched as a prefix of the
+        patient number or national id on their indexes; otherwise, or when
+        nothing matches, names are searched typo-tolerantly with trigrams.
+        Returns at most `limit` instances, best match first.
+    """
+    term = term.strip()
+    if not term:
+        return []
+    dialect = db.session.get_bind().dialect.name
+    if _IDENTIFIER.match(term):
+        matches = _identifier_matches(model, term, limit, dialect)
+        if matches:
+            return matches
+
+    if dialect == 'postgresql':
+        # Lets `%>` (and so the GIN index) filter at our threshold; reverts at the end of the transaction
+        db.session.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                           {"threshold": str(threshold)})
+        full_name = Person.first_name + ' ' + Person.last_name
+        return (
+            model.query
+            .filter(full_name.op('%>')(term))
+            .order_by(func.word_similarity(term, full_name).desc(), func.similarity(term, full_name).desc(), model.id)
+            .limit(limit)
+            .all()
+        )
+
+    ranked = name_index.search(term, model.__mapper__.polymorphic_identity, limit, threshold)
+    people = {person.id: person for person in model.query.filter(model.id.in_([person_id for person_id, _ in ranked]))}
+    return [people[person_id] for person_id, _ in ranked if person_id in people]
+
+
+def _identifier_matches(model, term, limit, dialect):
+    # GLOB is case-sensitive like the binary unique indexes SQLite can range-scan for it;
+    # Postgres uses the varchar_pattern_ops indexes for LIKE
+    def prefix_of(column, prefix):
+        return column.op('GLOB')(prefix + '*') if dialect == 'sqlite' else column.like(prefix + '%')
+
+    candidates = [(Person.national_id, term)]
+    if model is Patient:
+        candidates.insert(0, (Patient.patient_number, term.upper()))
+    matches = {}
+    for column, prefix in candidates:
+        for person in model.query.filter(prefix_of(column, prefix)).order_by(column).limit(limit):
+            matches.setdefault(person.id, person)
+    return list(matches.values())[:limit]
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_name_changes(session, flush_context):
+    changes = {}
+    for instance in session.new | session.dirty:
+        if isinstance(instance, Person):
+            changes[instance.id] = (instance.type, instance.first_name, instance.last_name)
+    for instance in session.deleted:
+        if isinstance(instance, Person):
+            changes[instance.id] = None
+    if changes:
+        session.info.setdefault("person_name_changes", {}).update(changes)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_name_changes(session):
+    changes = session.info.pop("person_name_changes", None)
+    if changes:
+        name_index.apply(changes)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_name_changes(session):
+    session.info.pop("person_name_changes", None)
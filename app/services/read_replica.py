@@ -0,0 +1,110 @@
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_sqlalchemy.session import Session
+from jwt.exceptions import PyJWTError
+from sqlalchemy.sql.dml import UpdateBase
+
+BIND_KEY = "replica"
+READ_METHODS = ("GET", "HEAD")
+
+
+class ReadReplicaRouter:
+    """
+        Decides per request whether `db.session` reads from the "replica"
+        bind (SQLALCHEMY_BINDS) or the primary.
+
+        GET requests to the blueprints named in READ_REPLICA_BLUEPRINTS read
+        from the replica, unless the caller made a successful write request
+        in the last READ_REPLICA_STICKY_SECONDS: those read the primary so
+        users see their own changes while the replica catches up. Writes
+        always go to the primary (see RoutingSession).
+
+        Recent writers are remembered per worker, like the current-user
+        cache, so a user whose next read lands on another worker may briefly
+        read from the replica. Entries past the sticky window are dropped as
+        new writes come in.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.blueprints = frozenset()
+        self.sticky_seconds = 10
+        self._writers = {}  # JWT identity -> monotonic time of the last write, oldest first
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = BIND_KEY in app.config.get("SQLALCHEMY_BINDS", {})
+        self.blueprints = frozenset(app.config.get("READ_REPLICA_BLUEPRINTS", ()))
+        self.sticky_seconds = app.config.get("READ_REPLICA_STICKY_SECONDS", 10)
+        with self._lock:
+            self._writers.clear()
+        app.before_request(self._route_request)
+        app.after_request(self._remember_writer)
+        app.extensions["read_replica"] = self
+
+    def wrote_recently(self, identity):
+        written_at = self._writers.get(identity)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    def _route_request(self):
+        g.read_replica = False
+        if not self.enabled or request.method not in READ_METHODS or request.blueprint not in self.blueprints:
+            return
+        try:
+            verify_jwt_in_request(optional=True)
+        except (JWTExtendedException, PyJWTError):
+            return  # the view rejects the token itself
+        g.read_replica = not self.wrote_recently(get_jwt_identity())
+
+    def _remember_writer(self, response):
+        if self.enabled and request.method not in READ_METHODS and response.status_code < 400:
+            try:
+                identity = get_jwt_identity()
+            except RuntimeError:
+                identity = None  # unauthenticated view, e.g. login
+            if identity is not None:
+                now = time.monotonic()
+                with self._lock:
+                    # Re-insert so the dict stays ordered by write time, then drop the expired head
+                    self._writers.pop(identity, None)
+                    self._writers[identity] = now
+                    while self._writers:
+                        writer, written_at = next(iter(self._writers.items()))
+                        if now - written_at < self.sticky_seconds:
+                            break
+                        del self._writers[writer]
+        return response
+
+
+replica_router = ReadReplicaRouter()
+
+
+class RoutingSession(Session):
+    """
+        `db.session` class that sends reads to the replica while the request
+        is routed there. Flushes and INSERT/UPDATE/DELETE statements go to the
+        primary, after which the rest of the request reads the primary too so
+        it sees its own uncommitted changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get("read_replica"):
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.read_replica = False
+            else:
+                return self._db.engines[BIND_KEY]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def copy_sqlite(source, target):
+    """Overwrite the `target` SQLite database with a consistent copy of `source` (both engines)."""
+    source_connection, target_connection = source.raw_connection(), target.raw_connection()
+    try:
+        source_connection.driver_connection.backup(target_connection.driver_connection)
+    finally:
+        target_connection.close()
+        source_connection.close()
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.appointment import Appointment
+from app.models.patient import Patient
+from app.models.record import MedicalRecord
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Output field -> column; the order is the CSV header order
+EXPORT_COLUMNS = {
+    "record_id": MedicalRecord.id,
+    "created_at": MedicalRecord.created_at,
+    "appointment_id": MedicalRecord.appointment_id,
+    "appointment_type_id": Appointment.appointment_type_id,
+    "appointment_start": Appointment.effective_start,
+    "appointment_end": Appointment.effective_end,
+    "appointment_status": Appointment.status,
+    "provider_id": MedicalRecord.provider_id,
+    "patient_id": MedicalRecord.patient_id,
+    "patient_number": Patient.patient_number,
+    "patient_first_name": Patient.first_name,
+    "patient_last_name": Patient.last_name,
+    "patient_gender": Patient.gender,
+    "patient_date_of_birth": Patient.date_of_birth,
+    "diagnosis": MedicalRecord.diagnosis,
+    "treatment": MedicalRecord.treatment,
+    "notes": MedicalRecord.notes,
+}
+
+# Rows are written out in chunks of about this many bytes
+CHUNK_BYTES = 64 * 1024
+
+
+def export_rows(batch_size, patient_id=None, provider_id=None, created_from=None, created_to=None):
+    """
+        Medical records joined with their appointment and patient, in id
+        order, as plain tuples in EXPORT_COLUMNS order.
+
+        `yield_per` streams the result (a server-side cursor on Postgres), so
+        only `batch_size` rows are held at a time however large the export.
+    """
+    statement = (
+        select(*EXPORT_COLUMNS.values())
+        .select_from(MedicalRecord)
+        .outerjoin(Appointment, Appointment.id == MedicalRecord.appointment_id)
+        .outerjoin(Patient, Patient.id == MedicalRecord.patient_id)
+        .order_by(MedicalRecord.id)
+    )
+    if patient_id is not None:
+        statement = statement.where(MedicalRecord.patient_id == patient_id)
+    if provider_id is not None:
+        statement = statement.where(MedicalRecord.provider_id == provider_id)
+    if created_from is not None:
+        statement = statement.where(MedicalRecord.created_at >= created_from)
+    if created_to is not None:
+        statement = statement.where(MedicalRecord.created_at < created_to)
+    for row in db.session.execute(statement.execution_options(yield_per=batch_size)):
+        yield tuple(row)
+
+
+def serialize(rows, export_format):
+    """Encode `rows` as NDJSON or CSV, yielding bytes chunks of about CHUNK_BYTES."""
+    lines = _csv_lines(rows) if export_format == "csv" else _ndjson_lines(rows)
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def gzipped(chunks):
+    """Compress a stream of bytes chunks into one gzip member, chunk by chunk."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _ndjson_lines(rows):
+    names = list(EXPORT_COLUMNS)
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), default=_isoformat, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(rows):
+    line = io.StringIO()
+    writer = csv.writer(line)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+        writer.writerow([_isoformat(value) if isinstance(value, (date, datetime)) else value for value in row])
+    yield line.getvalue()
+
+
+def _isoformat(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
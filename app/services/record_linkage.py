@@ -0,0 +1,235 @@
+import re
+from collections import namedtuple
+from datetime import datetime
+from itertools import combinations
+
+from sqlalchemy import delete, insert, select, tuple_
+
+from app.extensions import db
+from app.models.linkage import DuplicateCandidate, PatientBlockingKey, RecordLinkageRun
+from app.models.patient import Patient
+from app.models.person import Person
+from app.services.person_search import trigrams
+
+# Field weights of the match score. The denominator never drops below
+# MIN_EVIDENCE, so two people who only share a name cannot reach a usual threshold.
+WEIGHTS = {"name": 0.5, "date_of_birth": 0.2, "phone": 0.15, "national_id": 0.1, "email": 0.05}
+MIN_EVIDENCE = 0.7
+
+# What scoring needs of a patient, computed once per batch
+Features = namedtuple('Features', ['id', 'first', 'last', 'date_of_birth', 'phone', 'national_id', 'email'])
+
+_SOUNDEX_CODES = {letter: str(code) for code, letters in enumerate(
+    ["aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r"]) for letter in letters}
+
+
+def soundex(name):
+    """American Soundex of the first word of `name` ("Otieno" -> "O350"), or None."""
+    letters = [char for char in (name or "").lower() if char in _SOUNDEX_CODES]
+    if not letters:
+        return None
+    code, previous = letters[0].upper(), _SOUNDEX_CODES[letters[0]]
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES[letter]
+        if digit != "0" and digit != previous:
+            code += digit
+        if letter not in "hw":  # h and w do not separate letters with the same code
+            previous = digit
+    return (code + "000")[:4]
+
+
+def phone_suffix(phone):
+    """The last seven digits, which survive country codes and leading zeros."""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-7:] if len(digits) >= 7 else None
+
+
+def blocking_keys(first_name, last_name, date_of_birth, phone):
+    """
+        Keys under which a patient is grouped with look-alikes: phonetic
+        surname with birth year, phonetic surname with phonetic given name
+        (order-insensitive, so swapped names still meet), and phone suffix.
+    """
+    keys = set()
+    surname, given = soundex(last_name), soundex(first_name)
+    if surname and date_of_birth is not None:
+        keys.add(f"sy:{surname}:{date_of_birth.year}")
+    if surname and given:
+        keys.add("sg:{}:{}".format(*sorted((surname, given))))
+    suffix = phone_suffix(phone)
+    if suffix:
+        keys.add(f"ph:{suffix}")
+    return keys
+
+
+def score_pair(a, b):
+    """(score in [0, 1], fields that agree) for two Features."""
+    straight = (_jaccard(a.first, b.first) + _jaccard(a.last, b.last)) / 2
+    swapped = (_jaccard(a.first, b.last) + _jaccard(a.last, b.first)) / 2
+    parts = {"name": max(straight, swapped)}
+    if a.date_of_birth and b.date_of_birth:
+        parts["date_of_birth"] = _date_similarity(a.date_of_birth, b.date_of_birth)
+    if a.phone and b.phone:
+        parts["phone"] = float(a.phone == b.phone)
+    if a.national_id and b.national_id:
+        parts["national_id"] = float(a.national_id == b.national_id)
+    if a.email and b.email:
+        parts["email"] = float(a.email == b.email)
+    weight = max(sum(WEIGHTS[field] for field in parts), MIN_EVIDENCE)
+    score = sum(WEIGHTS[field] * value for field, value in parts.items()) / weight
+    return score, [field for field, value in parts.items() if value >= 0.8]
+
+
+def find_duplicates(incremental, threshold, max_block, batch_size):
+    """
+        Run the linkage job and return its RecordLinkageRun.
+
+        A full run rebuilds every patient's blocking keys and compares the
+        members of every block. An incremental run only keys the patients
+        registered since the last run and compares them with the blocks they
+        fall into. Blocks larger than `max_block` (a shared placeholder phone
+        number, say) are skipped rather than compared pairwise. Work is done
+        `batch_size` patients at a time, one transaction each.
+    """
+    watermark = 0
+    if incremental:
+        last_run = RecordLinkageRun.query.filter(RecordLinkageRun.finished_at.isnot(None)) \
+            .order_by(RecordLinkageRun.id.desc()).first()
+        watermark = last_run.last_patient_id if last_run else 0
+    else:
+        db.session.execute(delete(PatientBlockingKey))
+
+    run = RecordLinkageRun(mode="incremental" if incremental else "full", last_patient_id=watermark,
+                           patients_checked=0, candidates_found=0)
+    db.session.add(run)
+    db.session.commit()
+
+    run.patients_checked, run.last_patient_id = _index_patients(watermark, batch_size)
+    if run.patients_checked:
+        for batch in _block_batches(watermark if incremental else None, max_block, batch_size):
+            run.candidates_found += _score_batch(batch, watermark, threshold)
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    return run
+
+
+def _index_patients(after_id, batch_size):
+    """Store blocking keys for patients with id > after_id; returns (count, highest id)."""
+    count, highest = 0, after_id
+    statement = (
+        select(Patient.id, Patient.first_name, Patient.last_name, Patient.date_of_birth, Patient.phone)
+        .where(Patient.id > after_id).order_by(Patient.id)
+        .execution_options(yield_per=batch_size)
+    )
+    rows = []
+    for person_id, first_name, last_name, date_of_birth, phone in db.session.execute(statement):
+        rows.extend({"key": key, "person_id": person_id}
+                    for key in blocking_keys(first_name, last_name, date_of_birth, phone))
+        count, highest = count + 1, person_id
+        if len(rows) >= batch_size:
+            db.session.execute(insert(PatientBlockingKey), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(PatientBlockingKey), rows)
+    db.session.commit()
+    return count, highest
+
+
+def _block_batches(touching_after, max_block, batch_size):
+    """Group the blocks from _blocks into lists covering about `batch_size` person ids."""
+    batch, size = [], 0
+    for block in _blocks(touching_after, max_block, batch_size):
+        batch.append(block)
+        size += len(block)
+        if size >= batch_size:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def _blocks(touching_after, max_block, page_size):
+    """
+        Stream blocks (person ids sharing a key) of two to `max_block`
+        members, reading the keys in keyset pages so neither the key table
+        nor an oversized block is ever held whole. With `touching_after`,
+        only blocks that contain a patient newer than that id.
+    """
+    statement = select(PatientBlockingKey.key, PatientBlockingKey.person_id)
+    if touching_after is not None:
+        statement = statement.where(PatientBlockingKey.key.in_(
+            select(PatientBlockingKey.key).where(PatientBlockingKey.person_id > touching_after)
+        ))
+    position = tuple_(PatientBlockingKey.key, PatientBlockingKey.person_id)
+
+    after, current_key, members = None, None, []
+    while True:
+        page = statement if after is None else statement.where(position > tuple_(*after))
+        rows = db.session.execute(
+            page.order_by(PatientBlockingKey.key, PatientBlockingKey.person_id).limit(page_size)
+        ).all()
+        for key, person_id in rows:
+            if key != current_key:
+                if 2 <= len(members) <= max_block:
+                    yield members
+                current_key, members = key, []
+            if len(members) <= max_block:
+                members.append(person_id)
+        if len(rows) < page_size:
+            break
+        after = tuple(rows[-1])
+    if 2 <= len(members) <= max_block:
+        yield members
+
+
+def _score_batch(blocks, watermark, threshold):
+    ids = {person_id for block in blocks for person_id in block}
+    features = {
+        row.id: Features(row.id, trigrams(row.first_name), trigrams(row.last_name), row.date_of_birth,
+                         phone_suffix(row.phone), row.national_id, (row.email or "").lower() or None)
+        for row in db.session.execute(
+            select(Person.id, Person.first_name, Person.last_name, Person.date_of_birth, Person.phone,
+                   Person.national_id, Person.email).where(Person.id.in_(ids))
+        )
+    }
+
+    found = {}
+    for block in blocks:
+        for low, high in combinations(block, 2):
+            # Incremental runs only compare pairs involving a new patient
+            if high <= watermark or (low, high) in found or low not in features or high not in features:
+                continue
+            score, reasons = score_pair(features[low], features[high])
+            if score >= threshold:
+                found[(low, high)] = (score, reasons)
+    if not found:
+        return 0
+
+    known = set(db.session.execute(
+        select(DuplicateCandidate.person_id, DuplicateCandidate.duplicate_person_id)
+        .where(tuple_(DuplicateCandidate.person_id, DuplicateCandidate.duplicate_person_id).in_(list(found)))
+    ).tuples())
+    rows = [
+        {"person_id": low, "duplicate_person_id": high, "score": round(score, 4), "reasons": ",".join(reasons),
+         "status": "open", "created_at": datetime.utcnow()}
+        for (low, high), (score, reasons) in found.items() if (low, high) not in known
+    ]
+    if rows:
+        db.session.execute(insert(DuplicateCandidate), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def _date_similarity(a, b):
+    if a == b:
+        return 1.0
+    if a.year == b.year and (a.month, a.day) == (b.day, b.month):
+        return 0.8  # day and month swapped at the desk
+    return 0.3 if a.year == b.year else 0.0
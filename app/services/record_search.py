@@ -0,0 +1,96 @@
+import re
+
+from sqlalchemy import Float, Integer, bindparam, column, text
+
+from app.extensions import db
+from app.services.pagination import decode_cursor, encode_cursor
+
+# Lower is better on both backends; Postgres ranks are negated to match bm25()
+_CURSOR_COLUMNS = [column('score', Float), column('id', Integer)]
+
+_POSTGRES_PAGE = """
+    SELECT id, score FROM (
+        SELECT m.id, -(ts_rank_cd(m.search_vector, query))::float8 AS score
+        FROM medical_records m, websearch_to_tsquery('english', :q) query
+        WHERE m.search_vector @@ query {scope}
+    ) ranked
+    {after}
+    ORDER BY score, id
+    LIMIT :limit
+"""
+_POSTGRES_HIGHLIGHT = """
+    SELECT m.id, ts_headline('english', concat_ws(' … ', m.diagnosis, m.treatment, m.notes), query,
+                             'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5')
+    FROM medical_records m, websearch_to_tsquery('english', :q) query
+    WHERE m.id IN :ids
+"""
+_SQLITE_PAGE = """
+    SELECT id, score FROM (
+        SELECT f.rowid AS id, bm25(medical_records_fts, 4.0, 2.0, 1.0) AS score
+        FROM medical_records_fts f JOIN medical_records m ON m.id = f.rowid
+        WHERE medical_records_fts MATCH :q {scope}
+    ) ranked
+    {after}
+    ORDER BY score, id
+    LIMIT :limit
+"""
+_SQLITE_HIGHLIGHT = """
+    SELECT rowid, snippet(medical_records_fts, -1, '<mark>', '</mark>', '…', 16)
+    FROM medical_records_fts
+    WHERE medical_records_fts MATCH :q AND rowid IN :ids
+"""
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def search_records(terms, limit, cursor=None, patient_id=None, provider_id=None):
+    """
+        Rank medical records against `terms` across diagnosis (weighted
+        highest), treatment and notes. Returns ([(record_id, score,
+        highlight)], next_cursor) for one page, best match first.
+
+        Pages are keyset on (score, id); highlights are computed only for
+        the rows of the page.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        page_sql, highlight_sql, query = _POSTGRES_PAGE, _POSTGRES_HIGHLIGHT, terms.strip()
+    elif dialect == 'sqlite':
+        page_sql, highlight_sql, query = _SQLITE_PAGE, _SQLITE_HIGHLIGHT, _fts5_query(terms)
+    else:
+        raise InvalidSearch(f"Full-text search is not available on {dialect}")
+    if not query:
+        raise InvalidSearch("Provide search terms")
+
+    params = {"q": query, "limit": limit + 1}
+    scope = ""
+    if patient_id is not None:
+        scope += " AND m.patient_id = :patient_id"
+        params["patient_id"] = patient_id
+    if provider_id is not None:
+        scope += " AND m.provider_id = :provider_id"
+        params["provider_id"] = provider_id
+    after = ""
+    if cursor:
+        params["after_score"], params["after_id"] = decode_cursor(cursor, _CURSOR_COLUMNS)
+        after = "WHERE (score, id) > (:after_score, :after_id)"
+
+    rows = db.session.execute(text(page_sql.format(scope=scope, after=after)), params).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1].score, rows[-1].id])
+    if not rows:
+        return [], None
+
+    highlights = dict(db.session.execute(
+        text(highlight_sql).bindparams(bindparam("ids", expanding=True)),
+        {"q": query, "ids": [record_id for record_id, _ in rows]}
+    ).all())
+    return [(record_id, score, highlights.get(record_id)) for record_id, score in rows], next_cursor
+
+def _fts5_query(terms):
+    # Quote every word so user input cannot inject FTS5 operators; the words are ANDed
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", terms))
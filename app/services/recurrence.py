@@ -0,0 +1,244 @@
+import heapq
+from collections import namedtuple
+from datetime import timedelta
+from itertools import islice, takewhile
+
+from dateutil.rrule import rrulestr
+from sqlalchemy import select
+
+from app.extensions import db
+
+from app.models.appointment import Appointment
+from app.models.provider import Provider
+from app.models.series import AppointmentSeries, SeriesException
+from app.services.availability import merge_intervals
+from app.services.booking import IntervalIndex
+from app.services.pagination import decode_cursor, encode_cursor, keyset_after
+
+# Field names mirror Appointment so AppointmentSchema can dump either
+Occurrence = namedtuple('Occurrence', [
+    'series_id', 'patient_id', 'provider_id', 'appointment_type_id',
+    'start_time', 'end_time', 'status', 'rescheduled_start_time', 'rescheduled_end_time',
+    'effective_start', 'effective_end',
+])
+
+class InvalidRule(ValueError):
+    pass
+
+
+def parse_rule(rrule_text, dtstart, max_occurrences):
+    """
+        Parse an RRULE and return its occurrence starts. Rules without COUNT or
+        UNTIL, or with more than `max_occurrences` occurrences, are rejected so
+        every series has a known end.
+    """
+    try:
+        rule = rrulestr(rrule_text, dtstart=dtstart)
+    except (ValueError, TypeError) as err:
+        raise InvalidRule(f"Invalid rrule: {err}")
+    starts = list(islice(rule, max_occurrences + 1))
+    if not starts:
+        raise InvalidRule("The rrule produces no occurrences")
+    if len(starts) > max_occurrences:
+        raise InvalidRule(f"A series is limited to {max_occurrences} occurrences; add COUNT or UNTIL")
+    return starts
+
+
+def expand(series, exceptions, range_start, range_end):
+    """
+        Lazily yield the occurrences of `series` whose effective interval
+        intersects [range_start, range_end), in effective start order.
+
+        Only the part of the rule inside the window is generated. Moved
+        occurrences are yielded at their new times.
+    """
+    duration = timedelta(minutes=series.duration_minutes)
+    overrides = {exception.original_start: exception for exception in exceptions}
+    moved = sorted(
+        (_occurrence(series, exception.original_start, duration, exception) for exception in exceptions
+         if exception.status == 'rescheduled'),
+        key=lambda occurrence: occurrence.effective_start
+    )
+
+    rule = rrulestr(series.rrule, dtstart=series.starts_at)
+    starts = takewhile(lambda start: start < range_end, rule.xafter(range_start - duration, inc=True))
+    regular = (
+        _occurrence(series, start, duration, overrides.get(start)) for start in starts
+        if start + duration > range_start and getattr(overrides.get(start), 'status', None) != 'rescheduled'
+    )
+    in_window = (
+        occurrence for occurrence in moved
+        if occurrence.effective_start < range_end and occurrence.effective_end > range_start
+    )
+    return heapq.merge(regular, in_window, key=lambda occurrence: occurrence.effective_start)
+
+
+def _occurrence(series, start, duration, exception):
+    status, new_start, new_end = 'scheduled', None, None
+    if exception is not None:
+        status, new_start, new_end = exception.status, exception.new_start, exception.new_end
+    return Occurrence(
+        series.id, series.patient_id, series.provider_id, series.appointment_type_id,
+        start, start + duration, status, new_start, new_end,
+        new_start or start, new_end or start + duration,
+    )
+
+
+def load_series(query, range_start, range_end):
+    """Active series from `query` overlapping the window, with their exceptions, in two queries."""
+    series_list = query.filter(
+        AppointmentSeries.status == 'active',
+        AppointmentSeries.starts_at < range_end,
+        AppointmentSeries.ends_at > range_start
+    ).all()
+    exceptions = {}
+    if series_list:
+        rows = SeriesException.query.filter(SeriesException.series_id.in_([s.id for s in series_list])).all()
+        for exception in rows:
+            exceptions.setdefault(exception.series_id, []).append(exception)
+    return [(series, exceptions.get(series.id, [])) for series in series_list]
+
+
+def occurrences(series_with_exceptions, range_start, range_end):
+    """All occurrences of several series merged in (effective_start, series_id) order."""
+    return heapq.merge(
+        *[expand(series, exceptions, range_start, range_end) for series, exceptions in series_with_exceptions],
+        key=lambda occurrence: (occurrence.effective_start, occurrence.series_id)
+    )
+
+
+def active_occurrences_starting_in(series_query, range_start, range_end):
+    """Scheduled or moved occurrences of the series in `series_query` that (effectively) start in the window."""
+    return [
+        occurrence
+        for occurrence in occurrences(load_series(series_query, range_start, range_end), range_start, range_end)
+        if occurrence.status in Appointment.ACTIVE_STATUSES and range_start <= occurrence.effective_start < range_end
+    ]
+
+
+def cancel_occurrences(series_query, range_start, range_end):
+    """
+        Add cancellations to the session for the active occurrences of
+        `series_query` starting in the window, the series counterpart of a
+        set-based status UPDATE. Returns the cancelled occurrences.
+    """
+    cancelled = active_occurrences_starting_in(series_query, range_start, range_end)
+    if not cancelled:
+        return []
+    existing = {
+        (exception.series_id, exception.original_start): exception
+        for exception in SeriesException.query.filter(
+            SeriesException.series_id.in_({occurrence.series_id for occurrence in cancelled})
+        )
+    }
+    for occurrence in cancelled:
+        exception = existing.get((occurrence.series_id, occurrence.start_time))
+        if exception is None:
+            exception = SeriesException(series_id=occurrence.series_id, original_start=occurrence.start_time)
+            db.session.add(exception)
+        exception.status = 'cancelled'
+        exception.new_start = exception.new_end = None
+    return cancelled
+
+
+def series_busy_intervals(provider_ids, range_start, range_end, exclude=None):
+    """
+        Effective intervals of active series occurrences per provider inside
+        the window. `exclude` is a (series_id, original_start) pair to leave
+        out, or a series id to leave out entirely.
+    """
+    busy = {}
+    query = AppointmentSeries.query.filter(AppointmentSeries.provider_id.in_(provider_ids))
+    for occurrence in occurrences(load_series(query, range_start, range_end), range_start, range_end):
+        if occurrence.status not in Appointment.ACTIVE_STATUSES:
+            continue
+        if exclude in (occurrence.series_id, (occurrence.series_id, occurrence.start_time)):
+            continue
+        busy.setdefault(occurrence.provider_id, []).append((occurrence.effective_start, occurrence.effective_end))
+    return busy
+
+
+def lock_providers(provider_ids):
+    """
+        Lock the providers' rows until the current transaction ends, so that
+        one booking, series or move per provider runs its conflict check and
+        write at a time. Series occurrences are not stored rows, so the
+        exclusion constraint alone cannot stop a single booking and a series
+        from claiming the same slot concurrently. Call before the check.
+
+        SQLite has no row locks (FOR UPDATE is not emitted); it allows one
+        writer at a time.
+    """
+    providers = Provider.__table__.c
+    db.session.execute(
+        select(providers.id).where(providers.id.in_(sorted(set(provider_ids)))).order_by(providers.id).with_for_update()
+    ).all()
+
+
+def provider_is_busy(provider_id, start, end, exclude_appointment_id=None, exclude_occurrence=None):
+    """True if a stored appointment or a series occurrence of the provider overlaps [start, end)."""
+    clash = Appointment.overlapping(provider_id, start, end)
+    if exclude_appointment_id is not None:
+        clash = clash.filter(Appointment.id != exclude_appointment_id)
+    if clash.first():
+        return True
+    return bool(series_busy_intervals([provider_id], start, end, exclude=exclude_occurrence))
+
+
+def conflicting_starts(provider_id, intervals, exclude_series_id=None):
+    """
+        Of the sorted `intervals`, return those that overlap one another, a
+        stored appointment or another series of the provider. Costs one
+        appointment query plus one series expansion over the covered span.
+    """
+    span_start, span_end = intervals[0][0], max(end for _, end in intervals)
+    existing = [
+        (row.effective_start, row.effective_end)
+        for row in Appointment.overlapping(provider_id, span_start, span_end)
+        .with_entities(Appointment.effective_start, Appointment.effective_end)
+    ]
+    existing += series_busy_intervals([provider_id], span_start, span_end, exclude=exclude_series_id).get(provider_id, [])
+    index = IntervalIndex(merge_intervals(sorted(existing)))
+
+    conflicts = []
+    for start, end in intervals:
+        if index.overlaps(start, end):
+            conflicts.append(start)
+        else:
+            index.add(start, end)
+    return conflicts
+
+
+def merged_page(query, series_with_exceptions, range_start, range_end, limit, cursor=None, status=None):
+    """
+        One page of stored appointments and series occurrences starting in
+        [range_start, range_end), ordered by (effective_start, kind, id) where
+        kind 0 is a stored appointment and kind 1 an occurrence (id = series id).
+        `query` is expected to be filtered already; `status` filters the
+        occurrences the same way. Returns (items, next_cursor).
+    """
+    after = None
+    if cursor:
+        after = tuple(decode_cursor(cursor, [Appointment.effective_start, Appointment.id, Appointment.id]))
+        start, kind, key = after
+        if kind == 0:
+            query = query.filter(keyset_after([Appointment.effective_start, Appointment.id], [start, key]))
+        else:
+            query = query.filter(Appointment.effective_start > start)
+
+    stored = (
+        ((appointment.effective_start, 0, appointment.id), appointment)
+        for appointment in query.order_by(Appointment.effective_start, Appointment.id).limit(limit + 1)
+    )
+    expanded = (
+        ((occurrence.effective_start, 1, occurrence.series_id), occurrence)
+        for occurrence in occurrences(series_with_exceptions, range_start, range_end)
+        if range_start <= occurrence.effective_start < range_end and status in (None, occurrence.status)
+    )
+    if after is not None:
+        expanded = (item for item in expanded if item[0] > after)
+
+    page = list(islice(heapq.merge(stored, expanded, key=lambda item: item[0]), limit + 1))
+    if len(page) <= limit:
+        return [item for _, item in page], None
+    return [item for _, item in page[:limit]], encode_cursor(list(page[limit - 1][0]))
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import event, inspect, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.appointment import AppointmentType
+from app.models.provider import Provider
+from app.models.reference_data import ReferenceDataVersion
+
+ReferenceSnapshot = namedtuple('ReferenceSnapshot', [
+    'version', 'appointment_types', 'cadres', 'specializations', 'etag'
+])
+
+
+class ReferenceDataRegistry:
+    """
+        In-process copy of the small lookup lists: appointment types and the
+        cadres/specializations in use by providers.
+
+        The copy is loaded when the app starts and replaced when this worker
+        commits a change to those tables. Changes made by other workers are
+        picked up by comparing the shared version counter at most once every
+        `REFERENCE_DATA_REFRESH_SECONDS`, so request handlers never query the
+        underlying tables.
+    """
+
+    def __init__(self):
+        self.refresh_interval = 30
+        self._reset()
+
+    def _reset(self):
+        self._snapshot = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.get("REFERENCE_DATA_REFRESH_SECONDS", 30)
+        self._reset()
+        app.extensions["reference_data"] = self
+        with app.app_context():
+            try:
+                self.snapshot()
+            except SQLAlchemyError:
+                # Tables not created yet (fresh database, `flask db upgrade`); load on first use
+                self._reset()
+            finally:
+                db.session.remove()
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._current_version() != self._snapshot.version:
+                self._snapshot = self._load()
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self):
+        """Drop the copy; the next access reloads it."""
+        self._snapshot = None
+
+    def has_appointment_type(self, appointment_type_id):
+        return appointment_type_id in self.snapshot().appointment_types
+
+    @staticmethod
+    def _current_version():
+        return db.session.query(ReferenceDataVersion.version).filter(ReferenceDataVersion.id == 1).scalar() or 0
+
+    def _load(self):
+        version = self._current_version()
+        appointment_types = dict(
+            db.session.query(AppointmentType.id, AppointmentType.name).order_by(AppointmentType.id).all()
+        )
+        cadres = tuple(value for (value,) in db.session.query(Provider.cadre).distinct().order_by(Provider.cadre))
+        specializations = tuple(
+            value for (value,) in db.session.query(Provider.specialization)
+            .filter(Provider.specialization.isnot(None)).distinct().order_by(Provider.specialization)
+        )
+        body = {
+            "appointment_types": [{"id": key, "name": name} for key, name in appointment_types.items()],
+            "cadres": list(cadres),
+            "specializations": list(specializations),
+        }
+        etag = hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+        return ReferenceSnapshot(version, appointment_types, cadres, specializations, etag)
+
+
+registry = ReferenceDataRegistry()
+
+
+PROVIDER_FIELDS = ("cadre", "specialization")
+
+
+def introduces_values(values):
+    """Whether any of the (field, value) pairs is a cadre or specialization the registry doesn't list yet."""
+    snapshot = registry.snapshot()
+    known = {("cadre", value) for value in snapshot.cadres} | \
+        {("specialization", value) for value in snapshot.specializations}
+    return any(value is not None and (field, value) not in known for field, value in values)
+
+
+def _changes_reference_data(session):
+    """
+        Whether flushing `session` changes appointment types or the set of
+        distinct provider cadres/specializations. Providers that only reuse
+        existing values leave the version alone, so registrations don't all
+        update the one version row.
+    """
+    added, removed, changed_ids = set(), set(), set()
+    for instance in session.new | session.deleted | session.dirty:
+        if isinstance(instance, AppointmentType):
+            return True
+        if not isinstance(instance, Provider):
+            continue
+        state = inspect(instance)
+        for field in PROVIDER_FIELDS:
+            history = state.attrs[field].history
+            if instance in session.new:
+                added.update((field, value) for value in history.added)
+            elif instance in session.deleted:
+                removed.update((field, value) for value in history.deleted or history.unchanged)
+                changed_ids.add(instance.id)
+            elif history.has_changes():
+                if not history.deleted:
+                    return True  # previous value not loaded
+                added.update((field, value) for value in history.added)
+                removed.update((field, value) for value in history.deleted)
+                changed_ids.add(instance.id)
+
+    if introduces_values(added):
+        return True
+    with session.no_autoflush:
+        for field, value in removed - added:
+            if value is None:
+                continue
+            still_used = session.query(Provider.id).filter(
+                getattr(Provider, field) == value, Provider.id.notin_(changed_ids)
+            ).first()
+            if still_used is None:
+                return True
+    return False
+
+
+def bump_version(session):
+    """
+        Mark reference data as changed in the session's transaction. Called
+        by the flush listener below, and directly by bulk writes that bypass
+        the unit of work.
+    """
+    session.info["reference_data_changed"] = True
+    session.execute(update(ReferenceDataVersion).where(ReferenceDataVersion.id == 1)
+                    .values(version=ReferenceDataVersion.version + 1))
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_reference_data_version(session, flush_context, instances):
+    if _changes_reference_data(session):
+        bump_version(session)
+
+@event.listens_for(Session, 'after_commit')
+def _reload_after_commit(session):
+    if session.info.pop("reference_data_changed", False):
+        registry.invalidate()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_change(session):
+    session.info.pop("reference_data_changed", None)
@@ -0,0 +1,162 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+from app.models.refresh_token import RefreshToken
+from app.models.revoked_token import RevokedToken
+
+
+class RevokedTokenCache:
+    """
+        In-process set of revoked JTIs kept in front of the revoked_tokens table.
+
+        The set is loaded on first use and then topped up incrementally by
+        reading only rows newer than the last one seen, at most once every
+        `REVOKED_TOKEN_CACHE_REFRESH_SECONDS`. Ids are allocated before
+        commit, so a row can become visible after rows with higher ids; each
+        refresh therefore re-reads the last `REVOKED_TOKEN_CACHE_OVERLAP_ROWS`
+        ids as well. Entries are dropped once the
+        token they belong to has expired, which keeps the set bounded by the
+        number of tokens revoked within one token lifetime.
+
+        A revoked login session is stored as one row under `family_jti()`,
+        which rejects every token carrying that `fam` claim, including
+        access tokens issued before the session was revoked.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.refresh_interval = 5
+        self.overlap_rows = 1000
+        self.max_token_lifetime = None
+        self._reset()
+
+    def _reset(self):
+        self._entries = {}  # jti -> expires_at (naive UTC)
+        self._last_id = 0
+        self._last_refresh = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("REVOKED_TOKEN_CACHE_ENABLED", True)
+        self.refresh_interval = app.config.get("REVOKED_TOKEN_CACHE_REFRESH_SECONDS", 5)
+        self.overlap_rows = app.config.get("REVOKED_TOKEN_CACHE_OVERLAP_ROWS", 1000)
+        lifetimes = [
+            app.config.get("JWT_ACCESS_TOKEN_EXPIRES"),
+            app.config.get("JWT_REFRESH_TOKEN_EXPIRES"),
+        ]
+        lifetimes = [value for value in lifetimes if isinstance(value, timedelta)]
+        self.max_token_lifetime = max(lifetimes) if lifetimes else None
+        self._reset()
+        app.extensions["revoked_token_cache"] = self
+
+    def is_revoked(self, jti, family=None):
+        keys = [jti] if family is None else [jti, family_jti(family)]
+        if not self.enabled:
+            return RevokedToken.query.filter(RevokedToken.jti.in_(keys)).first() is not None
+
+        if self._is_stale():
+            self.refresh()
+        return any(key in self._entries for key in keys)
+
+    def add(self, jti, expires_at=None):
+        """Record a token revoked by this worker without waiting for a refresh."""
+        with self._lock:
+            self._entries[jti] = expires_at
+
+    def refresh(self):
+        with self._lock:
+            if not self._is_stale():
+                return
+            query = RevokedToken.query.filter(RevokedToken.id > self._last_id - self.overlap_rows)
+            if self._last_id == 0:
+                query = query.filter(_unexpired(datetime.utcnow(), self.max_token_lifetime))
+
+            rows = query.order_by(RevokedToken.id).with_entities(
+                RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at, RevokedToken.created_at
+            ).all()
+            for row_id, jti, expires_at, created_at in rows:
+                self._entries.setdefault(jti, expires_at or self._expiry_for(created_at))
+                self._last_id = max(self._last_id, row_id)
+
+            self._prune()
+            self._last_refresh = time.monotonic()
+
+    def _is_stale(self):
+        if self._last_refresh is None:
+            return True
+        return time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    def _expiry_for(self, created_at):
+        if created_at is None or self.max_token_lifetime is None:
+            return None
+        return created_at + self.max_token_lifetime
+
+    def _prune(self):
+        now = datetime.utcnow()
+        expired = [jti for jti, expires_at in self._entries.items()
+                   if expires_at is not None and expires_at <= now]
+        for jti in expired:
+            del self._entries[jti]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def family_jti(family):
+    """The revoked_tokens key that revokes every token of a login session."""
+    return f"family:{family}"
+
+
+def _unexpired(now, max_token_lifetime):
+    """Rows whose token can still be presented; legacy rows fall back to created_at."""
+    if max_token_lifetime is None:
+        return or_(RevokedToken.expires_at > now, RevokedToken.expires_at.is_(None))
+    return or_(
+        RevokedToken.expires_at > now,
+        and_(RevokedToken.expires_at.is_(None), RevokedToken.created_at >= now - max_token_lifetime),
+    )
+
+
+def _expired(now, max_token_lifetime):
+    # Spelled out rather than ~_unexpired() so NULL columns don't make the predicate NULL
+    if max_token_lifetime is None:
+        return RevokedToken.expires_at <= now
+    return or_(
+        RevokedToken.expires_at <= now,
+        and_(RevokedToken.expires_at.is_(None), RevokedToken.created_at < now - max_token_lifetime),
+    )
+
+
+def prune_expired_tokens(batch_size=1000, now=None):
+    """
+        Delete revoked-token rows whose tokens have expired, `batch_size` rows
+        per transaction so the table is never locked for long. Returns the
+        number of rows deleted.
+    """
+    now = now or datetime.utcnow()
+    return _delete_in_batches(RevokedToken, _expired(now, blocklist.max_token_lifetime), batch_size)
+
+
+def prune_expired_refresh_tokens(batch_size=1000, now=None):
+    """Delete issued refresh-token rows past their expiry, in batches."""
+    now = now or datetime.utcnow()
+    return _delete_in_batches(RefreshToken, RefreshToken.expires_at <= now, batch_size)
+
+
+def _delete_in_batches(model, predicate, batch_size):
+    deleted = 0
+    while True:
+        ids = [row_id for (row_id,) in db.session.query(model.id)
+               .filter(predicate).limit(batch_size).all()]
+        if not ids:
+            return deleted
+        model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
+
+
+blocklist = RevokedTokenCache()
@@ -0,0 +1,135 @@
+import heapq
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.extensions import db
+from app.models.appointment import Appointment
+from app.models.outbox import OutboxMessage
+from app.models.waitlist import WaitlistEntry
+from app.services.outbox import enqueue_reminders
+from app.services.pagination import paginate
+from app.services.recurrence import lock_providers, provider_is_busy
+
+logger = logging.getLogger(__name__)
+
+MATCH_ORDER = [WaitlistEntry.priority, WaitlistEntry.requested_at, WaitlistEntry.id]
+
+
+def _stream(query, batch_size):
+    """Yield the rows of `query` in MATCH_ORDER, fetching one keyset page at a time."""
+    cursor = None
+    while True:
+        rows, cursor = paginate(query, MATCH_ORDER, batch_size, cursor)
+        yield from rows
+        if cursor is None:
+            return
+
+def candidates(provider_id, appointment_type_id, start, end, batch_size=50):
+    """
+        Waiting entries that fit [start, end) on `provider_id`, best first:
+        lowest priority number, then earliest request.
+
+        Entries for this provider and entries for any provider are two
+        index-ordered streams merged through a heap, so only as many rows are
+        read as it takes to find a match, however long the list is.
+    """
+    minutes = int((end - start).total_seconds() // 60)
+    fits = WaitlistEntry.query.filter(
+        WaitlistEntry.status == 'waiting',
+        WaitlistEntry.earliest_start <= start,
+        WaitlistEntry.latest_end > start,
+        WaitlistEntry.duration_minutes <= minutes,
+        or_(WaitlistEntry.appointment_type_id.is_(None), WaitlistEntry.appointment_type_id == appointment_type_id)
+    )
+    streams = [
+        _stream(fits.filter(WaitlistEntry.provider_id == provider_id), batch_size),
+        _stream(fits.filter(WaitlistEntry.provider_id.is_(None)), batch_size),
+    ]
+    for entry in heapq.merge(*streams, key=lambda entry: (entry.priority, entry.requested_at, entry.id)):
+        # The booked interval starts with the freed one and lasts as long as the entry asked for
+        if start + timedelta(minutes=entry.duration_minutes) <= entry.latest_end:
+            yield entry
+
+def _patient_is_busy(patient_id, start, end):
+    return db.session.query(Appointment.id).filter(
+        Appointment.patient_id == patient_id,
+        Appointment.status.in_(Appointment.ACTIVE_STATUSES),
+        Appointment.effective_start < end,
+        Appointment.effective_end > start
+    ).first() is not None
+
+def fill_slot(provider_id, appointment_type_id, start, end, now=None):
+    """
+        Book the best fitting waitlisted patient into the freed [start, end)
+        and queue a notice for them. Runs in its own transaction after the
+        cancellation has committed. Returns the new appointment or None.
+    """
+    now = now or datetime.now()
+    if start <= now:
+        return None
+    lock_providers([provider_id])
+    if provider_is_busy(provider_id, start, end):
+        db.session.rollback()
+        return None
+
+    for entry in candidates(provider_id, appointment_type_id, start, end):
+        booked_end = start + timedelta(minutes=entry.duration_minutes)
+        if _patient_is_busy(entry.patient_id, start, booked_end):
+            continue
+
+        # Claim the entry; another worker filling a different slot may have taken it
+        claimed = db.session.execute(
+            update(WaitlistEntry).where(WaitlistEntry.id == entry.id, WaitlistEntry.status == 'waiting')
+            .values(status='booked'),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        if not claimed:
+            continue
+
+        appointment = Appointment(
+            patient_id=entry.patient_id, provider_id=provider_id,
+            appointment_type_id=entry.appointment_type_id or appointment_type_id,
+            start_time=start, end_time=booked_end, status='scheduled'
+        )
+        db.session.add(appointment)
+        enqueue_reminders(appointment)
+        db.session.add(OutboxMessage(kind='waitlist_offer', appointment=appointment, due_at=now))
+        try:
+            db.session.flush()
+            db.session.execute(
+                update(WaitlistEntry).where(WaitlistEntry.id == entry.id).values(appointment_id=appointment.id),
+                execution_options={"synchronize_session": False}
+            )
+            db.session.commit()
+        except IntegrityError as err:
+            db.session.rollback()
+            if not Appointment.is_overlap_error(err):
+                raise
+            # Someone booked the slot in the meantime
+            return None
+        return appointment
+
+    db.session.rollback()
+    return None
+
+def fill_cancelled(cancelled):
+    """
+        Offer each cancelled (provider_id, appointment_type_id, start, end)
+        interval to the waitlist. The cancellation has already committed, so
+        a slot that cannot be filled is logged and skipped rather than
+        failing the request.
+    """
+    filled = []
+    for interval in sorted(cancelled, key=lambda c: c[2]):
+        try:
+            appointment = fill_slot(*interval)
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.exception("Filling the cancelled slot %s from the waitlist failed", interval)
+            continue
+        if appointment is not None:
+            filled.append(appointment)
+    return filled
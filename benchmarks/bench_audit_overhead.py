@@ -0,0 +1,84 @@
+"""
+    Read-path cost of PHI access auditing: GET /medical-records/<id> with
+    auditing switched off, with the buffered audit log, and with a
+    synchronous INSERT per read for comparison.
+
+    Runs against a temporary SQLite file so the background flusher has its
+    own connection, as it would on a real database.
+
+    Usage: python benchmarks/bench_audit_overhead.py [requests] [rounds]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.audit import PhiAccessLog
+from app.services.audit import audit_log
+from bench_record_search import seed
+
+
+def run(client, headers, requests):
+    started = time.perf_counter()
+    for n in range(requests):
+        client.get(f"/medical-records/{n % 1000 + 1}", headers=headers)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def synchronous(action, resource_type, resource_id=None, patient_id=None):
+    db.session.execute(PhiAccessLog.__table__.insert(), {
+        "occurred_at": datetime.utcnow(), "action": action,
+        "resource_type": resource_type, "resource_id": resource_id, "patient_id": patient_id,
+    })
+    db.session.commit()
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    database = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{database}"
+        AUDIT_BACKGROUND_FLUSH = True
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(1000)
+        token = client.post("/auth/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    buffered = audit_log.record
+    modes = {
+        "no auditing": lambda *args, **kwargs: None,
+        "buffered audit log": buffered,
+        "INSERT per read": synchronous,
+    }
+    timings = {name: [] for name in modes}
+    run(client, headers, requests // 10)  # warm up
+    for _ in range(rounds):
+        for name, record in modes.items():
+            audit_log.record = record
+            timings[name].append(run(client, headers, requests))
+    audit_log.record = buffered
+    audit_log.close()
+
+    baseline = statistics.median(timings["no auditing"])
+    for name, values in timings.items():
+        median = statistics.median(values)
+        print(f"{name}: {median:.0f} us per read ({(median / baseline - 1) * 100:+.1f}%)")
+    with app.app_context():
+        print(f"{PhiAccessLog.query.count()} audit rows written")
@@ -0,0 +1,83 @@
+"""
+    Latency of a week-long /appointments/availability search across many
+    providers, each with a realistic number of booked appointments.
+
+    Usage: python benchmarks/bench_availability.py [providers] [appointments_per_day] [runs]
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.appointment import Appointment
+from app.models.provider import Provider
+from app.models.user import User
+
+WEEK_START = datetime(2024, 3, 4)  # a Monday
+
+
+def seed(providers, per_day):
+    db.session.add_all([
+        Provider(first_name="Provider", last_name=str(n), cadre="Clinical Officer", national_id=f"P{n:07d}")
+        for n in range(providers)
+    ])
+    db.session.flush()
+    provider_ids = [provider_id for (provider_id,) in db.session.query(Provider.id)]
+
+    rows = []
+    for provider_id in provider_ids:
+        for day in range(5):
+            opening = WEEK_START + timedelta(days=day, hours=8)
+            for n in range(per_day):
+                start = opening + timedelta(minutes=30 * n)
+                rows.append({
+                    "patient_id": 1, "provider_id": provider_id, "appointment_type_id": 1,
+                    "start_time": start, "end_time": start + timedelta(minutes=20), "status": "scheduled",
+                    "effective_start": start, "effective_end": start + timedelta(minutes=20),
+                })
+    db.session.execute(Appointment.__table__.insert(), rows)
+
+    user = User(username="bench", role="admin")
+    user.set_password("bench")
+    db.session.add(user)
+    db.session.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    providers = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        appointments = seed(providers, per_day)
+
+        token = client.post("/auth/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        url = (f"/appointments/availability?from={WEEK_START.isoformat()}"
+               f"&to={(WEEK_START + timedelta(days=7)).isoformat()}&slot_minutes=30&cadre=Clinical%20Officer")
+
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+        slots = sum(len(p["slots"]) for p in response.get_json()["providers"])
+
+    print(f"{providers} providers, {appointments} appointments, {slots} free slots returned")
+    print(f"median {statistics.median(timings):.1f} ms, max {max(timings):.1f} ms over {runs} runs")
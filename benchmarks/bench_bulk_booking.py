@@ -0,0 +1,78 @@
+"""
+    Appointments booked per second through POST /appointments (one call per
+    booking) versus a single POST /appointments/bulk call.
+
+    Usage: python benchmarks/bench_bulk_booking.py [appointments] [providers]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.appointment import AppointmentType
+from app.models.user import User
+
+CAMPAIGN_DAY = datetime(2024, 5, 6, 8)
+
+
+def payload(appointments, providers):
+    items = []
+    for n in range(appointments):
+        start = CAMPAIGN_DAY + timedelta(minutes=10 * (n // providers))
+        items.append({
+            "patient_id": n + 1,
+            "provider_id": n % providers + 1,
+            "appointment_type_id": 1,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(minutes=10)).isoformat(),
+        })
+    return items
+
+
+def fresh_client(db_path):
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username="bench", role="admin")
+        user.set_password("bench")
+        db.session.add(user)
+        db.session.add(AppointmentType(id=1, name="Vaccination"))
+        db.session.commit()
+    client = app.test_client()
+    token = client.post("/auth/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+    return client, {"Authorization": f"Bearer {token}"}
+
+
+if __name__ == "__main__":
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    providers = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    items = payload(appointments, providers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client, headers = fresh_client(os.path.join(tmp, "single.db"))
+        started = time.perf_counter()
+        for item in items:
+            assert client.post("/appointments", json=item, headers=headers).status_code == 201
+        single = time.perf_counter() - started
+
+        client, headers = fresh_client(os.path.join(tmp, "bulk.db"))
+        started = time.perf_counter()
+        response = client.post("/appointments/bulk", json=items, headers=headers)
+        bulk = time.perf_counter() - started
+        assert response.get_json()["created"] == appointments
+
+    print(f"{appointments} appointments across {providers} providers (SQLite file)")
+    print(f"single: {single:7.2f} s  {appointments / single:9.1f} appointments/s")
+    print(f"bulk:   {bulk:7.2f} s  {appointments / bulk:9.1f} appointments/s  ({single / bulk:.1f}x)")
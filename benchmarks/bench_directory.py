@@ -0,0 +1,48 @@
+"""
+    Payload size and latency of a patient directory page (GET /patients)
+    with every field against a sparse fieldset, and of a deep keyset page
+    against the first one.
+
+    Usage: python benchmarks/bench_directory.py [patients] [runs]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+
+from bench_person_search import seed, timed
+
+
+if __name__ == "__main__":
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(patients)
+
+        token = client.post("/auth/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for query in ["limit=200", "limit=200&fields=id,first_name,last_name,patient_number",
+                      "limit=200&sort=last_name", "limit=200&sort=last_name&fields=id,last_name"]:
+            summary, response = timed(lambda: client.get(f"/patients?{query}", headers=headers), runs)
+            print(f"{query}: {len(response.data) / 1024:.0f} KiB, {summary}")
+
+            cursor = response.headers["X-Next-Cursor"]
+            for _ in range(patients // 400):
+                cursor = client.get(f"/patients?{query}&cursor={cursor}", headers=headers).headers["X-Next-Cursor"]
+            summary, response = timed(lambda: client.get(f"/patients?{query}&cursor={cursor}", headers=headers), runs)
+            print(f"  halfway through: {summary}")
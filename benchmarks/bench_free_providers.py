@@ -0,0 +1,83 @@
+"""
+    "Who is free at 10:00" across many providers: an interval-overlap SQL
+    query per question versus one read of the per-day occupancy bitmaps and
+    an AND per provider.
+
+    Usage: python benchmarks/bench_free_providers.py [providers] [appointments_per_day] [runs]
+"""
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import and_, exists, select
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.appointment import Appointment
+from app.models.provider import Provider
+from app.services import occupancy
+
+from bench_availability import WEEK_START, seed
+
+
+def interval_sql(provider_ids, start, end):
+    appointments = Appointment.__table__.c
+    busy = exists().where(and_(
+        appointments.provider_id == Provider.id,
+        appointments.status.in_(Appointment.ACTIVE_STATUSES),
+        appointments.effective_start < end,
+        appointments.effective_end > start
+    ))
+    return list(db.session.scalars(select(Provider.id).where(Provider.id.in_(provider_ids), ~busy)))
+
+
+def bitmaps(provider_ids, start, end):
+    mask = occupancy.slot_mask(start, end)
+    working = dict.fromkeys(provider_ids, occupancy.FULL_DAY)
+    return occupancy.free_providers(occupancy.day_bitmaps(provider_ids, start.date()), working, mask)
+
+
+def median_ms(function, runs, *args):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = function(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+if __name__ == "__main__":
+    providers = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        appointments = seed(providers, per_day)
+        occupancy.rebuild()
+        provider_ids = [provider_id for (provider_id,) in db.session.query(Provider.id)]
+
+        results = {}
+        for hour in (9, 10, 14):
+            start = WEEK_START + timedelta(days=2, hours=hour)
+            end = start + timedelta(minutes=15)
+            sql_ms, sql_free = median_ms(interval_sql, runs, provider_ids, start, end)
+            bitmap_ms, bitmap_free = median_ms(bitmaps, runs, provider_ids, start, end)
+            assert sorted(sql_free) == sorted(bitmap_free)
+            results[f"{hour:02d}:00"] = (sql_ms, bitmap_ms, len(bitmap_free))
+
+    print(f"{providers} providers, {appointments} appointments")
+    for at, (sql_ms, bitmap_ms, free) in results.items():
+        print(f"{at}  interval SQL {sql_ms:6.2f} ms   bitmaps {bitmap_ms:6.2f} ms  ({sql_ms / bitmap_ms:.1f}x)  {free} free")
@@ -0,0 +1,63 @@
+"""
+    Throughput and peak Python memory of `import_rows` streaming patients
+    from a CSV file, at growing file sizes. The peak should stay flat.
+
+    Usage: python benchmarks/bench_import.py [rows ...]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.services.importer import import_rows, read_rows
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as target:
+        writer = csv.writer(target)
+        writer.writerow(["first_name", "last_name", "national_id", "phone", "email", "date_of_birth"])
+        for n in range(rows):
+            # every 50th row repeats an earlier national id
+            national_id = 30000000 + (n - 1 if n % 50 == 49 else n)
+            writer.writerow([f"First{n}", f"Last{n}", national_id, f"07{n:08d}", f"p{n}@mail.com", "1990-01-01"])
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    directory = tempfile.mkdtemp()
+
+    def run(path, traced):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            with open(path, newline="") as source:
+                if traced:
+                    tracemalloc.start()
+                started = time.perf_counter()
+                counts = import_rows("patients", read_rows(source, "csv"), 1000, lambda line, errors: None)
+                elapsed = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if traced else None
+                tracemalloc.stop()
+        return counts, elapsed, peak
+
+    for rows in sizes:
+        path = os.path.join(directory, f"patients-{rows}.csv")
+        write_csv(path, rows)
+        counts, elapsed, _ = run(path, traced=False)
+        _, _, peak = run(path, traced=True)  # tracing slows the run, so it is timed separately
+        os.remove(path)
+        print(f"{rows} rows: inserted {counts['inserted']}, duplicates {counts['duplicates']} "
+              f"in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s), peak {peak:.1f} MiB")
@@ -0,0 +1,67 @@
+"""
+    /auth/login latency (p50/p99) at several concurrency levels, using the
+    production password hash parameters from Config.
+
+    Usage: python benchmarks/bench_login.py [logins_per_level] [levels...]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import Config, TestingConfig, app_config
+from app.extensions import db
+from app.models.user import User
+
+
+def build_app(db_path):
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        PASSWORD_HASH_METHOD = Config.PASSWORD_HASH_METHOD
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username="bench", role="admin")
+        user.set_password("bench")
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def login_once(app):
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.post("/auth/login", json={"username": "bench", "password": "bench"})
+    elapsed = time.perf_counter() - started
+    return elapsed, response.status_code
+
+
+def run_level(app, concurrency, logins):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: login_once(app), range(logins)))
+    latencies = sorted(elapsed * 1000 for elapsed, status in results if status == 200)
+    failures = sum(1 for _, status in results if status != 200)
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return cuts[49], cuts[98], failures
+
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    levels = [int(level) for level in sys.argv[2:]] or [1, 4, 16, 32]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"))
+        print(f"method={app.config['PASSWORD_HASH_METHOD']} workers={app.config['PASSWORD_HASH_WORKERS']}")
+        print(f"{'concurrency':>11} {'p50 ms':>9} {'p99 ms':>9} {'non-200':>8}")
+        for concurrency in levels:
+            p50, p99, failures = run_level(app, concurrency, logins)
+            print(f"{concurrency:>11} {p50:>9.1f} {p99:>9.1f} {failures:>8}")
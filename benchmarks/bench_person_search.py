@@ -0,0 +1,92 @@
+"""
+    Latency of the registration desk's patient search (GET /patients?search=)
+    for a typo'd name and an identifier prefix, against the ILIKE scan over
+    names, national id and patient number it replaced.
+
+    Usage: python benchmarks/bench_person_search.py [patients] [runs]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import or_
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.patient import Patient
+from app.models.person import Person
+from app.models.user import User
+
+FIRST_NAMES = ["Wanjiku", "Achieng", "Kamau", "Otieno", "Njeri", "Mwangi", "Akinyi", "Kiprop", "Chebet", "Omondi",
+               "Wambui", "Mutua", "Nyambura", "Kibet", "Atieno", "Waweru", "Jepkosgei", "Musyoka", "Adhiambo", "Kariuki"]
+LAST_NAMES = ["Kamau", "Odhiambo", "Mwangi", "Ochieng", "Njoroge", "Wafula", "Kipchoge", "Mutiso", "Owino", "Gitau",
+              "Barasa", "Cheruiyot", "Nyaga", "Onyango", "Kimani", "Wekesa", "Rotich", "Muthoni", "Oduya", "Langat"]
+
+
+def seed(patients):
+    rng = random.Random(3)
+    people = [{
+        "id": n, "type": "patient", "first_name": rng.choice(FIRST_NAMES) + rng.choice(["", "h", "a"]),
+        "last_name": rng.choice(LAST_NAMES), "national_id": f"{20000000 + n}",
+    } for n in range(1, patients + 1)]
+    db.session.execute(Person.__table__.insert(), people)
+    db.session.execute(Patient.__table__.insert(), [
+        {"id": n, "patient_id": f"bench-{n}", "patient_number": f"PAT-{n:06d}"} for n in range(1, patients + 1)
+    ])
+
+    user = User(username="bench", role="admin")
+    user.set_password("bench")
+    db.session.add(user)
+    db.session.commit()
+
+
+def timed(call, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return f"median {statistics.median(timings):.1f} ms, max {max(timings):.1f} ms", result
+
+
+def ilike_scan(term):
+    pattern = f"%{term}%"
+    return Patient.query.filter(or_(
+        Person.first_name.ilike(pattern), Person.last_name.ilike(pattern),
+        Person.national_id.ilike(pattern), Patient.patient_number.ilike(pattern)
+    )).all()
+
+
+if __name__ == "__main__":
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(patients)
+
+        token = client.post("/auth/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        started = time.perf_counter()
+        client.get("/patients?search=warmup", headers=headers)
+        print(f"{patients} patients; name index built in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        for term in ["wanjku kamau", "PAT-0123", "2001234"]:
+            summary, response = timed(lambda: client.get(f"/patients?search={term}&limit=20", headers=headers), runs)
+            print(f"search={term!r}: {len(response.get_json())} ranked results, {summary}")
+            summary, rows = timed(lambda: ilike_scan(term), runs)
+            print(f"  ILIKE scan: {len(rows)} rows, {summary}")
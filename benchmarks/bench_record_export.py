@@ -0,0 +1,60 @@
+"""
+    Peak Python memory and time of a streamed NDJSON export of medical
+    records, against dumping `query.all()` with MedicalRecordSchema, at
+    growing export sizes. The streamed peak should stay flat.
+
+    Usage: python benchmarks/bench_record_export.py [records ...]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.record import MedicalRecord
+from app.schemas.medical_record import MedicalRecordSchema
+from app.services.record_export import export_rows, serialize
+from bench_record_search import seed
+
+
+def measure(run):
+    db.session.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = run()
+    elapsed = (time.perf_counter() - started) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak / 2 ** 20
+
+
+def streamed():
+    return sum(len(chunk) for chunk in serialize(export_rows(1000), "ndjson"))
+
+
+def dumped():
+    return len(json.dumps(MedicalRecordSchema(many=True).dump(MedicalRecord.query.all())))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 40000]
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+
+    for records in sizes:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed(records)
+            for name, run in (("streamed NDJSON", streamed), ("dump(query.all())", dumped)):
+                size, elapsed, peak = measure(run)
+                print(f"{records} records, {name}: {size / 2 ** 20:.1f} MiB out, {elapsed:.0f} ms, peak {peak:.1f} MiB")
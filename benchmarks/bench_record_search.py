@@ -0,0 +1,78 @@
+"""
+    Latency of a ranked /medical-records?q= search against the ILIKE scan it
+    replaces, over a synthetic corpus of medical records.
+
+    Usage: python benchmarks/bench_record_search.py [records] [runs]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.record import MedicalRecord
+from app.models.user import User
+
+DIAGNOSES = ["Malaria", "Typhoid", "Hypertension", "Diabetes mellitus", "Pneumonia", "Asthma",
+             "Urinary tract infection", "Gastroenteritis", "Anaemia", "Tuberculosis"]
+WORDS = ("fever cough headache review fluids rest follow up referred stable improving pain dose "
+         "oral daily weekly lab results pending counselled adherence blood pressure sugar").split()
+
+
+def seed(records):
+    rng = random.Random(7)
+    rows = [{
+        "appointment_id": n, "patient_id": n % 5000 + 1, "provider_id": n % 50 + 1,
+        "diagnosis": rng.choice(DIAGNOSES),
+        "treatment": " ".join(rng.choices(WORDS, k=6)),
+        "notes": " ".join(rng.choices(WORDS, k=30)),
+    } for n in range(1, records + 1)]
+    db.session.execute(MedicalRecord.__table__.insert(), rows)
+
+    user = User(username="bench", role="admin")
+    user.set_password("bench")
+    db.session.add(user)
+    db.session.commit()
+
+
+def time_requests(client, url, headers, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, response
+
+
+if __name__ == "__main__":
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(records)
+
+        token = client.post("/auth/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        ranked, response = time_requests(client, "/medical-records?q=typhoid%20fever&limit=20", headers, runs)
+        hits = len(response.get_json())
+        scan, response = time_requests(client, "/medical-records?diagnosis=typhoid", headers, runs)
+
+    print(f"{records} records")
+    print(f"q=typhoid fever (ranked, {hits} per page): median {statistics.median(ranked):.1f} ms, max {max(ranked):.1f} ms")
+    print(f"diagnosis=typhoid (ILIKE, {len(response.get_json())} rows): median {statistics.median(scan):.1f} ms, "
+          f"max {max(scan):.1f} ms")
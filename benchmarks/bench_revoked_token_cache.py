@@ -0,0 +1,62 @@
+"""
+    Requests per second on an authenticated endpoint with the revoked-token
+    cache on and off.
+
+    Usage: python benchmarks/bench_revoked_token_cache.py [requests] [revoked_rows]
+"""
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+
+
+def run(cache_enabled, requests, revoked_rows):
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+        REVOKED_TOKEN_CACHE_ENABLED = cache_enabled
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+    client = app.test_client()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username="bench", role="admin")
+        user.set_password("bench")
+        db.session.add(user)
+        db.session.bulk_save_objects([
+            RevokedToken(jti=str(uuid.uuid4()), token_type="access")
+            for _ in range(revoked_rows)
+        ])
+        db.session.commit()
+
+        token = client.post("/auth/login", json={"username": "bench", "password": "bench"}).get_json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        client.get("/appointments", headers=headers)  # warm up
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get("/appointments", headers=headers)
+        elapsed = time.perf_counter() - started
+
+    return requests / elapsed
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    revoked_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+
+    off = run(False, requests, revoked_rows)
+    on = run(True, requests, revoked_rows)
+    print(f"{requests} requests, {revoked_rows} revoked tokens")
+    print(f"cache off: {off:8.1f} req/s")
+    print(f"cache on:  {on:8.1f} req/s  ({on / off:.2f}x)")
@@ -0,0 +1,65 @@
+"""
+    Time to pick the waitlist entry for a freed slot when a provider has
+    thousands of waiting entries, most of which do not fit it.
+
+    Usage: python benchmarks/bench_waitlist.py [entries] [runs]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models.waitlist import WaitlistEntry
+from app.services.waitlist import candidates
+
+DAY = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=14)
+
+
+def seed(entries):
+    rng = random.Random(7)
+    rows = []
+    for n in range(entries):
+        earliest = DAY + timedelta(days=rng.randrange(30), hours=rng.randrange(8, 16))
+        rows.append({
+            "patient_id": n + 1, "provider_id": 1 if n % 10 else None, "appointment_type_id": None,
+            "earliest_start": earliest, "latest_end": earliest + timedelta(hours=rng.choice((1, 2, 4))),
+            "duration_minutes": rng.choice((15, 30, 60)), "priority": rng.randrange(10),
+            "requested_at": DAY - timedelta(minutes=n), "status": "waiting",
+        })
+    db.session.execute(WaitlistEntry.__table__.insert(), rows)
+    db.session.commit()
+
+
+if __name__ == "__main__":
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    class BenchConfig(TestingConfig):
+        DEBUG = False
+
+    app_config['bench'] = BenchConfig
+    app = create_app('bench')
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(entries)
+
+        rng = random.Random(11)
+        timings, matched = [], 0
+        for _ in range(runs):
+            start = DAY + timedelta(days=rng.randrange(30), hours=rng.randrange(8, 16), minutes=rng.choice((0, 30)))
+            started = time.perf_counter()
+            best = next(candidates(1, 1, start, start + timedelta(minutes=30)), None)
+            timings.append((time.perf_counter() - started) * 1000)
+            matched += best is not None
+
+    print(f"{entries} waiting entries, {matched}/{runs} freed slots matched")
+    print(f"median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms")
@@ -90,9 +90,22 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # the full-text search column, FTS5 tables and SQLite patient number
+    # counter are maintained by raw DDL (see app.models.record and
+    # app.models.patient), so autogenerate must not try to drop them
+    def include_object(object, name, type_, reflected, compare_to):
+        if reflected and compare_to is None:
+            if type_ in ('column', 'index') and name in ('search_vector', 'ix_medical_records_search_vector'):
+                return False
+            if type_ == 'table' and (name.startswith('medical_records_fts') or name == 'patient_number_blocks'):
+                return False
+        return True
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
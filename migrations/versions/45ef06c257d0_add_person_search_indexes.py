@@ -0,0 +1,43 @@
+"""add person search indexes
+
+Revision ID: 45ef06c257d0
+Revises: 9cbbfc62e776
+Create Date: 2026-10-18 18:02:51.604113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '45ef06c257d0'
+down_revision = '9cbbfc62e776'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite searches names in process and prefix-matches on the existing unique indexes
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.batch_alter_table('persons', schema=None) as batch_op:
+        batch_op.create_index('ix_persons_full_name_trgm', [sa.text("(first_name || ' ' || last_name) gin_trgm_ops")],
+                              unique=False, postgresql_using='gin')
+        batch_op.create_index('ix_persons_national_id_prefix', ['national_id'], unique=False,
+                              postgresql_ops={'national_id': 'varchar_pattern_ops'})
+
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.create_index('ix_patients_patient_number_prefix', ['patient_number'], unique=False,
+                              postgresql_ops={'patient_number': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.drop_index('ix_patients_patient_number_prefix')
+
+    with op.batch_alter_table('persons', schema=None) as batch_op:
+        batch_op.drop_index('ix_persons_national_id_prefix')
+        batch_op.drop_index('ix_persons_full_name_trgm')
@@ -0,0 +1,84 @@
+"""appointment overlap constraint
+
+Revision ID: 4c59778a39b8
+Revises: 117d779d4ef7
+Create Date: 2026-10-18 10:41:17.205664
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c59778a39b8'
+down_revision = '117d779d4ef7'
+branch_labels = None
+depends_on = None
+
+NO_OVERLAP_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER appointments_no_overlap_insert
+    BEFORE INSERT ON appointments
+    WHEN NEW.status = 'scheduled'
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.provider_id = NEW.provider_id
+              AND a.status = 'scheduled'
+              AND a.start_time < NEW.end_time
+              AND a.end_time > NEW.start_time
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER appointments_no_overlap_update
+    BEFORE UPDATE OF provider_id, status, start_time, end_time ON appointments
+    WHEN NEW.status = 'scheduled'
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.id != NEW.id
+              AND a.provider_id = NEW.provider_id
+              AND a.status = 'scheduled'
+              AND a.start_time < NEW.end_time
+              AND a.end_time > NEW.start_time
+        );
+    END
+    """,
+]
+
+NO_OVERLAP_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (provider_id WITH =, tsrange(start_time, end_time) WITH &&)
+    WHERE (status = 'scheduled')
+    """,
+]
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('ix_appointments_provider_status_start_end', ['provider_id', 'status', 'start_time', 'end_time'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in NO_OVERLAP_POSTGRES:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in NO_OVERLAP_SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS appointments_no_overlap_insert")
+        op.execute("DROP TRIGGER IF EXISTS appointments_no_overlap_update")
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_provider_status_start_end')
@@ -0,0 +1,93 @@
+"""medical record full-text search
+
+Revision ID: 9cbbfc62e776
+Revises: 0ba9920b808a
+Create Date: 2026-10-18 17:12:40.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9cbbfc62e776'
+down_revision = '0ba9920b808a'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_POSTGRES = [
+    "ALTER TABLE medical_records ADD COLUMN search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION medical_records_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.diagnosis, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.treatment, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.notes, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER medical_records_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF diagnosis, treatment, notes ON medical_records
+    FOR EACH ROW EXECUTE FUNCTION medical_records_search_vector_update()
+    """,
+    "CREATE INDEX ix_medical_records_search_vector ON medical_records USING gin (search_vector)",
+]
+
+SEARCH_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS medical_records_fts USING fts5(
+        diagnosis, treatment, notes, content='medical_records', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_records_fts_insert AFTER INSERT ON medical_records BEGIN
+        INSERT INTO medical_records_fts (rowid, diagnosis, treatment, notes)
+        VALUES (NEW.id, NEW.diagnosis, NEW.treatment, NEW.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_records_fts_delete AFTER DELETE ON medical_records BEGIN
+        INSERT INTO medical_records_fts (medical_records_fts, rowid, diagnosis, treatment, notes)
+        VALUES ('delete', OLD.id, OLD.diagnosis, OLD.treatment, OLD.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS medical_records_fts_update AFTER UPDATE OF diagnosis, treatment, notes ON medical_records BEGIN
+        INSERT INTO medical_records_fts (medical_records_fts, rowid, diagnosis, treatment, notes)
+        VALUES ('delete', OLD.id, OLD.diagnosis, OLD.treatment, OLD.notes);
+        INSERT INTO medical_records_fts (rowid, diagnosis, treatment, notes)
+        VALUES (NEW.id, NEW.diagnosis, NEW.treatment, NEW.notes);
+    END
+    """,
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in SEARCH_POSTGRES:
+            op.execute(statement)
+        # Fire the trigger once for existing rows
+        op.execute("UPDATE medical_records SET diagnosis = diagnosis")
+    elif dialect == 'sqlite':
+        for statement in SEARCH_SQLITE:
+            op.execute(statement)
+        op.execute("INSERT INTO medical_records_fts (medical_records_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_medical_records_search_vector")
+        op.execute("DROP TRIGGER IF EXISTS medical_records_search_vector_trigger ON medical_records")
+        op.execute("DROP FUNCTION IF EXISTS medical_records_search_vector_update()")
+        with op.batch_alter_table('medical_records', schema=None) as batch_op:
+            batch_op.drop_column('search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('medical_records_fts_insert', 'medical_records_fts_delete', 'medical_records_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS medical_records_fts")
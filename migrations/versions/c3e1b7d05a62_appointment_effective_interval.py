@@ -0,0 +1,163 @@
+"""appointment effective interval
+
+Revision ID: c3e1b7d05a62
+Revises: 1995105093c4
+Create Date: 2026-10-18 12:48:10.552937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e1b7d05a62'
+down_revision = '1995105093c4'
+branch_labels = None
+depends_on = None
+
+NO_OVERLAP_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER appointments_no_overlap_insert
+    BEFORE INSERT ON appointments
+    WHEN NEW.status IN ('scheduled', 'rescheduled')
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.provider_id = NEW.provider_id
+              AND a.status IN ('scheduled', 'rescheduled')
+              AND a.effective_start < NEW.effective_end
+              AND a.effective_end > NEW.effective_start
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER appointments_no_overlap_update
+    BEFORE UPDATE OF provider_id, status, effective_start, effective_end ON appointments
+    WHEN NEW.status IN ('scheduled', 'rescheduled')
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.id != NEW.id
+              AND a.provider_id = NEW.provider_id
+              AND a.status IN ('scheduled', 'rescheduled')
+              AND a.effective_start < NEW.effective_end
+              AND a.effective_end > NEW.effective_start
+        );
+    END
+    """,
+]
+
+NO_OVERLAP_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+    EXCLUDE USING gist (provider_id WITH =, tsrange(effective_start, effective_end) WITH &&)
+    WHERE (status IN ('scheduled', 'rescheduled'))
+    """,
+]
+
+PREVIOUS_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER appointments_no_overlap_insert
+    BEFORE INSERT ON appointments
+    WHEN NEW.status = 'scheduled'
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.provider_id = NEW.provider_id
+              AND a.status = 'scheduled'
+              AND a.start_time < NEW.end_time
+              AND a.end_time > NEW.start_time
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER appointments_no_overlap_update
+    BEFORE UPDATE OF provider_id, status, start_time, end_time ON appointments
+    WHEN NEW.status = 'scheduled'
+    BEGIN
+        SELECT RAISE(ABORT, 'appointments_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM appointments a
+            WHERE a.id != NEW.id
+              AND a.provider_id = NEW.provider_id
+              AND a.status = 'scheduled'
+              AND a.start_time < NEW.end_time
+              AND a.end_time > NEW.start_time
+        );
+    END
+    """,
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS appointments_no_overlap_insert")
+        op.execute("DROP TRIGGER IF EXISTS appointments_no_overlap_update")
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('effective_start', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('effective_end', sa.DateTime(), nullable=True))
+
+    op.execute(
+        "UPDATE appointments SET "
+        "effective_start = COALESCE(rescheduled_start_time, start_time), "
+        "effective_end = COALESCE(rescheduled_end_time, end_time)"
+    )
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.alter_column('effective_start', existing_type=sa.DateTime(), nullable=False)
+        batch_op.alter_column('effective_end', existing_type=sa.DateTime(), nullable=False)
+        batch_op.drop_index('ix_appointments_provider_status_start_end')
+        batch_op.drop_index('ix_appointments_start_id')
+        batch_op.drop_index('ix_appointments_provider_start_id')
+        batch_op.drop_index('ix_appointments_patient_start_id')
+        batch_op.create_index('ix_appointments_provider_status_effective', ['provider_id', 'status', 'effective_start', 'effective_end'], unique=False)
+        batch_op.create_index('ix_appointments_effective_id', ['effective_start', 'id'], unique=False)
+        batch_op.create_index('ix_appointments_provider_effective_id', ['provider_id', 'effective_start', 'id'], unique=False)
+        batch_op.create_index('ix_appointments_patient_effective_id', ['patient_id', 'effective_start', 'id'], unique=False)
+
+    # Rows that already overlap once rescheduled times count will make this fail; resolve them first
+    if dialect == 'postgresql':
+        for statement in NO_OVERLAP_POSTGRES:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in NO_OVERLAP_SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS appointments_no_overlap_insert")
+        op.execute("DROP TRIGGER IF EXISTS appointments_no_overlap_update")
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_patient_effective_id')
+        batch_op.drop_index('ix_appointments_provider_effective_id')
+        batch_op.drop_index('ix_appointments_effective_id')
+        batch_op.drop_index('ix_appointments_provider_status_effective')
+        batch_op.create_index('ix_appointments_provider_status_start_end', ['provider_id', 'status', 'start_time', 'end_time'], unique=False)
+        batch_op.create_index('ix_appointments_start_id', ['start_time', 'id'], unique=False)
+        batch_op.create_index('ix_appointments_provider_start_id', ['provider_id', 'start_time', 'id'], unique=False)
+        batch_op.create_index('ix_appointments_patient_start_id', ['patient_id', 'start_time', 'id'], unique=False)
+        batch_op.drop_column('effective_end')
+        batch_op.drop_column('effective_start')
+
+    if dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap "
+            "EXCLUDE USING gist (provider_id WITH =, tsrange(start_time, end_time) WITH &&) "
+            "WHERE (status = 'scheduled')"
+        )
+    elif dialect == 'sqlite':
+        for statement in PREVIOUS_SQLITE_TRIGGERS:
+            op.execute(statement)
@@ -0,0 +1,40 @@
+"""add patient number allocation
+
+Revision ID: e9a41e6856cc
+Revises: d6513706eae3
+Create Date: 2026-10-18 19:21:37.845102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9a41e6856cc'
+down_revision = 'd6513706eae3'
+branch_labels = None
+depends_on = None
+
+PATIENT_NUMBER_BLOCK_SIZE = 50
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Continue after the highest number handed out by the old read-max-plus-one scheme
+    highest = bind.execute(sa.text(
+        "SELECT max(CAST(substr(patient_number, 5) AS INTEGER)) FROM patients WHERE patient_number LIKE 'PAT-%'"
+    )).scalar() or 0
+    if bind.dialect.name == 'postgresql':
+        op.execute(sa.schema.CreateSequence(sa.Sequence(
+            'patient_number_seq', start=highest + 1, increment=PATIENT_NUMBER_BLOCK_SIZE, minvalue=1
+        )))
+    else:
+        op.execute("CREATE TABLE patient_number_blocks (next_value INTEGER NOT NULL)")
+        op.execute(f"INSERT INTO patient_number_blocks (next_value) VALUES ({highest + 1})")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.schema.DropSequence(sa.Sequence('patient_number_seq')))
+    else:
+        op.execute("DROP TABLE patient_number_blocks")
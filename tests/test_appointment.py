@@ -3,8 +3,10 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app import create_app
-from app.models import User, Person, Provider, Patient
+from app.models import User, Person, Provider, Patient, Appointment, AppointmentType
 from app.extensions import db
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 
 class AppointmentTestCase(unittest.TestCase):
     def setUp(self):
@@ -23,6 +25,7 @@ class AppointmentTestCase(unittest.TestCase):
             )
             provider.set_password("providerpass")
             db.session.add(provider)
+            db.session.add(AppointmentType(id=1, name="Consultation"))
             db.session.commit()
 
     def test_create_appointment_with_auth(self):
@@ -178,3 +181,434 @@ class AppointmentTestCase(unittest.TestCase):
             self.assertEqual(data["status"], "rescheduled")
             self.assertEqual(data["rescheduled_start_time"], "2023-10-01T12:00:00")
             self.assertEqual(data["rescheduled_end_time"], "2023-10-01T13:00:00")
+
+    def test_database_rejects_overlapping_appointments(self):
+        with self.app.app_context():
+            db.session.add(Appointment(patient_id=2, provider_id=1, appointment_type_id=1,
+                                       start_time=datetime(2023, 10, 1, 10), end_time=datetime(2023, 10, 1, 11)))
+            db.session.commit()
+
+            # Back-to-back slots are fine
+            db.session.add(Appointment(patient_id=2, provider_id=1, appointment_type_id=1,
+                                       start_time=datetime(2023, 10, 1, 11), end_time=datetime(2023, 10, 1, 12)))
+            db.session.commit()
+
+            # Bypassing the route's check still cannot double-book the provider
+            db.session.add(Appointment(patient_id=3, provider_id=1, appointment_type_id=1,
+                                       start_time=datetime(2023, 10, 1, 10, 30), end_time=datetime(2023, 10, 1, 10, 45)))
+            with self.assertRaises(IntegrityError) as ctx:
+                db.session.commit()
+            db.session.rollback()
+            self.assertTrue(Appointment.is_overlap_error(ctx.exception))
+
+    def test_search_availability(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            # 2023-10-02 is a Monday, inside the default working hours
+            response = self.client.post("/appointments", json={
+                "patient_id": 2,
+                "provider_id": 1,
+                "start_time": "2023-10-02T10:00:00",
+                "end_time": "2023-10-02T11:00:00",
+                "appointment_type_id": 1,
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 201)
+
+            response = self.client.get(
+                "/appointments/availability?from=2023-10-02T07:00:00&to=2023-10-02T12:00:00"
+                "&slot_minutes=60&provider_id=1",
+                headers=self.auth_header
+            )
+            self.assertEqual(response.status_code, 200)
+            slots = response.get_json()["providers"][0]["slots"]
+            self.assertEqual(slots, [
+                "2023-10-02T08:00:00", "2023-10-02T09:00:00", "2023-10-02T11:00:00"
+            ])
+
+    def test_only_the_provider_or_an_admin_sets_working_hours(self):
+        with self.app.app_context():
+            db.session.add(Provider(id=1, first_name="John", last_name="Kamau", cadre="Doctor"))
+            patient = User(username="amina", role="patient", person_id=2)
+            patient.set_password("patientpass")
+            db.session.add(patient)
+            db.session.commit()
+
+            shifts = [{"weekday": 0, "start_time": "06:00", "end_time": "07:00"}]
+            for username, password, expected in (("amina", "patientpass", 403), ("john", "providerpass", 200)):
+                login_resp = self.client.post("/auth/login", json={"username": username, "password": password})
+                headers = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+                response = self.client.put("/providers/1/working-hours", json=shifts, headers=headers)
+                self.assertEqual(response.status_code, expected)
+
+    def test_search_availability_requires_providers(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            response = self.client.get(
+                "/appointments/availability?from=2023-10-02T07:00:00&to=2023-10-02T12:00:00",
+                headers=self.auth_header
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_appointments(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            self.client.post("/appointments", json={
+                "patient_id": 2,
+                "provider_id": 1,
+                "start_time": "2023-10-01T09:00:00",
+                "end_time": "2023-10-01T09:30:00",
+                "appointment_type_id": 1,
+            }, headers=self.auth_header)
+
+            def item(patient_id, start, end):
+                return {"patient_id": patient_id, "provider_id": 1, "appointment_type_id": 1,
+                        "start_time": f"2023-10-01T{start}:00", "end_time": f"2023-10-01T{end}:00"}
+
+            response = self.client.post("/appointments/bulk", json=[
+                item(3, "09:30", "10:00"),
+                item(4, "09:15", "09:45"),  # clashes with the existing booking
+                item(5, "09:45", "10:15"),  # clashes with the first item
+                {"patient_id": 6},          # invalid
+                item(7, "10:00", "10:30"),
+            ], headers=self.auth_header)
+
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual(data["created"], 2)
+            self.assertEqual([r["status"] for r in data["results"]],
+                             ["created", "error", "error", "error", "created"])
+            self.assertEqual(Appointment.query.count(), 3)
+
+    def test_list_appointments_keyset_pagination(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            for hour in (12, 9, 10, 11, 13):
+                self.client.post("/appointments", json={
+                    "patient_id": 2,
+                    "provider_id": 1,
+                    "start_time": f"2023-10-01T{hour:02d}:00:00",
+                    "end_time": f"2023-10-01T{hour:02d}:30:00",
+                    "appointment_type_id": 1,
+                }, headers=self.auth_header)
+
+            starts, cursor = [], None
+            while True:
+                url = "/appointments?limit=2&from=2023-10-01T10:00:00" + (f"&cursor={cursor}" if cursor else "")
+                response = self.client.get(url, headers=self.auth_header)
+                self.assertEqual(response.status_code, 200)
+                starts += [appt["start_time"][11:16] for appt in response.get_json()]
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+
+            self.assertEqual(starts, ["10:00", "11:00", "12:00", "13:00"])
+
+            response = self.client.get("/appointments?cursor=not-a-cursor", headers=self.auth_header)
+            self.assertEqual(response.status_code, 400)
+
+    def test_rescheduled_times_block_the_new_slot(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            def book(start, end):
+                return self.client.post("/appointments", json={
+                    "patient_id": 2,
+                    "provider_id": 1,
+                    "start_time": f"2023-10-01T{start}:00",
+                    "end_time": f"2023-10-01T{end}:00",
+                    "appointment_type_id": 1,
+                }, headers=self.auth_header)
+
+            first_id = book("10:00", "11:00").get_json()["appointment_id"]
+            book("14:00", "15:00")
+
+            response = self.client.patch(f"/appointments/{first_id}/status", json={
+                "status": "rescheduled",
+                "rescheduled_start_time": "2023-10-01T14:30:00",
+                "rescheduled_end_time": "2023-10-01T15:30:00"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 409)
+
+            response = self.client.patch(f"/appointments/{first_id}/status", json={
+                "status": "rescheduled",
+                "rescheduled_start_time": "2023-10-01T12:00:00",
+                "rescheduled_end_time": "2023-10-01T13:00:00"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()["effective_start"], "2023-10-01T12:00:00")
+
+            self.assertEqual(book("12:30", "13:30").status_code, 409)
+            self.assertEqual(book("10:00", "11:00").status_code, 201)
+
+    def test_recurring_series_occurrences(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            response = self.client.post("/appointments/series", json={
+                "patient_id": 2,
+                "provider_id": 1,
+                "appointment_type_id": 1,
+                "rrule": "FREQ=WEEKLY;BYDAY=MO;COUNT=10",
+                "starts_at": "2023-10-02T09:00:00",
+                "duration_minutes": 30
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 201)
+            series_id = response.get_json()["id"]
+
+            response = self.client.get(
+                f"/appointments/series/{series_id}?from=2023-10-09T00:00:00&to=2023-10-24T00:00:00",
+                headers=self.auth_header
+            )
+            starts = [occurrence["start_time"] for occurrence in response.get_json()["occurrences"]]
+            self.assertEqual(starts, ["2023-10-09T09:00:00", "2023-10-16T09:00:00", "2023-10-23T09:00:00"])
+
+            self.client.post("/appointments", json={
+                "patient_id": 3,
+                "provider_id": 1,
+                "start_time": "2023-10-09T11:00:00",
+                "end_time": "2023-10-09T11:30:00",
+                "appointment_type_id": 1,
+            }, headers=self.auth_header)
+            response = self.client.get(
+                "/appointments?from=2023-10-09T00:00:00&to=2023-10-17T00:00:00", headers=self.auth_header
+            )
+            listed = [(appt["start_time"], appt.get("series_id")) for appt in response.get_json()]
+            self.assertEqual(listed, [
+                ("2023-10-09T09:00:00", series_id),
+                ("2023-10-09T11:00:00", None),
+                ("2023-10-16T09:00:00", series_id),
+            ])
+
+            response = self.client.post("/appointments/series", json={
+                "patient_id": 3,
+                "provider_id": 1,
+                "appointment_type_id": 1,
+                "rrule": "FREQ=DAILY;UNTIL=20231010T000000",
+                "starts_at": "2023-10-08T11:00:00",
+                "duration_minutes": 30
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.get_json()["conflicts"], ["2023-10-09T11:00:00"])
+
+            response = self.client.post("/appointments/series", json={
+                "patient_id": 2,
+                "provider_id": 1,
+                "appointment_type_id": 1,
+                "rrule": "FREQ=DAILY",
+                "starts_at": "2024-01-01T09:00:00",
+                "duration_minutes": 30
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 400)
+
+    def test_series_occurrences_block_bookings_until_cancelled(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            series_id = self.client.post("/appointments/series", json={
+                "patient_id": 2,
+                "provider_id": 1,
+                "appointment_type_id": 1,
+                "rrule": "FREQ=WEEKLY;COUNT=4",
+                "starts_at": "2023-10-02T09:00:00",
+                "duration_minutes": 60
+            }, headers=self.auth_header).get_json()["id"]
+
+            def book(start, end):
+                return self.client.post("/appointments", json={
+                    "patient_id": 3,
+                    "provider_id": 1,
+                    "start_time": f"2023-10-16T{start}:00",
+                    "end_time": f"2023-10-16T{end}:00",
+                    "appointment_type_id": 1,
+                }, headers=self.auth_header)
+
+            self.assertEqual(book("09:30", "10:30").status_code, 409)
+
+            response = self.client.patch(f"/appointments/series/{series_id}/occurrences", json={
+                "original_start": "2023-10-16T09:00:00",
+                "status": "rescheduled",
+                "rescheduled_start_time": "2023-10-16T13:00:00",
+                "rescheduled_end_time": "2023-10-16T14:00:00"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(book("09:30", "10:30").status_code, 201)
+            self.assertEqual(book("13:30", "14:30").status_code, 409)
+
+            response = self.client.patch(f"/appointments/series/{series_id}/occurrences", json={
+                "original_start": "2023-10-16T09:00:00",
+                "status": "cancelled"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(book("13:30", "14:30").status_code, 201)
+
+            response = self.client.get(
+                "/appointments/availability?provider_id=1&from=2023-10-23T08:00:00&to=2023-10-23T10:00:00&slot_minutes=60",
+                headers=self.auth_header
+            )
+            self.assertEqual(response.get_json()["providers"][0]["slots"], ["2023-10-23T08:00:00"])
+
+            # Restoring the occurrence would double-book the 09:30 appointment made meanwhile
+            response = self.client.patch(f"/appointments/series/{series_id}/occurrences", json={
+                "original_start": "2023-10-16T09:00:00",
+                "status": "scheduled"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 409)
+
+    def test_restoring_a_cancelled_appointment_checks_series_occurrences(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            appointment_id = self.client.post("/appointments", json={
+                "patient_id": 3,
+                "provider_id": 1,
+                "start_time": "2023-10-09T09:00:00",
+                "end_time": "2023-10-09T10:00:00",
+                "appointment_type_id": 1,
+            }, headers=self.auth_header).get_json()["appointment_id"]
+            response = self.client.patch(f"/appointments/{appointment_id}/status", json={"status": "cancelled"},
+                                         headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+
+            # The freed slot is taken by an occurrence of a new weekly series
+            series_id = self.client.post("/appointments/series", json={
+                "patient_id": 2,
+                "provider_id": 1,
+                "appointment_type_id": 1,
+                "rrule": "FREQ=WEEKLY;COUNT=4",
+                "starts_at": "2023-10-02T09:00:00",
+                "duration_minutes": 60
+            }, headers=self.auth_header).get_json()["id"]
+
+            response = self.client.patch(f"/appointments/{appointment_id}/status", json={"status": "scheduled"},
+                                         headers=self.auth_header)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(db.session.get(Appointment, appointment_id).status, "cancelled")
+
+            response = self.client.patch(f"/appointments/series/{series_id}/occurrences", json={
+                "original_start": "2023-10-09T09:00:00",
+                "status": "cancelled"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            response = self.client.patch(f"/appointments/{appointment_id}/status", json={"status": "scheduled"},
+                                         headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+
+    def test_patient_listing_includes_upcoming_series_occurrences(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            starts_at = (datetime.now() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+            series_id = self.client.post("/appointments/series", json={
+                "patient_id": 5,
+                "provider_id": 1,
+                "appointment_type_id": 1,
+                "rrule": "FREQ=WEEKLY;COUNT=52",
+                "starts_at": starts_at.isoformat(),
+                "duration_minutes": 30
+            }, headers=self.auth_header).get_json()["id"]
+
+            # No window given: occurrences in the next SERIES_LISTING_DEFAULT_DAYS are listed
+            response = self.client.get("/appointments/patient/5?limit=20", headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            listed = response.get_json()
+            self.assertEqual({appt["series_id"] for appt in listed}, {series_id})
+            self.assertEqual(len(listed), 13)
+            self.assertEqual(listed[0]["start_time"], starts_at.isoformat())
+
+    def test_bulk_status_transition(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "john",
+                "password": "providerpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            # A daily series at 12:00 from Sep 30th, the first occurrence of which is moved into the range
+            series_id = self.client.post("/appointments/series", json={
+                "patient_id": 3, "provider_id": 1, "appointment_type_id": 1,
+                "rrule": "FREQ=DAILY;COUNT=5", "starts_at": "2023-09-30T12:00:00", "duration_minutes": 30
+            }, headers=self.auth_header).get_json()["id"]
+            self.client.patch(f"/appointments/series/{series_id}/occurrences", json={
+                "original_start": "2023-09-30T12:00:00", "status": "rescheduled",
+                "rescheduled_start_time": "2023-10-01T16:00:00", "rescheduled_end_time": "2023-10-01T16:30:00"
+            }, headers=self.auth_header)
+
+            ids = []
+            for day, hour in ((1, 9), (1, 10), (1, 15), (2, 9)):
+                response = self.client.post("/appointments", json={
+                    "patient_id": 2,
+                    "provider_id": 1,
+                    "start_time": f"2023-10-0{day}T{hour:02d}:00:00",
+                    "end_time": f"2023-10-0{day}T{hour:02d}:30:00",
+                    "appointment_type_id": 1,
+                }, headers=self.auth_header)
+                ids.append(response.get_json()["appointment_id"])
+
+            response = self.client.patch("/appointments/status", json={
+                "provider_id": 2, "from": "2023-10-01T00:00:00", "to": "2023-10-02T00:00:00", "status": "cancelled"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 403)
+
+            response = self.client.patch("/appointments/status", json={
+                "provider_id": 1, "from": "2023-10-01T00:00:00", "to": "2023-10-02T00:00:00", "status": "cancelled"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()["appointment_ids"], ids[:3])
+
+            statuses = [Appointment.query.get(appointment_id).status for appointment_id in ids]
+            self.assertEqual(statuses, ["cancelled", "cancelled", "cancelled", "scheduled"])
+            self.assertEqual(response.get_json()["series_occurrences"], [
+                {"series_id": series_id, "original_start": "2023-10-01T12:00:00"},
+                {"series_id": series_id, "original_start": "2023-09-30T12:00:00"},
+            ])
+
+            response = self.client.get(f"/appointments/series/{series_id}", headers=self.auth_header)
+            self.assertEqual([occurrence["status"] for occurrence in response.get_json()["occurrences"]],
+                             ["cancelled", "cancelled", "scheduled", "scheduled", "scheduled"])
+
+            response = self.client.patch("/appointments/status", json={
+                "provider_id": 1, "from": "2023-10-02T00:00:00", "to": "2023-10-03T00:00:00", "status": "completed"
+            }, headers=self.auth_header)
+            self.assertEqual(response.get_json()["appointment_ids"], ids[3:])
+            self.assertEqual(response.get_json()["series_occurrences_not_updated"],
+                             [{"series_id": series_id, "original_start": "2023-10-02T12:00:00"}])
@@ -0,0 +1,127 @@
+import unittest
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sqlalchemy.exc import DatabaseError
+from app import create_app
+from app.extensions import db
+from app.models import User, MedicalRecord, PhiAccessLog
+from app.services.audit import audit_log
+
+class AuditLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            user = User(username="john", role="provider", person_id=1)
+            user.set_password("providerpass")
+            db.session.add(user)
+            db.session.add_all([
+                MedicalRecord(id=n, appointment_id=n, patient_id=10 + n, provider_id=1, diagnosis="Malaria")
+                for n in range(1, 4)
+            ])
+            db.session.commit()
+
+        login_resp = self.client.post("/auth/login", json={
+            "username": "john",
+            "password": "providerpass"
+        })
+        self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+    def tearDown(self):
+        audit_log.close()
+
+    def logged(self):
+        with self.app.app_context():
+            return PhiAccessLog.query.order_by(PhiAccessLog.id).all()
+
+    def test_reads_are_buffered_then_written_in_one_batch(self):
+        self.assertEqual(self.client.get("/medical-records/2", headers=self.auth_header).status_code, 200)
+        self.assertEqual(self.client.get("/medical-records/patient/13", headers=self.auth_header).status_code, 200)
+        self.assertEqual(audit_log.pending(), 2)
+        self.assertEqual(self.logged(), [])
+
+        self.assertEqual(audit_log.flush(), 2)
+        rows = self.logged()
+        self.assertEqual([(row.resource_id, row.patient_id) for row in rows], [(2, 12), (3, 13)])
+        self.assertEqual({(row.user_id, row.role, row.action, row.resource_type) for row in rows},
+                         {(1, "provider", "read", "medical_record")})
+        self.assertEqual(rows[0].endpoint, "medical_records.get_record_by_id")
+
+    def test_a_full_batch_is_written_without_waiting(self):
+        audit_log.batch_size = 3
+        self.client.get("/medical-records", headers=self.auth_header)
+        self.assertEqual(audit_log.pending(), 0)
+        self.assertEqual(len(self.logged()), 3)
+
+    def test_background_thread_flushes_on_the_interval(self):
+        audit_log.background, audit_log.flush_interval = True, 0.05
+        self.client.get("/medical-records/1", headers=self.auth_header)
+        deadline = time.monotonic() + 2
+        while audit_log.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        audit_log.close()
+        self.assertEqual([row.resource_id for row in self.logged()], [1])
+
+    def test_failed_flush_keeps_rows_and_log_is_append_only(self):
+        with self.app.app_context():
+            PhiAccessLog.__table__.drop(db.engine)
+        self.client.get("/medical-records/1", headers=self.auth_header)
+        self.assertEqual(audit_log.flush(), 0)
+        self.assertEqual(audit_log.pending(), 1)
+
+        with self.app.app_context():
+            PhiAccessLog.__table__.create(db.engine)
+        self.assertEqual(audit_log.flush(), 1)
+        with self.app.app_context():
+            with self.assertRaises(DatabaseError):
+                db.session.execute(PhiAccessLog.__table__.delete())
+            db.session.rollback()
+        self.assertEqual(len(self.logged()), 1)
+
+    def test_full_buffer_refuses_reads_while_the_database_is_down(self):
+        audit_log.capacity = 2
+        with self.app.app_context():
+            PhiAccessLog.__table__.drop(db.engine)
+        self.assertEqual(self.client.get("/medical-records/1", headers=self.auth_header).status_code, 200)
+        with self.assertLogs("app.services.audit", level="ERROR"):
+            self.assertEqual(self.client.get("/medical-records/2", headers=self.auth_header).status_code, 200)
+        # Full, and within the flush interval of the failure: refused without another attempt
+        self.assertEqual(self.client.get("/medical-records/3", headers=self.auth_header).status_code, 503)
+        self.assertEqual(audit_log.pending(), 2)
+
+        with self.app.app_context():
+            PhiAccessLog.__table__.create(db.engine)
+        audit_log.flush_interval = 0
+        self.assertEqual(self.client.get("/medical-records/3", headers=self.auth_header).status_code, 200)
+        audit_log.flush()
+        self.assertEqual([row.resource_id for row in self.logged()], [1, 2, 3])
+
+    def test_cli_export_is_attributed_to_the_actor(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["records", "export"])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("--actor", result.output)
+        result = runner.invoke(args=["records", "export", "--actor", "nobody"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertEqual(audit_log.pending(), 0)
+
+        result = runner.invoke(args=["records", "export", "--actor", "john", "--patient-id", "12"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(result.output.splitlines()), 1)
+        audit_log.flush()
+        [row] = self.logged()
+        self.assertEqual((row.user_id, row.role, row.action, row.patient_id), (1, "provider", "export", 12))
+
+    def test_empty_result_is_recorded(self):
+        self.assertEqual(self.client.get("/medical-records/patient/99", headers=self.auth_header).status_code, 200)
+        audit_log.flush()
+        self.assertEqual([(row.resource_id, row.patient_id) for row in self.logged()], [(None, 99)])
+
+if __name__ == '__main__':
+    unittest.main()
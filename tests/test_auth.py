@@ -0,0 +1,227 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from app.extensions import db
+from app.models.revoked_token import RevokedToken
+from app.models.user import User
+from app.services.current_user import user_cache
+from app.services.passwords import PasswordHasher, hasher
+from app.services.token_blocklist import blocklist
+from datetime import datetime, timedelta
+from flask_jwt_extended import decode_token
+from werkzeug.security import generate_password_hash
+
+class AuthTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            user = User(username="john", role="provider", person_id=1)
+            user.set_password("providerpass")
+            db.session.add(user)
+            db.session.commit()
+
+    def login(self):
+        login_resp = self.client.post("/auth/login", json={
+            "username": "john",
+            "password": "providerpass"
+        })
+        self.assertEqual(login_resp.status_code, 200)
+        return login_resp.get_json()["access_token"]
+
+    def test_logout_revokes_token(self):
+        with self.app.app_context():
+            token = self.login()
+            auth_header = {"Authorization": f"Bearer {token}"}
+
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 200)
+            self.assertEqual(self.client.post("/auth/logout", headers=auth_header).status_code, 200)
+
+            response = self.client.get("/appointments", headers=auth_header)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.get_json()["message"], "Token has been revoked")
+
+    def test_cache_picks_up_tokens_revoked_by_other_workers(self):
+        with self.app.app_context():
+            token = self.login()
+            auth_header = {"Authorization": f"Bearer {token}"}
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 200)
+
+            # Simulate a logout handled by another worker process
+            db.session.add(RevokedToken(jti=decode_token(token)["jti"], token_type="access"))
+            db.session.commit()
+            blocklist._last_refresh = None
+
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 401)
+
+    def test_cache_picks_up_revocations_committed_out_of_id_order(self):
+        with self.app.app_context():
+            token = self.login()
+            auth_header = {"Authorization": f"Bearer {token}"}
+            db.session.add(RevokedToken(id=10, jti="committed-first", token_type="access"))
+            db.session.commit()
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 200)
+
+            # Another worker's transaction got id 5 earlier but commits only now
+            db.session.add(RevokedToken(id=5, jti=decode_token(token)["jti"], token_type="access"))
+            db.session.commit()
+            blocklist._last_refresh = None
+
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 401)
+
+    def test_logout_stores_token_expiry(self):
+        with self.app.app_context():
+            token = self.login()
+            self.client.post("/auth/logout", headers={"Authorization": f"Bearer {token}"})
+
+            revoked = RevokedToken.query.filter_by(jti=decode_token(token)["jti"]).first()
+            self.assertIsNotNone(revoked.expires_at)
+            self.assertGreater(revoked.expires_at, datetime.utcnow())
+
+    def test_prune_command_deletes_only_expired_tokens(self):
+        with self.app.app_context():
+            now = datetime.utcnow()
+            db.session.add_all([
+                RevokedToken(jti="expired", token_type="access", expires_at=now - timedelta(minutes=1)),
+                RevokedToken(jti="live", token_type="access", expires_at=now + timedelta(minutes=30)),
+                RevokedToken(jti="legacy", token_type="access", created_at=now - timedelta(days=90)),
+            ])
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["tokens", "prune", "--batch-size", "1"])
+        self.assertIn("Deleted 2 expired revoked tokens.", result.output)
+
+        with self.app.app_context():
+            self.assertEqual([t.jti for t in RevokedToken.query.all()], ["live"])
+
+    def test_current_user_cache_is_invalidated_on_update(self):
+        with self.app.app_context():
+            token = self.login()
+            auth_header = {"Authorization": f"Bearer {token}"}
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 200)
+
+            user = User.query.filter_by(username="john").first()
+            self.assertEqual(user_cache.get(user.id).role, "provider")
+
+            # An entry reloaded between flush and rollback holds uncommitted state; the rollback evicts it
+            user.role = "admin"
+            db.session.flush()
+            user_cache.invalidate(user.id)  # expired meanwhile
+            self.assertEqual(user_cache.get(user.id).role, "admin")
+            db.session.rollback()
+            self.assertEqual(user_cache.get(user.id).role, "provider")
+
+            user.role = "patient"
+            db.session.commit()
+            self.assertEqual(user_cache.get(user.id).role, "patient")
+
+            db.session.delete(user)
+            db.session.commit()
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 401)
+
+    def test_login_rehashes_outdated_password_hash(self):
+        with self.app.app_context():
+            user = User.query.filter_by(username="john").first()
+            user.password_hash = generate_password_hash("providerpass", "pbkdf2:sha256:500")
+            db.session.commit()
+
+            self.login()
+
+            user = User.query.filter_by(username="john").first()
+            self.assertTrue(user.password_hash.startswith(self.app.config["PASSWORD_HASH_METHOD"] + "$"))
+            self.assertTrue(user.check_password("providerpass"))
+
+    def test_methods_without_parameters_match_their_hashes(self):
+        hasher = PasswordHasher()
+        self.app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256"
+        hasher.init_app(self.app)
+        self.assertFalse(hasher.needs_rehash(hasher.hash("providerpass")))
+        self.assertTrue(hasher.needs_rehash(generate_password_hash("providerpass", "pbkdf2:sha256:500")))
+
+    def test_login_fails_fast_when_hashing_is_saturated(self):
+        with self.app.app_context():
+            self.app.config["PASSWORD_HASH_MAX_PENDING"] = 1
+            hasher.init_app(self.app)
+            self.assertTrue(hasher._slots.acquire(blocking=False))  # held by a slow hash elsewhere
+            try:
+                response = self.client.post("/auth/login", json={"username": "john", "password": "providerpass"})
+                self.assertEqual(response.status_code, 503)
+                response = self.client.post("/auth/register-user", json={
+                    "username": "jane", "password": "janepass", "role": "provider", "person_id": 2
+                })
+                self.assertEqual(response.status_code, 503)
+                self.assertIsNone(User.query.filter_by(username="jane").first())
+            finally:
+                hasher._slots.release()
+            self.assertEqual(self.client.post("/auth/login", json={
+                "username": "john", "password": "providerpass"
+            }).status_code, 200)
+
+    def test_refresh_rotates_tokens(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={"username": "john", "password": "providerpass"})
+            refresh_token = login_resp.get_json()["refresh_token"]
+
+            response = self.client.post("/auth/refresh", headers={"Authorization": f"Bearer {refresh_token}"})
+            self.assertEqual(response.status_code, 200)
+            tokens = response.get_json()
+            self.assertNotEqual(tokens["refresh_token"], refresh_token)
+
+            auth_header = {"Authorization": f"Bearer {tokens['access_token']}"}
+            self.assertEqual(self.client.get("/appointments", headers=auth_header).status_code, 200)
+
+    def test_access_token_lifetime_comes_from_config(self):
+        self.app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=5)
+        with self.app.app_context():
+            claims = decode_token(self.login())
+            self.assertEqual(claims["exp"] - claims["iat"], 300)
+
+    def test_refresh_token_reuse_revokes_session(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={"username": "john", "password": "providerpass"})
+            first = login_resp.get_json()["refresh_token"]
+            second = self.client.post("/auth/refresh", headers={"Authorization": f"Bearer {first}"}).get_json()["refresh_token"]
+
+            # Replaying the used token revokes the token that replaced it
+            reuse = self.client.post("/auth/refresh", headers={"Authorization": f"Bearer {first}"})
+            self.assertEqual(reuse.status_code, 401)
+            response = self.client.post("/auth/refresh", headers={"Authorization": f"Bearer {second}"})
+            self.assertEqual(response.status_code, 401)
+
+    def test_refresh_token_reuse_revokes_access_tokens_of_the_session(self):
+        with self.app.app_context():
+            tokens = self.client.post("/auth/login", json={"username": "john", "password": "providerpass"}).get_json()
+            rotated = self.client.post("/auth/refresh",
+                                       headers={"Authorization": f"Bearer {tokens['refresh_token']}"}).get_json()
+            other_session = self.login()
+            for token in (tokens["access_token"], rotated["access_token"], other_session):
+                self.assertEqual(self.client.get("/appointments", headers={"Authorization": f"Bearer {token}"})
+                                 .status_code, 200)
+
+            # A stolen refresh token is replayed: every access token of that session stops working
+            reuse = self.client.post("/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+            self.assertEqual(reuse.status_code, 401)
+            blocklist.refresh_interval = 0  # as another worker would, once it refreshes
+            blocklist._entries.clear()
+            for token in (tokens["access_token"], rotated["access_token"]):
+                self.assertEqual(self.client.get("/appointments", headers={"Authorization": f"Bearer {token}"})
+                                 .status_code, 401)
+            self.assertEqual(self.client.get("/appointments", headers={"Authorization": f"Bearer {other_session}"})
+                             .status_code, 200)
+
+    def test_logout_revokes_refresh_token(self):
+        with self.app.app_context():
+            tokens = self.client.post("/auth/login", json={"username": "john", "password": "providerpass"}).get_json()
+            self.client.post("/auth/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+            response = self.client.post("/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+            self.assertEqual(response.status_code, 401)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,112 @@
+import json
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from app.extensions import db
+from app.models import User, Patient, Provider, Insurance
+
+PATIENTS_CSV = """first_name,last_name,national_id,phone,email
+Wanjiku,Kamau,12345678,0712000001,wanjiku@mail.com
+Otieno,Odhiambo,12345679,,
+Achieng,,12345680,,
+Njeri,Mwangi,12345678,,
+Kiprop,Cheruiyot,87654321,,
+Chebet,Langat,22222222,0712000001,
+"""
+
+class ImportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config["IMPORT_CHUNK_SIZE"] = 2
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            user = User(username="admin", role="admin")
+            user.set_password("adminpass")
+            db.session.add(user)
+            db.session.add(Patient(first_name="Existing", last_name="Patient", national_id="87654321"))
+            db.session.commit()
+
+        login_resp = self.client.post("/auth/login", json={
+            "username": "admin",
+            "password": "adminpass"
+        })
+        self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+    def test_csv_import_validates_dedupes_and_reports_per_row(self):
+        response = self.client.post("/imports/patients", data=PATIENTS_CSV, content_type="text/csv",
+                                    headers=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual({key: body[key] for key in ("rows", "inserted", "invalid", "duplicates")},
+                         {"rows": 6, "inserted": 2, "invalid": 1, "duplicates": 3})
+        self.assertEqual({error["line"]: error["errors"] for error in body["errors"]}, {
+            4: {"last_name": ["Missing data for required field."]},
+            5: {"national_id": ["Already exists."]},  # inserted by the previous chunk
+            6: {"national_id": ["Already exists."]},
+            7: {"phone": ["Already exists."]},
+        })
+        self.assertFalse(body["errors_truncated"])
+
+        with self.app.app_context():
+            imported = Patient.query.filter(Patient.last_name.in_(["Kamau", "Odhiambo"])).all()
+            self.assertEqual(len({patient.patient_number for patient in imported}), 2)
+            self.assertTrue(all(patient.patient_id for patient in imported))
+
+        # Imported names are searchable straight away
+        response = self.client.get("/patients?search=wanjiku", headers=self.auth_header)
+        self.assertEqual([p["last_name"] for p in response.get_json()], ["Kamau"])
+
+    def test_ndjson_insurance_import_checks_patients_and_json(self):
+        with self.app.app_context():
+            patient_id = Patient.query.one().id
+        lines = [
+            json.dumps({"patient_id": patient_id, "provider_name": "NHIF", "policy_number": "P-1", "expiry_date": "2030-01-01"}),
+            "{not json",
+            json.dumps({"patient_id": 999, "provider_name": "NHIF", "policy_number": "P-2", "expiry_date": "2030-01-01"}),
+            json.dumps({"patient_id": patient_id, "provider_name": "AAR", "policy_number": "P-1", "expiry_date": "2031-01-01"}),
+        ]
+        response = self.client.post("/imports/insurance", data="\n".join(lines), headers=self.auth_header)
+        body = response.get_json()
+        self.assertEqual((body["inserted"], body["invalid"], body["duplicates"]), (1, 2, 1))
+        self.assertEqual(sorted(error["line"] for error in body["errors"]), [2, 3, 4])
+        with self.app.app_context():
+            self.assertEqual(Insurance.query.count(), 1)
+
+    def test_provider_import_refreshes_reference_data_and_cli(self):
+        path = os.path.join(self.app.instance_path, "providers.ndjson")
+        os.makedirs(self.app.instance_path, exist_ok=True)
+        with open(path, "w") as source:
+            source.write(json.dumps({"first_name": "Amina", "last_name": "Said", "cadre": "Dentist"}) + "\n")
+            source.write(json.dumps({"first_name": "Ali", "cadre": "Dentist"}) + "\n")
+        try:
+            result = self.app.test_cli_runner().invoke(args=["data", "import", "providers", path])
+        finally:
+            os.remove(path)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("inserted 1, invalid 1, duplicates 0", result.output)
+
+        with self.app.app_context():
+            self.assertEqual(Provider.query.count(), 1)
+        response = self.client.get("/reference-data", headers=self.auth_header)
+        self.assertEqual(response.get_json()["cadres"], ["Dentist"])
+
+    def test_import_is_admin_only(self):
+        with self.app.app_context():
+            user = User(username="doc", role="provider", person_id=1)
+            user.set_password("docpass")
+            db.session.add(user)
+            db.session.commit()
+        token = self.client.post("/auth/login", json={"username": "doc", "password": "docpass"}).get_json()["access_token"]
+        response = self.client.post("/imports/patients", data=PATIENTS_CSV, content_type="text/csv",
+                                    headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.post("/imports/visits", data="", headers=self.auth_header).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import csv
+import gzip
+import io
+import json
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from app.extensions import db
+from app.models import User, AppointmentType, MedicalRecord, Patient
+from app.services import record_export
+
+class MedicalRecordTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            user = User(username="john", role="provider", person_id=1)
+            user.set_password("providerpass")
+            db.session.add(user)
+            db.session.add(AppointmentType(id=1, name="Consultation"))
+            db.session.add_all([
+                MedicalRecord(id=1, appointment_id=1, patient_id=1, provider_id=1,
+                              diagnosis="Malaria", treatment="Artemether", notes="Fever for three days"),
+                MedicalRecord(id=2, appointment_id=2, patient_id=2, provider_id=1,
+                              diagnosis="Typhoid", treatment="Ciprofloxacin", notes="Rule out malaria"),
+                MedicalRecord(id=3, appointment_id=3, patient_id=3, provider_id=1,
+                              diagnosis="Hypertension", treatment="Amlodipine", notes="Review in a month"),
+                MedicalRecord(id=4, appointment_id=4, patient_id=4, provider_id=2,
+                              diagnosis="Malaria", treatment="Artesunate", notes=None),
+            ])
+            db.session.commit()
+
+        login_resp = self.client.post("/auth/login", json={
+            "username": "john",
+            "password": "providerpass"
+        })
+        self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+    def search(self, query, **params):
+        return self.client.get("/medical-records", query_string={"q": query, **params}, headers=self.auth_header)
+
+    def test_search_ranks_diagnosis_matches_first_and_highlights(self):
+        response = self.search("malaria")
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()
+        # record 4 belongs to another provider
+        self.assertEqual([r["id"] for r in results], [1, 2])
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+        self.assertIn("<mark>Malaria</mark>", results[0]["highlight"])
+        self.assertIn("<mark>malaria</mark>", results[1]["highlight"])
+
+    def test_search_pages_with_a_cursor(self):
+        first = self.search("malaria", limit=1)
+        self.assertEqual([r["id"] for r in first.get_json()], [1])
+        cursor = first.headers["X-Next-Cursor"]
+
+        second = self.search("malaria", limit=1, cursor=cursor)
+        self.assertEqual([r["id"] for r in second.get_json()], [2])
+        self.assertNotIn("X-Next-Cursor", second.headers)
+
+        self.assertEqual(self.search("malaria", cursor="garbage").status_code, 400)
+
+    def test_search_rejects_operators_and_empty_queries(self):
+        self.assertEqual(self.search("  ").status_code, 400)
+        response = self.search('malaria"* ^(')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["id"] for r in response.get_json()], [1, 2])
+
+    def test_index_follows_updates_and_deletes(self):
+        with self.app.app_context():
+            db.session.get(MedicalRecord, 3).notes = "Suspected malaria"
+            db.session.delete(db.session.get(MedicalRecord, 1))
+            db.session.commit()
+
+        self.assertEqual(sorted(r["id"] for r in self.search("malaria").get_json()), [2, 3])
+        self.assertEqual(self.search("three days").get_json(), [])
+
+    def test_export_streams_joined_rows_as_ndjson(self):
+        with self.app.app_context():
+            db.session.add(Patient(id=1, first_name="Jane", last_name="Doe", patient_number="PAT-001"))
+            db.session.commit()
+
+        response = self.client.get("/medical-records/export", headers=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        # scoped to the provider's own records
+        self.assertEqual([row["record_id"] for row in rows], [1, 2, 3])
+        self.assertEqual((rows[0]["patient_number"], rows[0]["patient_last_name"]), ("PAT-001", "Doe"))
+        self.assertIsNone(rows[1]["patient_number"])
+
+    def test_export_csv_in_small_gzipped_chunks(self):
+        record_export.CHUNK_BYTES, chunk_bytes = 1, record_export.CHUNK_BYTES
+        try:
+            response = self.client.get("/medical-records/export?format=csv&gzip=true", headers=self.auth_header)
+            chunks = list(response.response)
+        finally:
+            record_export.CHUNK_BYTES = chunk_bytes
+        self.assertEqual(response.mimetype, "application/gzip")
+        self.assertIn('filename="medical-records.csv.gz"', response.headers["Content-Disposition"])
+        self.assertGreater(len(chunks), 1)
+
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b"".join(chunks)).decode())))
+        self.assertEqual([row["diagnosis"] for row in rows], ["Malaria", "Typhoid", "Hypertension"])
+        self.assertEqual(rows[2]["notes"], "Review in a month")
+
+    def test_export_rejects_unknown_format(self):
+        response = self.client.get("/medical-records/export?format=xml", headers=self.auth_header)
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
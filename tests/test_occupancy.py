@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from app.extensions import db
+from app.models import User, AppointmentType, ProviderDayOccupancy
+from app.services import occupancy
+from datetime import date, datetime
+
+DAY = date(2023, 10, 2)  # a Monday, inside the default working hours
+
+class OccupancyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            user = User(username="john", role="provider", person_id=1)
+            user.set_password("providerpass")
+            db.session.add(user)
+            db.session.add(AppointmentType(id=1, name="Consultation"))
+            db.session.commit()
+
+        login_resp = self.client.post("/auth/login", json={
+            "username": "john",
+            "password": "providerpass"
+        })
+        self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+    def book(self, provider_id, start, end):
+        response = self.client.post("/appointments", json={
+            "patient_id": 2,
+            "provider_id": provider_id,
+            "start_time": f"2023-10-02T{start}:00",
+            "end_time": f"2023-10-02T{end}:00",
+            "appointment_type_id": 1,
+        }, headers=self.auth_header)
+        return response.get_json()["appointment_id"]
+
+    def busy_slots(self, provider_id):
+        bits = occupancy.day_bitmaps([provider_id], DAY)[provider_id]
+        return [
+            f"{slot * 15 // 60:02d}:{slot * 15 % 60:02d}"
+            for slot in range(occupancy.SLOTS_PER_DAY) if bits >> slot & 1
+        ]
+
+    def test_bitmaps_follow_bookings_and_status_changes(self):
+        with self.app.app_context():
+            appointment_id = self.book(1, "10:00", "10:20")
+            self.assertEqual(self.busy_slots(1), ["10:00", "10:15"])
+
+            self.client.patch(f"/appointments/{appointment_id}/status", json={
+                "status": "rescheduled",
+                "rescheduled_start_time": "2023-10-02T14:00:00",
+                "rescheduled_end_time": "2023-10-02T14:15:00"
+            }, headers=self.auth_header)
+            self.assertEqual(self.busy_slots(1), ["14:00"])
+
+            self.client.patch(f"/appointments/{appointment_id}/status", json={"status": "cancelled"},
+                              headers=self.auth_header)
+            self.assertEqual(self.busy_slots(1), [])
+
+    def test_bulk_paths_refresh_bitmaps(self):
+        with self.app.app_context():
+            response = self.client.post("/appointments/bulk", json=[
+                {"patient_id": 2, "provider_id": 2, "appointment_type_id": 1,
+                 "start_time": "2023-10-02T09:00:00", "end_time": "2023-10-02T09:30:00"},
+                {"patient_id": 3, "provider_id": 2, "appointment_type_id": 1,
+                 "start_time": "2023-10-02T11:00:00", "end_time": "2023-10-02T11:15:00"},
+            ], headers=self.auth_header)
+            self.assertEqual(response.get_json()["created"], 2)
+            self.assertEqual(self.busy_slots(2), ["09:00", "09:15", "11:00"])
+
+            self.client.patch("/appointments/status", json={
+                "provider_id": 1, "from": "2023-10-02T00:00:00", "to": "2023-10-03T00:00:00", "status": "cancelled"
+            }, headers=self.auth_header)
+            self.assertEqual(self.busy_slots(2), ["09:00", "09:15", "11:00"])
+
+    def test_who_is_free(self):
+        with self.app.app_context():
+            self.book(1, "10:00", "10:30")
+            self.book(2, "10:15", "10:45")
+
+            def free(at, minutes):
+                response = self.client.get(
+                    f"/appointments/free-providers?at=2023-10-02T{at}:00&minutes={minutes}"
+                    "&provider_id=1&provider_id=2&provider_id=3",
+                    headers=self.auth_header
+                )
+                self.assertEqual(response.status_code, 200)
+                return response.get_json()["provider_ids"]
+
+            self.assertEqual(free("10:00", 15), [2, 3])
+            self.assertEqual(free("10:00", 30), [3])
+            self.assertEqual(free("09:45", 15), [1, 2, 3])
+            self.assertEqual(free("10:30", 15), [1, 3])
+            self.assertEqual(free("16:45", 30), [])  # past the end of the working day
+
+    def test_rebuild_command(self):
+        with self.app.app_context():
+            self.book(1, "10:00", "10:30")
+            ProviderDayOccupancy.query.delete()
+            db.session.commit()
+            self.assertEqual(self.busy_slots(1), [])
+
+            result = self.app.test_cli_runner().invoke(args=["occupancy", "rebuild"])
+            self.assertIn("Rebuilt 1 provider-day bitmaps.", result.output)
+            self.assertEqual(self.busy_slots(1), ["10:00", "10:15"])
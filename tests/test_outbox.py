@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from app.extensions import db
+from app.models import User, Patient, OutboxMessage, AppointmentType
+from app.services.notifications import FileSender
+from app.services.outbox import dispatch_batch
+from datetime import datetime, timedelta
+
+class FailingSender:
+    def send(self, notification):
+        raise ConnectionError("gateway down")
+
+class OutboxTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+        handle, self.path = tempfile.mkstemp(suffix=".log")
+        os.close(handle)
+        self.app.config["NOTIFICATION_FILE_PATH"] = self.path
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            user = User(username="john", role="provider", person_id=1)
+            user.set_password("providerpass")
+            db.session.add(user)
+            db.session.add(AppointmentType(id=1, name="Consultation"))
+            db.session.add(Patient(id=2, first_name="Amina", last_name="Otieno", phone="+254700000001"))
+            db.session.commit()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def book(self):
+        login_resp = self.client.post("/auth/login", json={
+            "username": "john",
+            "password": "providerpass"
+        })
+        self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+        self.start = (datetime.now() + timedelta(days=3)).replace(microsecond=0)
+        response = self.client.post("/appointments", json={
+            "patient_id": 2,
+            "provider_id": 1,
+            "start_time": self.start.isoformat(),
+            "end_time": (self.start + timedelta(minutes=30)).isoformat(),
+            "appointment_type_id": 1,
+        }, headers=self.auth_header)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["appointment_id"]
+
+    def test_booking_queues_reminders_for_the_dispatcher(self):
+        with self.app.app_context():
+            appointment_id = self.book()
+            due = [message.due_at for message in OutboxMessage.query.filter_by(appointment_id=appointment_id)]
+            self.assertEqual(sorted(due), [self.start - timedelta(hours=24), self.start - timedelta(hours=2)])
+
+            # Nothing is due yet
+            self.assertEqual(dispatch_batch(FileSender(self.path), 10), (0, 0, 0))
+
+            sender = FileSender.from_config(self.app.config)
+            self.assertEqual(dispatch_batch(sender, 10, now=self.start - timedelta(hours=1)), (2, 0, 0))
+            with open(self.path) as handle:
+                sent = [json.loads(line) for line in handle]
+            self.assertEqual([line["recipient"] for line in sent], ["+254700000001", "+254700000001"])
+            self.assertEqual({message.status for message in OutboxMessage.query}, {"sent"})
+
+    def test_cancelling_withdraws_reminders(self):
+        with self.app.app_context():
+            appointment_id = self.book()
+            response = self.client.patch(f"/appointments/{appointment_id}/status", json={
+                "status": "cancelled"
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+
+            statuses = sorted((message.kind, message.status) for message in OutboxMessage.query)
+            self.assertEqual(statuses, [
+                ("appointment_cancelled", "pending"),
+                ("appointment_reminder", "cancelled"),
+                ("appointment_reminder", "cancelled"),
+            ])
+            self.assertEqual(dispatch_batch(FileSender(self.path), 10), (1, 0, 0))
+
+    def test_failed_sends_are_retried_with_backoff(self):
+        with self.app.app_context():
+            self.book()
+            now = self.start - timedelta(hours=1)
+            self.assertEqual(dispatch_batch(FailingSender(), 10, now=now), (0, 0, 2))
+
+            for message in OutboxMessage.query:
+                self.assertEqual(message.status, "pending")
+                self.assertEqual(message.attempts, 1)
+                self.assertEqual(message.last_error, "gateway down")
+                self.assertGreater(message.due_at, datetime.now())
+
+    def test_dispatch_command(self):
+        with self.app.app_context():
+            self.book()
+            OutboxMessage.query.update({"due_at": datetime.now() - timedelta(minutes=1)})
+            db.session.commit()
+
+        self.app.config["NOTIFICATION_SENDER"] = "app.services.notifications.FileSender"
+        result = self.app.test_cli_runner().invoke(args=["outbox", "dispatch", "--once"])
+        self.assertIn("Sent 2, skipped 0, failed 0", result.output)
@@ -6,8 +6,13 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app
+from sqlalchemy import event
+
 from app.extensions import db
 from app.models.user import User
+from app.models.patient import Patient
+from app.services.patient_numbers import PatientNumberAllocator, patient_numbers
+from app.services.record_linkage import blocking_keys, soundex
 
 class PatientTestCase(unittest.TestCase):
     def setUp(self):
@@ -111,5 +116,155 @@ class PatientTestCase(unittest.TestCase):
             response = self.client.get(f"/patients/{patient_id}", headers=self.auth_header)
             self.assertEqual(response.status_code, 200)
 
+    def test_search_patients_ranks_fuzzy_names_and_prefixes(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "admin",
+                "password": "adminpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            for n, (first_name, last_name) in enumerate([("Wanjiku", "Kamau"), ("Wanjiru", "Otieno"), ("Achieng", "Odhiambo")]):
+                response = self.client.post("/patients", json={
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "national_id": f"2345678{n}",
+                }, headers=self.auth_header)
+                self.assertEqual(response.status_code, 201)
+
+            # A typo still finds the patient, best match first
+            response = self.client.get("/patients?search=wanjku", headers=self.auth_header)
+            self.assertEqual([p["first_name"] for p in response.get_json()][0], "Wanjiku")
+
+            response = self.client.get("/patients?search=wanjiku kamau&limit=1", headers=self.auth_header)
+            self.assertEqual([p["last_name"] for p in response.get_json()], ["Kamau"])
+
+            # Identifier prefixes take the indexed path
+            response = self.client.get("/patients?search=pat-002", headers=self.auth_header)
+            self.assertEqual([p["first_name"] for p in response.get_json()], ["Wanjiru"])
+            response = self.client.get("/patients?search=2345", headers=self.auth_header)
+            self.assertEqual(len(response.get_json()), 3)
+
+            # Renames are searchable straight away
+            Patient.query.filter_by(first_name="Achieng").one().first_name = "Akinyi"
+            db.session.commit()
+            self.assertEqual(self.client.get("/patients?search=achieng", headers=self.auth_header).get_json(), [])
+            self.assertEqual(len(self.client.get("/patients?search=akinyi", headers=self.auth_header).get_json()), 1)
+
+    def test_patient_numbers_come_from_disjoint_blocks(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "admin",
+                "password": "adminpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            numbers = [
+                self.client.post("/patients", json={"first_name": "Jane", "last_name": f"Doe{n}"},
+                                 headers=self.auth_header).get_json()["patient_number"]
+                for n in range(3)
+            ]
+            self.assertEqual(numbers, ["PAT-001", "PAT-002", "PAT-003"])
+
+            # Another worker reserves the next block instead of reading the patients table
+            other_worker = PatientNumberAllocator()
+            self.assertEqual(other_worker.take(2), ["PAT-051", "PAT-052"])
+            self.assertEqual(patient_numbers.next_number(), "PAT-004")
+            self.assertEqual(len(set(other_worker.take(120))), 120)
+
+    def test_find_duplicates_links_look_alike_patients(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "admin",
+                "password": "adminpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            self.assertEqual(soundex("Otieno"), soundex("Otiyeno"))
+            self.assertIn("ph:7123456", blocking_keys("Jane", "Otieno", None, "+254 712 345 6"))
+
+            def register(first_name, last_name, date_of_birth, phone=None):
+                data = {"first_name": first_name, "last_name": last_name, "date_of_birth": date_of_birth}
+                if phone:
+                    data["phone"] = phone
+                response = self.client.post("/patients", json=data, headers=self.auth_header)
+                self.assertEqual(response.status_code, 201)
+                return response.get_json()["patient_id"]
+
+            original = register("Wanjiku", "Kamau", "1990-04-12", "0712345678")
+            typo = register("Wanjku", "Kamau", "1990-04-12")
+            register("Wanjiku", "Kamau", "1975-09-30")  # same name, different person
+            register("Achieng", "Odhiambo", "1990-04-12")
+
+            runner = self.app.test_cli_runner()
+            result = runner.invoke(args=["patients", "find-duplicates"])
+            self.assertIn("Checked 4 patients (full), found 1 new", result.output)
+
+            response = self.client.get("/patients/duplicates", headers=self.auth_header)
+            [candidate] = response.get_json()
+            self.assertEqual((candidate["person_id"], candidate["duplicate_person_id"]), (original, typo))
+            self.assertIn("date_of_birth", candidate["reasons"])
+
+            # Incremental runs only check newcomers, against the existing blocks
+            swapped = register("Kamau", "Wanjiku", "1990-04-12", "+254712345678")
+            result = runner.invoke(args=["patients", "find-duplicates", "--incremental"])
+            self.assertIn("Checked 1 patients (incremental), found 1 new", result.output)
+            result = runner.invoke(args=["patients", "find-duplicates", "--incremental"])
+            self.assertIn("Checked 0 patients", result.output)
+
+            # Reviewers page through the most likely pairs first
+            first = self.client.get("/patients/duplicates?limit=1", headers=self.auth_header)
+            second = self.client.get("/patients/duplicates?limit=1&cursor=" + first.headers["X-Next-Cursor"],
+                                     headers=self.auth_header)
+            [top], [below] = first.get_json(), second.get_json()
+            self.assertGreaterEqual(top["score"], below["score"])
+            self.assertNotEqual(top["id"], below["id"])
+            self.assertNotIn("X-Next-Cursor", second.headers)
+
+            response = self.client.patch(f"/patients/duplicates/{candidate['id']}", json={"status": "dismissed"},
+                                         headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            response = self.client.get("/patients/duplicates", headers=self.auth_header)
+            self.assertEqual({c["duplicate_person_id"] for c in response.get_json()}, {swapped})
+
+    def test_directory_pages_with_sparse_fields(self):
+        with self.app.app_context():
+            login_resp = self.client.post("/auth/login", json={
+                "username": "admin",
+                "password": "adminpass"
+            })
+            self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+            for first_name, last_name in [("Wanjiku", "Otieno"), ("Achieng", "Kamau"), ("Njeri", "Mwangi")]:
+                self.client.post("/patients", json={"first_name": first_name, "last_name": last_name},
+                                 headers=self.auth_header)
+
+            statements = []
+            capture = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", capture)
+            try:
+                response = self.client.get("/patients?fields=id,last_name&sort=last_name&limit=2",
+                                           headers=self.auth_header)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", capture)
+            self.assertEqual([p["last_name"] for p in response.get_json()], ["Kamau", "Mwangi"])
+            self.assertEqual(set(response.get_json()[0]), {"id", "last_name"})
+            [select] = [statement for statement in statements if "FROM persons" in statement]
+            self.assertNotIn("date_of_birth", select)
+
+            response = self.client.get("/patients?fields=id,last_name&sort=last_name&limit=2&cursor="
+                                       + response.headers["X-Next-Cursor"], headers=self.auth_header)
+            self.assertEqual([p["last_name"] for p in response.get_json()], ["Otieno"])
+            self.assertNotIn("X-Next-Cursor", response.headers)
+
+            # Unsorted pages follow registration order and carry every field
+            response = self.client.get("/patients", headers=self.auth_header)
+            self.assertEqual([p["patient_number"] for p in response.get_json()], ["PAT-001", "PAT-002", "PAT-003"])
+
+            response = self.client.get("/patients?fields=id,password", headers=self.auth_header)
+            self.assertEqual(response.status_code, 400)
+            response = self.client.get("/patients?sort=phone", headers=self.auth_header)
+            self.assertEqual(response.status_code, 400)
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from app.config import TestingConfig, app_config
+from app.extensions import db
+from app.models import User
+from app.services.read_replica import replica_router
+
+DATABASE_DIR = tempfile.mkdtemp()
+
+class ReplicaTestingConfig(TestingConfig):
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(DATABASE_DIR, 'primary.db')}"
+    SQLALCHEMY_BINDS = {"replica": f"sqlite:///{os.path.join(DATABASE_DIR, 'replica.db')}"}
+
+app_config['testing-replica'] = ReplicaTestingConfig
+
+class ReadReplicaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing-replica')
+        self.client = self.app.test_client()
+        self.runner = self.app.test_cli_runner()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            for username in ("admin", "clerk"):
+                user = User(username=username, role="admin")
+                user.set_password("adminpass")
+                db.session.add(user)
+            db.session.commit()
+
+        result = self.runner.invoke(args=["replica", "sync"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.headers = {}
+        for username in ("admin", "clerk"):
+            login_resp = self.client.post("/auth/login", json={"username": username, "password": "adminpass"})
+            self.headers[username] = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+    @classmethod
+    def tearDownClass(cls):
+        # db keeps a metadata per bind key it has seen; the other suites' apps have no replica bind
+        db.metadatas.pop("replica", None)
+        shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+
+    def listed(self, username):
+        response = self.client.get("/patients", headers=self.headers[username])
+        self.assertEqual(response.status_code, 200)
+        return [patient["last_name"] for patient in response.get_json()]
+
+    def test_reads_go_to_the_replica_except_right_after_own_writes(self):
+        response = self.client.post("/patients", json={"first_name": "Jane", "last_name": "Otieno"},
+                                    headers=self.headers["admin"])
+        self.assertEqual(response.status_code, 201)
+
+        # The writer reads the primary; everyone else the (stale) replica
+        self.assertEqual(self.listed("admin"), ["Otieno"])
+        self.assertEqual(self.listed("clerk"), [])
+
+        replica_router.sticky_seconds = 0
+        self.assertEqual(self.listed("admin"), [])
+
+        self.runner.invoke(args=["replica", "sync"])
+        self.assertEqual(self.listed("clerk"), ["Otieno"])
+
+    def test_expired_writers_are_forgotten(self):
+        replica_router.sticky_seconds = 0.05
+        for username in ("admin", "clerk"):
+            response = self.client.post("/patients", json={"first_name": "Jane", "last_name": username},
+                                        headers=self.headers[username])
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica_router._writers), 2)
+
+        time.sleep(0.06)
+        self.client.post("/patients", json={"first_name": "Jane", "last_name": "Otieno"}, headers=self.headers["admin"])
+        self.assertEqual(len(replica_router._writers), 1)
+
+    def test_unlisted_blueprints_read_the_primary(self):
+        response = self.client.post("/patients", json={"first_name": "Jane", "last_name": "Otieno"},
+                                    headers=self.headers["admin"])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.listed("clerk"), [])
+
+        replica_router.blueprints = frozenset({"appointments"})
+        self.assertEqual(self.listed("clerk"), ["Otieno"])
+
+    def test_sync_needs_a_replica(self):
+        app = create_app('testing')
+        result = app.test_cli_runner().invoke(args=["replica", "sync"])
+        self.assertIn("No replica configured", result.output)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
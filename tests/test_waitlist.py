@@ -0,0 +1,147 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import create_app
+from app.extensions import db
+from app.models import User, Appointment, AppointmentType, OutboxMessage, Patient, Provider, WaitlistEntry
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy.exc import OperationalError
+
+class WaitlistTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            user = User(username="john", role="provider", person_id=1)
+            user.set_password("providerpass")
+            db.session.add(user)
+            db.session.add(AppointmentType(id=1, name="Consultation"))
+            db.session.add_all([Provider(id=provider_id, first_name="Jane", last_name=f"Wanjiru{provider_id}",
+                                         cadre="Doctor") for provider_id in (1, 9)])
+            db.session.add_all([Patient(id=patient_id, first_name="Amina", last_name=f"Otieno{patient_id}")
+                                for patient_id in range(2, 8)])
+            db.session.commit()
+
+        login_resp = self.client.post("/auth/login", json={
+            "username": "john",
+            "password": "providerpass"
+        })
+        self.auth_header = {"Authorization": f"Bearer {login_resp.get_json()['access_token']}"}
+        self.slot = (datetime.now() + timedelta(days=7)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    def book(self, patient_id, minutes_later=0):
+        start = self.slot + timedelta(minutes=minutes_later)
+        response = self.client.post("/appointments", json={
+            "patient_id": patient_id,
+            "provider_id": 1,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(minutes=30)).isoformat(),
+            "appointment_type_id": 1,
+        }, headers=self.auth_header)
+        return response.get_json()["appointment_id"]
+
+    def wait(self, patient_id, provider_id=1, priority=5, earliest=-60, latest=120, minutes=30):
+        response = self.client.post("/waitlist", json={
+            "patient_id": patient_id,
+            "provider_id": provider_id,
+            "earliest_start": (self.slot + timedelta(minutes=earliest)).isoformat(),
+            "latest_end": (self.slot + timedelta(minutes=latest)).isoformat(),
+            "duration_minutes": minutes,
+            "priority": priority,
+        }, headers=self.auth_header)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["id"]
+
+    def cancel(self, appointment_id, **options):
+        body = {"status": "cancelled", "fill_waitlist": True, **options}
+        response = self.client.patch(f"/appointments/{appointment_id}/status",
+                                     json={key: value for key, value in body.items() if value is not None},
+                                     headers=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cancellation_books_the_best_fitting_entry(self):
+        with self.app.app_context():
+            appointment_id = self.book(2)
+            regular = self.wait(3)
+            urgent_any_provider = self.wait(4, provider_id=None, priority=1)
+            self.wait(5, priority=0, earliest=30)  # window starts after the freed slot
+            self.wait(6, provider_id=9, priority=0)  # waits for another provider
+            self.wait(7, priority=0, minutes=45)  # longer than the freed slot
+
+            self.cancel(appointment_id)
+            entry = db.session.get(WaitlistEntry, urgent_any_provider)
+            self.assertEqual(entry.status, "booked")
+            booked = db.session.get(Appointment, entry.appointment_id)
+            self.assertEqual((booked.patient_id, booked.provider_id, booked.start_time), (4, 1, self.slot))
+            self.assertEqual(
+                OutboxMessage.query.filter_by(appointment_id=booked.id, kind="waitlist_offer").count(), 1
+            )
+
+            # Declining the offer passes the slot on
+            self.cancel(booked.id)
+            db.session.expire_all()
+            self.assertEqual(db.session.get(WaitlistEntry, regular).status, "booked")
+
+    def test_withdrawn_entries_are_not_matched(self):
+        with self.app.app_context():
+            appointment_id = self.book(2)
+            entry_id = self.wait(3)
+            response = self.client.delete(f"/waitlist/{entry_id}", headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+
+            self.cancel(appointment_id)
+            self.assertEqual(Appointment.query.filter_by(status="scheduled").count(), 0)
+
+            response = self.client.get("/waitlist?status=withdrawn", headers=self.auth_header)
+            self.assertEqual([entry["id"] for entry in response.get_json()], [entry_id])
+
+    def test_provider_cancellations_only_fill_the_waitlist_on_request(self):
+        with self.app.app_context():
+            single, first, second = self.book(2), self.book(3, 30), self.book(4, 60)
+            self.wait(5)
+            self.wait(6)
+
+            # A provider cancelling is probably absent, so their freed slot is not rebooked with them
+            self.cancel(single, fill_waitlist=None)
+            self.cancel(first, fill_waitlist=False)
+            response = self.client.patch("/appointments/status", json={
+                "provider_id": 1, "status": "cancelled",
+                "from": self.slot.isoformat(), "to": (self.slot + timedelta(days=1)).isoformat(),
+            }, headers=self.auth_header)
+            self.assertEqual(response.get_json()["waitlist_appointment_ids"], [])
+            self.assertEqual(Appointment.query.filter_by(status="scheduled").count(), 0)
+            self.assertEqual(WaitlistEntry.query.filter_by(status="waiting").count(), 2)
+            self.assertEqual(db.session.get(Appointment, second).status, "cancelled")
+
+    def test_waitlist_entries_need_existing_people(self):
+        with self.app.app_context():
+            response = self.client.post("/waitlist", json={
+                "patient_id": 42,
+                "earliest_start": self.slot.isoformat(),
+                "latest_end": (self.slot + timedelta(hours=1)).isoformat(),
+                "duration_minutes": 30,
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 404)
+            response = self.client.post("/waitlist", json={
+                "patient_id": 2, "provider_id": 42,
+                "earliest_start": self.slot.isoformat(),
+                "latest_end": (self.slot + timedelta(hours=1)).isoformat(),
+                "duration_minutes": 30,
+            }, headers=self.auth_header)
+            self.assertEqual(response.status_code, 404)
+
+    def test_failed_matching_does_not_fail_the_cancellation(self):
+        with self.app.app_context():
+            appointment_id = self.book(2)
+            self.wait(3)
+            with mock.patch("app.services.waitlist.fill_slot", side_effect=OperationalError("SELECT", {}, None)), \
+                    self.assertLogs("app.services.waitlist", level="ERROR"):
+                self.cancel(appointment_id)
+            self.assertEqual(db.session.get(Appointment, appointment_id).status, "cancelled")